@@ -0,0 +1,16 @@
+"""
+Benchmarks for the hospital management controllers.
+
+    workload             Seeded synthetic hospital data at configurable scale.
+    suite                Timed scenarios through the controllers, with JSON output.
+    doctor_availability  Free-slot search at 500 doctors and 1M appointments.
+    query_logging        Cost of logging inside DatabaseController.query().
+    write_coalescing     Concurrent history writes with and without group commits.
+    history_search       FTS5 medical history search against LIKE at 5M entries.
+    model_memory         Bytes per patient of a 200k patient in-memory census.
+    warm_start           Rebuilding the model graph of a 100k-patient hospital.
+    census               Dashboard counts from the census engine against GROUP BY.
+    change_feed          Following the change feed against rescanning the tables.
+
+Run a module with python -m, e.g. python -m benchmarks.suite --scale small.
+"""
@@ -0,0 +1,82 @@
+"""
+Benchmark: dashboard counts from the census engine against GROUP BY queries.
+
+Seeds a hospital with benchmarks.workload and answers the ward dashboard's questions both ways:
+counts by condition, admission status, insurance and room type, and a filtered count. Also
+times the incremental census update that the admit and discharge write paths make.
+
+    python -m benchmarks.census [patients]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.suite import quiet_logging
+from benchmarks.workload import Scale, generate
+from controllers.database_controller import DatabaseController
+
+DASHBOARD_SQL = {
+    'condition': "SELECT condition, COUNT(*) FROM (SELECT condition FROM inpatients UNION ALL "
+                 "SELECT condition FROM outpatients) GROUP BY condition",
+    'admission_status': "SELECT admission_status, COUNT(*) FROM (SELECT admission_status FROM inpatients UNION ALL "
+                        "SELECT admission_status FROM outpatients) GROUP BY admission_status",
+    'insurance': "SELECT insurance, COUNT(*) FROM (SELECT insurance FROM inpatients UNION ALL "
+                 "SELECT insurance FROM outpatients) GROUP BY insurance",
+    'room_type': "SELECT rooms.room_type, COUNT(*) FROM inpatients JOIN rooms USING (room_number) "
+                 "GROUP BY rooms.room_type",
+}
+FILTERED_SQL = ("SELECT COUNT(*) FROM inpatients JOIN rooms USING (room_number) "
+                "WHERE rooms.room_type = 'ICU' AND inpatients.condition IN ('Critical', 'Under treatment') "
+                "AND inpatients.admission_status = 'Admitted'")
+
+
+def timed(function, repeat=20):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6, result
+
+
+def run(patients=200000):
+    scale = Scale(rooms=patients // 4, patients=patients, doctors=1, nurses=1, appointments=1, tasks=1, shifts=1,
+                  medical_history=1)
+    with tempfile.TemporaryDirectory() as tmp_dir, quiet_logging():
+        db = DatabaseController(os.path.join(tmp_dir, 'census.db'))
+        generate(db, scale, seed=0)
+        census = db.census
+        started = time.perf_counter()
+        census.load()
+        load_ms = (time.perf_counter() - started) * 1000
+
+        sql_us, _ = timed(lambda: {name: db.query(sql) for name, sql in DASHBOARD_SQL.items()}, repeat=3)
+        summary_us, _ = timed(census.summary)
+        sql_filtered_us, expected = timed(lambda: db.query(FILTERED_SQL)[0][0], repeat=3)
+        filtered_us, found = timed(lambda: census.count(room_type='ICU', condition=['Critical', 'Under treatment'],
+                                                        admission_status='Admitted'))
+        update_us, _ = timed(lambda: (census.update('inpatients', 1, admission_status='Discharged'),
+                                      census.update('inpatients', 1, admission_status='Admitted')), repeat=1000)
+        verify_started = time.perf_counter()
+        differences = census.verify()
+        verify_ms = (time.perf_counter() - verify_started) * 1000
+        groups = census.stats()['groups']
+        db.close()
+
+    result = {'patients': patients, 'groups': groups, 'load_ms': load_ms, 'sql_dashboard_us': sql_us,
+              'census_summary_us': summary_us, 'sql_filtered_us': sql_filtered_us, 'census_filtered_us': filtered_us,
+              'filtered_matches': found == expected, 'update_us': update_us / 2, 'verify_ms': verify_ms,
+              'consistent': not differences}
+    print(f"{patients} patients in {groups} census groups, snapshot loaded in {load_ms:.0f} ms")
+    print(f"dashboard counts: GROUP BY queries {sql_us:.0f} us, census summary {summary_us:.0f} us")
+    print(f"filtered count:   SQL {sql_filtered_us:.0f} us, census {filtered_us:.1f} us "
+          f"({'same' if found == expected else 'DIFFERENT'} result)")
+    print(f"incremental update {update_us / 2:.1f} us, consistency check {verify_ms:.0f} ms "
+          f"({'consistent' if not differences else f'{len(differences)} groups differ'})")
+    return result
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
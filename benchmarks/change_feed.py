@@ -0,0 +1,114 @@
+"""
+Benchmark: following the change feed against rescanning the tables.
+
+Seeds a hospital with benchmarks.workload, then measures:
+- what the change triggers add to completing appointments, by completing one batch with the
+  trigger in place and one without it;
+- a consumer's poll: read_changes() from its cursor against rescanning the appointments table
+  for completed rows;
+- long-poll latency: how soon wait_for_changes() returns once a discharge is written.
+
+    python -m benchmarks.change_feed [patients]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.suite import quiet_logging
+from benchmarks.workload import Scale, generate
+from controllers.change_feed import CHANGE_TRIGGERS_SQL
+from controllers.database_controller import DatabaseController
+
+COMPLETE_SQL = "UPDATE appointments SET is_completed = 1 WHERE appointment_id = ?"
+RESCAN_SQL = "SELECT appointment_id FROM appointments WHERE is_completed = 1"
+APPOINTMENT_TRIGGER = next(sql for sql in CHANGE_TRIGGERS_SQL if 'appointments_changes_completed' in sql)
+
+
+def complete(db, appointment_ids):
+    started = time.perf_counter()
+    with db.connect() as cursor:
+        cursor.executemany(COMPLETE_SQL, ((appointment_id,) for appointment_id in appointment_ids))
+    return (time.perf_counter() - started) * 1e6 / len(appointment_ids)
+
+
+def follow(db, since_seq, page=500):
+    # Read pages until the consumer has caught up
+    handled = 0
+    while True:
+        changes = db.read_changes(since_seq, page)
+        if not changes:
+            return handled, since_seq
+        handled += len(changes)
+        since_seq = changes[-1]['seq']
+
+
+def wake_latencies(db, patient_ids, since_seq):
+    latencies = []
+    for patient_id in patient_ids:
+        woken = []
+        waiter = threading.Thread(target=lambda: woken.append((db.wait_for_changes(since_seq, timeout=5.0),
+                                                               time.perf_counter())))
+        waiter.start()
+        # Let the consumer reach its wait before the discharge commits
+        time.sleep(0.002)
+        committed = time.perf_counter()
+        db.update_record("UPDATE inpatients SET admission_status = 'Discharged' WHERE id = ?", (patient_id,))
+        waiter.join()
+        changes, woke = woken[0]
+        since_seq = changes[-1]['seq']
+        latencies.append((woke - committed) * 1e6)
+    return latencies
+
+
+def run(patients=100000, batch=20000, polls=200):
+    scale = Scale(rooms=patients // 5, patients=patients, doctors=max(patients // 400, 1), nurses=1,
+                  appointments=patients * 5, tasks=1, shifts=1, medical_history=1)
+    with tempfile.TemporaryDirectory() as tmp_dir, quiet_logging():
+        db = DatabaseController(os.path.join(tmp_dir, 'changes.db'))
+        generate(db, scale, seed=0)
+        start_seq = db.change_feed.last_seq()
+        open_ids = [row[0] for row in db.query("SELECT appointment_id FROM appointments WHERE is_completed = 0 "
+                                               "ORDER BY appointment_id LIMIT ?", (2 * batch,))]
+
+        with_trigger_us = complete(db, open_ids[:batch])
+        with db.connect() as cursor:
+            cursor.execute("DROP TRIGGER appointments_changes_completed")
+        without_trigger_us = complete(db, open_ids[batch:])
+        with db.connect() as cursor:
+            cursor.execute(APPOINTMENT_TRIGGER)
+
+        started = time.perf_counter()
+        handled, cursor_seq = follow(db, start_seq)
+        catch_up_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for _ in range(polls):
+            db.read_changes(cursor_seq)
+        feed_poll_us = (time.perf_counter() - started) * 1e6 / polls
+        started = time.perf_counter()
+        rows = db.query(RESCAN_SQL)
+        rescan_ms = (time.perf_counter() - started) * 1000
+
+        admitted = [row[0] for row in db.query("SELECT id FROM inpatients WHERE admission_status = 'Admitted' "
+                                               "LIMIT 100")]
+        latencies = wake_latencies(db, admitted, cursor_seq)
+        db.close()
+
+    result = {'patients': patients, 'batch': batch, 'with_trigger_us': with_trigger_us,
+              'without_trigger_us': without_trigger_us, 'changes_followed': handled, 'catch_up_ms': catch_up_ms,
+              'feed_poll_us': feed_poll_us, 'rescan_ms': rescan_ms, 'rescan_rows': len(rows),
+              'wake_median_us': statistics.median(latencies), 'wake_max_us': max(latencies)}
+    print(f"completing {batch} appointments: {with_trigger_us:.1f} us each with the change trigger, "
+          f"{without_trigger_us:.1f} us without")
+    print(f"catching up on {handled} changes in pages of 500: {catch_up_ms:.0f} ms")
+    print(f"poll with nothing new: read_changes {feed_poll_us:.0f} us, "
+          f"rescan of completed appointments {rescan_ms:.0f} ms ({len(rows)} rows)")
+    print(f"long-poll return after a discharge write: median {result['wake_median_us']:.0f} us, "
+          f"max {result['wake_max_us']:.0f} us over {len(latencies)} discharges")
+    return result
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,107 @@
+"""
+Benchmark: earliest free slot with any doctor of a specialization.
+
+Seeds 500 doctors across 10 specializations and 1M appointments, then compares the availability
+engine with the naive approach of loading every appointment of the specialization and scanning it
+in Python.
+
+    python -m benchmarks.doctor_availability [doctors] [appointments]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from controllers.database_controller import DatabaseController
+from controllers.doctor_availability import free_slots
+from controllers.doctor_schedule import from_db_datetime, to_db_datetime
+
+SPECIALIZATIONS = ['Cardiology', 'Neurology', 'Oncology', 'Pediatrics', 'Radiology',
+                   'Dermatology', 'Orthopedics', 'Psychiatry', 'Urology', 'Gastroenterology']
+FIRST_DAY = datetime(2024, 1, 1)
+SLOTS_PER_DAY = 16  # Half-hour slots from 09:00 to 17:00
+BOOKED_PER_DAY = 12
+
+
+def seed(db, doctors, appointments, rng):
+    doctor_rows = [(work_id, f"Doctor {work_id}", 40, 'Female', 'Doctor', SPECIALIZATIONS[work_id % len(SPECIALIZATIONS)])
+                   for work_id in range(1, doctors + 1)]
+    per_doctor = appointments // doctors
+    days = -(-per_doctor // BOOKED_PER_DAY)
+    with db.connect(start_transaction=True) as cursor:
+        cursor.execute("INSERT INTO outpatients (unique_identifier, full_name, age, gender, contact_info, insurance, "
+                       "condition) VALUES ('P1', 'Bench Patient', 30, 'Male', '', '', 'Stable')")
+        cursor.executemany("INSERT INTO doctors (work_id, full_name, age, gender, department, specialization) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", doctor_rows)
+        for doctor_id in range(1, doctors + 1):
+            rows = []
+            for day in range(days):
+                opening = FIRST_DAY + timedelta(days=day, hours=9)
+                for slot in sorted(rng.sample(range(SLOTS_PER_DAY), BOOKED_PER_DAY)):
+                    rows.append(('Checkup', to_db_datetime(opening + timedelta(minutes=30 * slot)),
+                                 'Consultation', 1, doctor_id, 30))
+            cursor.executemany("INSERT INTO appointments (description, date_time, appointment_type, patient_id, "
+                               "doctor_id, duration_minutes) VALUES (?, ?, ?, ?, ?, ?)", rows[:per_doctor])
+    return days
+
+
+def naive_free_slot(db, specialization, start, end, duration):
+    rows = db.query("SELECT a.doctor_id, a.date_time, a.duration_minutes FROM appointments a "
+                    "JOIN doctors d ON d.id = a.doctor_id WHERE d.specialization = ?", (specialization,))
+    busy = {}
+    for doctor_id, date_time, minutes in rows:
+        busy_start = from_db_datetime(date_time)
+        busy.setdefault(doctor_id, []).append((busy_start, busy_start + timedelta(minutes=minutes)))
+    best = None
+    for doctor_id, intervals in busy.items():
+        moment = start
+        for busy_start, busy_end in sorted(intervals):
+            if busy_end <= moment:
+                continue
+            if busy_start >= moment + duration:
+                break
+            moment = busy_end
+        if moment + duration <= end and (best is None or (moment, doctor_id) < best[::2]):
+            best = (moment, moment + duration, doctor_id)
+    return best
+
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(doctors=500, appointments=1_000_000, repeat=5):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseController(os.path.join(tmp_dir, 'bench.db'), pool_size=1)
+        db.initialize_database()
+        started = time.perf_counter()
+        days = seed(db, doctors, appointments, rng)
+        print(f"seeded {doctors} doctors and {appointments} appointments in {time.perf_counter() - started:.1f} s")
+
+        # A week in the middle of the booked range
+        start = FIRST_DAY + timedelta(days=days // 2, hours=9)
+        end = start + timedelta(days=7)
+        duration = timedelta(minutes=30)
+
+        engine_seconds, slots = timed(lambda: free_slots(db, 'Cardiology', start, end, duration, limit=5), repeat)
+        naive_seconds, naive = timed(lambda: naive_free_slot(db, 'Cardiology', start, end, duration), repeat)
+        db.close()
+
+    assert slots[0] == naive, (slots[0], naive)
+    print(f"engine: {engine_seconds * 1000:.1f} ms for the first {len(slots)} slots, first {slots[0]}")
+    print(f" naive: {naive_seconds * 1000:.1f} ms for the first slot")
+    print(f"engine is {naive_seconds / engine_seconds:.0f}x faster")
+    return {'engine_ms': engine_seconds * 1000, 'naive_ms': naive_seconds * 1000}
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    run(*arguments)
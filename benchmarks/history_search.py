@@ -0,0 +1,109 @@
+"""
+Benchmark: medical history search with the FTS5 index against a LIKE '%...%' scan.
+
+Seeds free-text history entries built from clinical phrases, then times the same searches through
+PatientController.search_medical_history() and through the LIKE query it replaces. The FTS5 index
+is filled by the medical_history triggers while seeding.
+
+    python -m benchmarks.history_search [entries]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.suite import quiet_logging
+from controllers.database_controller import DatabaseController
+from controllers.doctor_schedule import to_db_datetime
+from controllers.patient_controller import PatientController
+
+FIRST_DAY = datetime(2020, 1, 1)
+PHRASES = ['Blood pressure checked', 'Chest X-ray, no findings', 'Follow-up after surgery', 'ECG shows sinus rhythm',
+           'Blood test: elevated glucose', 'Physical therapy session', 'MRI scheduled', 'Vaccinated against influenza',
+           'Complains of mild headache', 'Wound dressing changed', 'Discharged home in stable condition']
+DRUGS = ['amoxicillin', 'ibuprofen', 'metformin', 'lisinopril', 'atorvastatin', 'omeprazole', 'paracetamol',
+         'warfarin', 'prednisone', 'insulin', 'salbutamol', 'ceftriaxone', 'penicillin', 'clopidogrel']
+# Searches from common to rare terms; the drugs are drawn with skewed weights below
+SEARCHES = ['blood', 'penicillin', 'penicillin allergy', 'clopidogrel bleeding']
+
+
+def entry(rng, weights):
+    drug = rng.choices(DRUGS, weights)[0]
+    kind = rng.random()
+    if kind < 0.3:
+        return f"Prescribed {drug} {rng.choice([5, 10, 20, 250, 500])}mg"
+    if kind < 0.35:
+        return f"Allergic reaction to {drug}, {drug} allergy recorded"
+    if kind < 0.37:
+        return f"Minor bleeding while on {drug}"
+    return rng.choice(PHRASES)
+
+
+def seed(db, entries, rng, batch=100000):
+    weights = [1 / (rank + 1) for rank in range(len(DRUGS))]
+    span = int(timedelta(days=4 * 365).total_seconds())
+    for start in range(0, entries, batch):
+        with db.connect(start_transaction=True) as cursor:
+            cursor.executemany(
+                "INSERT INTO medical_history (patient_table, patient_id, entry, date_added) VALUES (?, ?, ?, ?)",
+                ((rng.choice(('inpatients', 'outpatients')), rng.randint(1, 200000), entry(rng, weights),
+                  to_db_datetime(FIRST_DAY + timedelta(seconds=rng.randrange(span))))
+                 for _ in range(min(batch, entries - start)))
+            )
+
+
+def like_search(db, query, limit, newest_first=False):
+    words = query.split()
+    where = ' AND '.join("entry LIKE ?" for _ in words)
+    order = " ORDER BY date_added DESC" if newest_first else ""
+    return db.query(f"SELECT id, patient_id, date_added, entry FROM medical_history WHERE {where}{order} LIMIT ?",
+                    [f"%{word}%" for word in words] + [limit])
+
+
+def timed(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def run(entries=5000000, limit=50):
+    rng = random.Random(0)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir, quiet_logging():
+        db = DatabaseController(os.path.join(tmp_dir, 'history.db'), pragma_profile='bulk_load')
+        db.initialize_database()
+        started = time.perf_counter()
+        seed(db, entries, rng)
+        print(f"seeded {entries} entries with the FTS5 index in {time.perf_counter() - started:.1f} s")
+        # An unordered LIKE stops as soon as it has limit rows, which favours common words; ordering
+        # the matches, as any ranked or newest-first listing must, makes it read the whole table
+        for query in SEARCHES:
+            fts_ms, found = timed(lambda: PatientController.search_medical_history(db, query, limit))
+            recent_ms, _ = timed(lambda: PatientController.search_medical_history(db, query, limit, order='recent'))
+            like_ms, _ = timed(lambda: like_search(db, query, limit))
+            like_ordered_ms, _ = timed(lambda: like_search(db, query, limit, newest_first=True), repeat=2)
+            dated_ms, _ = timed(lambda: PatientController.search_medical_history(
+                db, query, limit, since=datetime(2023, 1, 1), until=datetime(2023, 7, 1)))
+            matches = db.query("SELECT COUNT(*) FROM medical_history_fts WHERE medical_history_fts MATCH ?",
+                               (' '.join(f'"{word}"' for word in query.split()),))[0][0]
+            results[query] = {'fts_ms': fts_ms, 'fts_recent_ms': recent_ms, 'fts_dated_ms': dated_ms,
+                              'like_ms': like_ms, 'like_ordered_ms': like_ordered_ms, 'matches': matches,
+                              'returned': len(found)}
+        db.close()
+
+    for query, timing in results.items():
+        print(f"{query!r} ({timing['matches']} matching entries)")
+        print(f"    FTS5 ranked {timing['fts_ms']:.2f} ms, ranked within six months {timing['fts_dated_ms']:.2f} ms, "
+              f"most recent {timing['fts_recent_ms']:.2f} ms")
+        print(f"    LIKE first matches {timing['like_ms']:.2f} ms, newest by date {timing['like_ordered_ms']:.2f} ms")
+    return results
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000000)
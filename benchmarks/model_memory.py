@@ -0,0 +1,58 @@
+"""
+Benchmark: memory held by an in-memory census of patient objects.
+
+Builds a census of inpatients and outpatients, as the dashboard keeps it, and measures the memory
+allocated for it with tracemalloc. Rooms are shared between inpatients, and a share of the
+patients get a history entry and a prescription, so the figure includes the per-patient lists.
+
+    python -m benchmarks.model_memory [patients]
+"""
+import gc
+import random
+import sys
+import tracemalloc
+
+from models.inpatient_model import InPatient
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+from models.room_model import Room
+
+CONDITIONS = list(Condition)
+
+
+def build_census(patients, rng, rooms, with_records=0.1):
+    census = []
+    for number in range(patients):
+        args = (f"Patient {number}", rng.randint(0, 99), rng.choice(['Female', 'Male']),
+                f"patient{number}@example.com", f"{number:011d}", 'AETNA', rng.choice(CONDITIONS))
+        patient = InPatient(*args, rng.choice(rooms)) if number % 4 == 0 else OutPatient(*args)
+        if rng.random() < with_records:
+            patient.add_medical_history("Blood pressure checked")
+            patient.add_prescription("Paracetamol 500mg")
+        census.append(patient)
+    return census
+
+
+def run(patients=200000):
+    rng = random.Random(0)
+    rooms = [Room(number, Room.RoomType.SINGLE, 150.0) for number in range(500)]
+    gc.collect()
+    tracemalloc.start()
+    census = build_census(patients, rng, rooms)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'patients': len(census),
+        'bytes': allocated,
+        'bytes_per_patient': allocated / len(census),
+        'instance_bytes': sys.getsizeof(census[1]),
+        'has_dict': hasattr(census[1], '__dict__'),
+    }
+    print(f"{result['patients']} patients: {result['bytes'] / 2 ** 20:.1f} MiB, "
+          f"{result['bytes_per_patient']:.0f} bytes per patient")
+    print(f"outpatient object {result['instance_bytes']} bytes, per-instance __dict__: {result['has_dict']}")
+    return result
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
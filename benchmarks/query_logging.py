@@ -0,0 +1,96 @@
+"""
+Microbenchmark: cost of logging inside DatabaseController.query() at INFO level.
+
+Times query() as shipped against the same method logging its DEBUG line as an f-string, which is
+formatted before the level check, and reports the speedup. Then times that DEBUG line on its own
+in three forms while DEBUG is disabled: the constant message query() used to log, the %-style call
+it logs now, and the f-string.
+
+    python -m benchmarks.query_logging [iterations]
+"""
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+from controllers.database_controller import DatabaseController
+from log_config import get_logger
+
+SQL = "SELECT id FROM doctors WHERE full_name = ?"
+
+
+class EagerQueryController(DatabaseController):
+    """query() with its DEBUG line built eagerly, as the f-string logging calls the controllers used to make."""
+
+    def query(self, sql, params=None):
+        logger = get_logger()  # The same stdlib logger object the controllers hold
+        try:
+            with self.connect() as cursor:
+                cursor.execute(sql, params or ())
+                results = cursor.fetchall()
+                logger.debug(f"Query executed successfully: {sql} ({len(results)} rows)")
+                return results
+        except sqlite3.Error as e:
+            logger.error(f"Failed to execute query: {e}")
+            return None
+
+
+def run(iterations=5000):
+    logger = get_logger()
+    previous = logger.level
+    logger.setLevel(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_name = os.path.join(tmp_dir, 'bench.db')
+        db = DatabaseController(db_name, pool_size=1)
+        db.initialize_database()
+        db.insert_record(
+            "INSERT INTO doctors (work_id, full_name, age, gender, department, specialization) VALUES (?, ?, ?, ?, ?, ?)",
+            (1, 'Bench Doctor', 40, 'Female', 'Doctor', 'Cardiology')
+        )
+        eager_db = EagerQueryController(db_name, pool_size=1)
+        rows = [(1,)]
+
+        def query():
+            db.query(SQL, ('Bench Doctor',))
+
+        def eager_query():
+            eager_db.query(SQL, ('Bench Doctor',))
+
+        calls = {
+            'constant': lambda: logger.debug("Query executed successfully."),
+            'percent': lambda: logger.debug("Query executed successfully: %s (%s rows)", SQL, len(rows)),
+            'f-string': lambda: logger.debug(f"Query executed successfully: {SQL} ({len(rows)} rows)"),
+        }
+
+        def per_call_us(function):
+            return min(timeit.repeat(function, number=iterations, repeat=3)) / iterations * 1e6
+
+        def paired_us(first, second, rounds=15):
+            # Alternate the two so drift over the run (cache warmth, CPU frequency) hits both alike
+            timings = ([], [])
+            for _ in range(rounds):
+                timings[0].append(timeit.timeit(first, number=iterations))
+                timings[1].append(timeit.timeit(second, number=iterations))
+            return tuple(min(times) / iterations * 1e6 for times in timings)
+
+        query()
+        eager_query()
+        results = dict(zip(('query_us', 'eager_query_us'), paired_us(query, eager_query)))
+        results['speedup'] = round(results['eager_query_us'] / results['query_us'], 3)
+        results.update({f'{label}_debug_us': per_call_us(call) for label, call in calls.items()})
+        eager_db.close()
+        db.close()
+    logger.setLevel(previous)
+
+    print(f"query() at INFO: {results['query_us']:.2f} us/call, "
+          f"{results['eager_query_us']:.2f} us/call with an f-string DEBUG line ({results['speedup']:.3f}x)")
+    for label in calls:
+        print(f"disabled debug(), {label:>8} message: {results[f'{label}_debug_us']:.3f} us/call")
+    return results
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
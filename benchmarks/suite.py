@@ -0,0 +1,246 @@
+"""
+Timed hospital workload scenarios, run through the controllers against a generated database.
+
+Each scenario times individual controller calls and reports throughput and latency percentiles.
+Results are printed and can be written as JSON, then compared with an earlier run:
+
+    python -m benchmarks.suite --scale small --output results.json
+    python -m benchmarks.suite --scale small --baseline results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import controllers.nurse_controller as nurse_controller
+from benchmarks.workload import SCALES, FIRST_DAY, TASK_DESCRIPTIONS, generate
+from controllers.database_controller import DatabaseController
+from controllers.doctor_controller import DoctorController
+from controllers.nurse_controller import NurseController
+from controllers.patient_controller import PatientController
+from log_config import get_logger, get_slow_query_logger
+from models.appointment_model import Appointment, AppointmentType
+from models.inpatient_model import InPatient
+from models.patient_model import Condition
+from models.task_model import Task
+
+
+def admit(db, workload, rng):
+    if not workload.free_beds:
+        return False
+    room = workload.free_beds.pop()
+    patient = InPatient(workload.new_person_name(), rng.randint(1, 95), 'Female', 'bench@example.com',
+                        '01001', 'AETNA', Condition.STABLE, room)
+    admitted = PatientController.add_patient(db, patient) and PatientController.admit_patient(db, patient)
+    if admitted:
+        workload.inpatients.append(patient)
+    else:
+        workload.free_beds.append(room)
+    return admitted
+
+
+def discharge(db, workload, rng):
+    if not workload.inpatients:
+        return False
+    patient = workload.inpatients.pop(rng.randrange(len(workload.inpatients)))
+    discharged = PatientController.discharge_patient(db, patient)
+    if discharged:
+        workload.free_beds.append(patient.room)
+    return discharged
+
+
+def book_appointment(db, workload, rng):
+    # Book half-hour slots in the days after the seeded range, where most slots are still free
+    doctor = rng.choice(workload.doctors)
+    day = FIRST_DAY + timedelta(days=workload.days + rng.randrange(30))
+    start = day + timedelta(hours=9, minutes=30 * rng.randrange(16))
+    appointment = Appointment("Consultation", start, AppointmentType.CONSULTATION, rng.choice(workload.outpatients))
+    return DoctorController.create_appointment(db, doctor, appointment)
+
+
+def dispatch_task(db, workload, rng):
+    nurse = rng.choice(workload.nurses)
+    patient = rng.choice(workload.outpatients)
+    task = Task(rng.choice(TASK_DESCRIPTIONS), patient, rng.randint(0, 9))
+    return NurseController.assign_task(nurse, task) and NurseController.perform_task(nurse)
+
+
+def history_lookup(db, workload, rng):
+    patient = rng.choice(workload.outpatients)
+    return PatientController.get_medical_history(db, patient, limit=20) is not None
+
+
+# Scenario name, function and share of the requested operation count. Discharges run first so
+# that admissions find free beds.
+SCENARIOS = [
+    ('discharge', discharge, 0.5),
+    ('admit', admit, 0.5),
+    ('book_appointment', book_appointment, 1.0),
+    ('dispatch_task', dispatch_task, 1.0),
+    ('history_lookup', history_lookup, 2.0),
+]
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(durations, succeeded):
+    ordered = sorted(durations)
+    total = sum(ordered)
+    return {
+        'operations': len(ordered),
+        'succeeded': succeeded,
+        'total_s': round(total, 6),
+        'ops_per_s': round(len(ordered) / total, 2) if total else 0.0,
+        'mean_ms': round(total / len(ordered) * 1000, 4) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 4),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4) if ordered else 0.0,
+    }
+
+
+def run_scenario(function, db, workload, rng, operations):
+    durations = []
+    succeeded = 0
+    for _ in range(operations):
+        started = time.perf_counter()
+        if function(db, workload, rng):
+            succeeded += 1
+        durations.append(time.perf_counter() - started)
+    return summarize(durations, succeeded)
+
+
+@contextmanager
+def nurse_database(db):
+    # NurseController works on the module-level controller, so point it at the benchmark database
+    previous = nurse_controller.db_controller
+    nurse_controller.db_controller = db
+    try:
+        yield
+    finally:
+        nurse_controller.db_controller = previous
+
+
+@contextmanager
+def quiet_logging(level=logging.ERROR):
+    loggers = (get_logger(), get_slow_query_logger())
+    previous = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(level)
+    try:
+        yield
+    finally:
+        for logger, logger_level in zip(loggers, previous):
+            logger.setLevel(logger_level)
+
+
+def run_suite(scale='small', factor=1.0, seed=0, operations=1000, scenarios=None, database=None):
+    """
+        Generate a hospital and time every scenario against it.
+
+        Args:
+            scale (str): A key of benchmarks.workload.SCALES.
+            factor (float): Multiplier applied to every row count of the scale.
+            seed (int): Seed for the data generator and the scenarios.
+            operations (int): Base number of operations per scenario.
+            scenarios (list, optional): Names of the scenarios to run; all by default.
+            database (str, optional): Database file to create; a temporary file by default.
+
+        Returns:
+            dict: The run's parameters, environment, setup timings and per-scenario results.
+        """
+    counts = SCALES[scale].scaled(factor)
+    selected = [scenario for scenario in SCENARIOS if scenarios is None or scenario[0] in scenarios]
+    rng = random.Random(seed)
+    result = {
+        'suite': 'hospital-workload',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'scale': scale,
+        'factor': factor,
+        'seed': seed,
+        'counts': counts.as_dict(),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'setup_s': {},
+        'scenarios': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir, quiet_logging():
+        db = DatabaseController(database or os.path.join(tmp_dir, 'benchmark.db'))
+        try:
+            started = time.perf_counter()
+            workload = generate(db, counts, seed)
+            result['setup_s']['generate'] = round(time.perf_counter() - started, 4)
+            started = time.perf_counter()
+            DoctorController.load_schedules(db)
+            result['setup_s']['load_schedules'] = round(time.perf_counter() - started, 4)
+
+            with nurse_database(db):
+                for name, function, share in selected:
+                    result['scenarios'][name] = run_scenario(function, db, workload, rng,
+                                                             max(1, int(operations * share)))
+        finally:
+            db.close()
+    return result
+
+
+def compare(baseline, current):
+    """Return lines comparing the p50 latency and throughput of two results, scenario by scenario."""
+    lines = []
+    for name, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            lines.append(f"{name:>18}: not in baseline")
+            continue
+        p50_change = (now['p50_ms'] / before['p50_ms'] - 1) * 100 if before['p50_ms'] else 0.0
+        throughput_change = (now['ops_per_s'] / before['ops_per_s'] - 1) * 100 if before['ops_per_s'] else 0.0
+        lines.append(f"{name:>18}: p50 {before['p50_ms']:.3f} -> {now['p50_ms']:.3f} ms ({p50_change:+.1f}%), "
+                     f"throughput {before['ops_per_s']:.0f} -> {now['ops_per_s']:.0f} ops/s ({throughput_change:+.1f}%)")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--factor', type=float, default=1.0, help='multiply every row count of the scale')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--operations', type=int, default=1000, help='base operations per scenario')
+    parser.add_argument('--scenario', action='append', choices=[name for name, _, _ in SCENARIOS],
+                        help='run only this scenario; may be repeated')
+    parser.add_argument('--database', help='keep the generated database at this path')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare with results from an earlier run')
+    args = parser.parse_args(argv)
+
+    result = run_suite(args.scale, args.factor, args.seed, args.operations, args.scenario, args.database)
+    print(f"generated {args.scale} x{args.factor} in {result['setup_s']['generate']:.2f} s")
+    for name, stats in result['scenarios'].items():
+        print(f"{name:>18}: {stats['ops_per_s']:>9.1f} ops/s  p50 {stats['p50_ms']:.3f} ms  "
+              f"p95 {stats['p95_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms  ({stats['succeeded']}/{stats['operations']} ok)")
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(result, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            print('\n'.join(compare(json.load(baseline), result)))
+    return result
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
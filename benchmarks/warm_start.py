@@ -0,0 +1,80 @@
+"""
+Benchmark: warm start of a 100k-patient hospital through the repositories.
+
+Seeds a hospital with benchmarks.workload, then rebuilds the model graph on a fresh controller,
+as after a restart: patients with shared rooms, doctors with their upcoming appointments and
+nurses with their open tasks. For comparison the same open appointments and tasks are also
+loaded one patient query per row, the N+1 pattern the repositories avoid.
+
+    python -m benchmarks.warm_start [patients]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.suite import quiet_logging
+from benchmarks.workload import Scale, generate
+from controllers.database_controller import DatabaseController
+from controllers.repositories import PATIENT_COLUMNS, warm_start
+
+
+def hospital_scale(patients):
+    factor = patients / 100000
+    return Scale(rooms=int(20000 * factor), patients=patients, doctors=int(300 * factor), nurses=int(250 * factor),
+                 appointments=int(500000 * factor), tasks=int(300000 * factor), shifts=100, medical_history=100)
+
+
+def per_row_patients(db):
+    # One query per open appointment or task, each fetching its patient's row
+    rows = db.query("SELECT patient_table, patient_id FROM appointments WHERE is_completed = 0 UNION ALL "
+                    "SELECT patient_table, patient_id FROM tasks WHERE is_completed = 0")
+    with db.connect() as cursor:
+        for table, patient_id in rows:
+            cursor.execute(f"SELECT {PATIENT_COLUMNS} FROM {table} WHERE id = ?", (patient_id,))
+            cursor.fetchone()
+    return len(rows)
+
+
+def run(patients=100000):
+    with tempfile.TemporaryDirectory() as tmp_dir, quiet_logging():
+        db_name = os.path.join(tmp_dir, 'hospital.db')
+        seed_db = DatabaseController(db_name, pragma_profile='bulk_load')
+        started = time.perf_counter()
+        generate(seed_db, hospital_scale(patients), seed=0)
+        seed_db.close()
+        seeded = time.perf_counter() - started
+
+        db = DatabaseController(db_name)
+        db.initialize_database()
+        statements = sum(statement['count'] for statement in db.top_queries(1000, by='count'))
+        started = time.perf_counter()
+        loaded = warm_start(db)
+        elapsed = time.perf_counter() - started
+        statements = sum(statement['count'] for statement in db.top_queries(1000, by='count')) - statements
+
+        started = time.perf_counter()
+        lookups = per_row_patients(db)
+        per_row = time.perf_counter() - started
+        db.close()
+
+    result = {
+        'seed_s': seeded,
+        'warm_start_s': elapsed,
+        'statements': statements,
+        'patients': len(loaded['patients']),
+        'rooms': len(loaded['rooms']),
+        'appointments': sum(len(doctor.appointments) for doctor in loaded['doctors']),
+        'tasks': sum(len(nurse.assigned_tasks) for nurse in loaded['nurses']),
+        'per_row_lookups': lookups,
+        'per_row_s': per_row,
+    }
+    print(f"seeded in {seeded:.1f} s")
+    print(f"warm start: {elapsed:.2f} s with {statements} statements for {result['patients']} patients, "
+          f"{result['rooms']} rooms, {result['appointments']} open appointments and {result['tasks']} open tasks")
+    print(f"per-row patient queries for the same appointments and tasks: {lookups} queries in {per_row:.2f} s")
+    return result
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
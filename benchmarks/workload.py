@@ -0,0 +1,252 @@
+"""
+Seeded synthetic hospital data.
+
+generate() fills an empty database with rooms, patients, doctors, nurses, appointments, tasks,
+shifts and medical history. Patients go through PatientController.add_patients_bulk; the other
+tables are written with executemany so large scales seed in seconds. The same seed and scale
+always produce the same data.
+"""
+import random
+from datetime import datetime, timedelta
+
+from controllers.doctor_schedule import to_db_datetime
+from controllers.patient_controller import PatientController
+from models.doctor_model import Doctor
+from models.hospital_employee_model import Department
+from models.inpatient_model import InPatient
+from models.nurse_model import Nurse
+from models.nurse_shift_model import ShiftType
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+from models.room_model import Room
+
+FIRST_DAY = datetime(2024, 1, 1)
+SPECIALIZATIONS = ['Cardiology', 'Neurology', 'Oncology', 'Pediatrics', 'Radiology',
+                   'Dermatology', 'Orthopedics', 'Psychiatry', 'Urology', 'Gastroenterology']
+NAME_WORDS = ['Ana', 'Beridze', 'Chikovani', 'Davit', 'Eka', 'Futkaradze', 'Giorgi', 'Hvichia', 'Irakli',
+              'Japaridze', 'Ketevan', 'Lomidze', 'Mariam', 'Nino', 'Otar', 'Petriashvili', 'Qajaia', 'Rusudan',
+              'Salome', 'Tamar', 'Usupashvili', 'Vakhtang', 'Wachnadze', 'Xenia', 'Yasha', 'Zurab']
+INSURERS = ['AETNA', 'Cigna', 'GPI', 'Aldagi', 'Imedi L']
+HISTORY_ENTRIES = ['Blood pressure checked', 'Prescribed amoxicillin 500mg', 'Chest X-ray, no findings',
+                   'Follow-up after surgery', 'Allergic reaction to penicillin', 'ECG shows sinus rhythm',
+                   'Blood test: elevated glucose', 'Physical therapy session', 'MRI scheduled', 'Vaccinated']
+TASK_DESCRIPTIONS = ['Give medication', 'Change dressing', 'Check vitals', 'Draw blood', 'Assist mobility']
+ROOM_TYPES = [(Room.RoomType.SINGLE, 50, 120), (Room.RoomType.DOUBLE, 35, 80), (Room.RoomType.ICU, 15, 400)]
+
+
+class Scale:
+    """Row counts for each generated table."""
+
+    FIELDS = ('rooms', 'patients', 'doctors', 'nurses', 'appointments', 'tasks', 'shifts', 'medical_history')
+
+    def __init__(self, rooms, patients, doctors, nurses, appointments, tasks, shifts, medical_history):
+        self.rooms = rooms
+        self.patients = patients
+        self.doctors = doctors
+        self.nurses = nurses
+        self.appointments = appointments
+        self.tasks = tasks
+        self.shifts = shifts
+        self.medical_history = medical_history
+
+    def scaled(self, factor):
+        """Return a copy with every count multiplied by factor, keeping at least one row of each."""
+        return Scale(**{field: max(1, int(getattr(self, field) * factor)) for field in self.FIELDS})
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+SCALES = {
+    'tiny': Scale(rooms=20, patients=60, doctors=5, nurses=4, appointments=200, tasks=100, shifts=20,
+                  medical_history=300),
+    'small': Scale(rooms=300, patients=2000, doctors=50, nurses=40, appointments=20000, tasks=10000,
+                   shifts=2000, medical_history=20000),
+    'medium': Scale(rooms=2000, patients=20000, doctors=200, nurses=150, appointments=200000, tasks=100000,
+                    shifts=10000, medical_history=200000),
+    'large': Scale(rooms=10000, patients=200000, doctors=500, nurses=400, appointments=1000000,
+                   tasks=1000000, shifts=50000, medical_history=2000000),
+}
+
+
+def person_name(number):
+    """Return a unique name whose initials spell number in base 26, so identifiers never collide."""
+    words = []
+    while True:
+        number, digit = divmod(number, 26)
+        words.append(NAME_WORDS[digit])
+        if not number:
+            break
+        number -= 1
+    return ' '.join(reversed(words))
+
+
+class Workload:
+    """
+        The objects behind a generated database, for scenarios that need model instances.
+
+        Attributes:
+            rooms (list): Room objects.
+            free_beds (list): One Room per bed left free, for admitting new inpatients.
+            inpatients (list): Admitted InPatient objects.
+            outpatients (list): OutPatient objects.
+            doctors (list): Doctor objects, with database IDs 1..n in list order.
+            nurses (list): Nurse objects.
+            days (int): Days covered by the seeded appointments, starting at FIRST_DAY.
+        """
+
+    def __init__(self, scale, seed):
+        self.scale = scale
+        self.seed = seed
+        self.rooms = []
+        self.free_beds = []
+        self.inpatients = []
+        self.outpatients = []
+        self.doctors = []
+        self.nurses = []
+        self.days = 0
+        # Numbers from 26 upwards spell at least two initials, so every name has a first and a last name
+        self.next_person = 25
+
+    def new_person_name(self):
+        """Return a name not used by any generated person."""
+        self.next_person += 1
+        return person_name(self.next_person)
+
+    @property
+    def patients(self):
+        return self.inpatients + self.outpatients
+
+
+def generate(db_controller, scale='small', seed=0):
+    """
+        Fill an empty database with a synthetic hospital.
+
+        Args:
+            db_controller (DatabaseController): Controller for the database to fill.
+            scale (str or Scale): A key of SCALES or explicit row counts.
+            seed (int): Seed for the random generator.
+
+        Returns:
+            Workload: The generated model objects.
+        """
+    scale = SCALES[scale] if isinstance(scale, str) else scale
+    rng = random.Random(seed)
+    workload = Workload(scale, seed)
+    db_controller.initialize_database()
+
+    _generate_rooms(db_controller, workload, rng)
+    _generate_patients(db_controller, workload, rng)
+    with db_controller.connect(start_transaction=True) as cursor:
+        _generate_staff(cursor, workload, rng)
+        _generate_appointments(cursor, workload, rng)
+        _generate_tasks(cursor, workload, rng)
+        _generate_shifts(cursor, workload, rng)
+        _generate_medical_history(cursor, workload, rng)
+    return workload
+
+
+def _generate_rooms(db_controller, workload, rng):
+    types = [room_type for room_type, share, _ in ROOM_TYPES for _ in range(share)]
+    rates = {room_type: rate for room_type, _, rate in ROOM_TYPES}
+    for number in range(workload.scale.rooms):
+        room_type = rng.choice(types)
+        workload.rooms.append(Room(100 + number, room_type, rates[room_type]))
+    with db_controller.connect(start_transaction=True) as cursor:
+        cursor.executemany("INSERT INTO rooms (room_number, room_type, daily_rate, capacity) VALUES (?, ?, ?, ?)",
+                           [(room.room_number, room.room_type, room.daily_rate, room.capacity)
+                            for room in workload.rooms])
+
+
+def _generate_patients(db_controller, workload, rng):
+    # Up to a third of the patients are inpatients, filling at most 70% of the beds
+    beds = [room for room in workload.rooms for _ in range(room.capacity)]
+    rng.shuffle(beds)
+    inpatient_count = min(int(len(beds) * 0.7), workload.scale.patients // 3)
+    workload.free_beds = beds[inpatient_count:]
+    conditions = list(Condition)
+    patients = []
+    for number in range(workload.scale.patients):
+        name = workload.new_person_name()
+        age = rng.randint(1, 95)
+        contact = f"{name.split()[0].lower()}@example.com"
+        personal_number = f"{rng.randrange(10 ** 10):011d}"
+        if number < inpatient_count:
+            patient = InPatient(name, age, rng.choice(['Female', 'Male']), contact, personal_number,
+                                rng.choice(INSURERS), rng.choice(conditions), beds[number])
+            patient.admit()
+            workload.inpatients.append(patient)
+        else:
+            patient = OutPatient(name, age, rng.choice(['Female', 'Male']), contact, personal_number,
+                                 rng.choice(INSURERS), rng.choice(conditions))
+            workload.outpatients.append(patient)
+        patients.append(patient)
+    PatientController.add_patients_bulk(db_controller, patients, batch_size=1000)
+
+
+def _generate_staff(cursor, workload, rng):
+    for number in range(workload.scale.doctors):
+        workload.doctors.append(Doctor(workload.new_person_name(), rng.randint(28, 70), rng.choice(['Female', 'Male']),
+                                       1000 + number, Department.DOCTOR, SPECIALIZATIONS[number % len(SPECIALIZATIONS)]))
+    for number in range(workload.scale.nurses):
+        workload.nurses.append(Nurse(workload.new_person_name(), rng.randint(21, 65), rng.choice(['Female', 'Male']),
+                                     5000 + number, Department.NURSE))
+    cursor.executemany("INSERT INTO doctors (work_id, full_name, age, gender, department, specialization) "
+                       "VALUES (?, ?, ?, ?, ?, ?)",
+                       [(doctor.work_id, doctor.full_name, doctor.age, doctor.gender, doctor.display_department(),
+                         doctor.specialization) for doctor in workload.doctors])
+    cursor.executemany("INSERT INTO nurses (work_id, full_name, age, gender, department) VALUES (?, ?, ?, ?, ?)",
+                       [(nurse.work_id, nurse.full_name, nurse.age, nurse.gender, nurse.display_department())
+                        for nurse in workload.nurses])
+
+
+def _generate_appointments(cursor, workload, rng):
+    # Up to twelve of the sixteen half-hour slots between 09:00 and 17:00 are booked per doctor per day
+    per_doctor = -(-workload.scale.appointments // workload.scale.doctors)
+    workload.days = -(-per_doctor // 12)
+    remaining = workload.scale.appointments
+    for doctor_id in range(1, workload.scale.doctors + 1):
+        rows = []
+        for day in range(workload.days):
+            opening = FIRST_DAY + timedelta(days=day, hours=9)
+            for slot in sorted(rng.sample(range(16), 12)):
+                rows.append(('Checkup', to_db_datetime(opening + timedelta(minutes=30 * slot)), 'Consultation',
+                             *_random_patient(workload, rng), doctor_id, 30, 1 if day < workload.days // 2 else 0))
+        rows = rows[:min(per_doctor, remaining)]
+        remaining -= len(rows)
+        cursor.executemany("INSERT INTO appointments (description, date_time, appointment_type, patient_table, "
+                           "patient_id, doctor_id, duration_minutes, is_completed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           rows)
+
+
+def _generate_tasks(cursor, workload, rng):
+    cursor.executemany("INSERT INTO tasks (description, patient_table, patient_id, nurse_id, priority, is_completed) "
+                       "VALUES (?, ?, ?, ?, ?, ?)",
+                       ((rng.choice(TASK_DESCRIPTIONS), *_random_patient(workload, rng),
+                         rng.randint(1, workload.scale.nurses), rng.randint(0, 9), 1 if rng.random() < 0.7 else 0)
+                        for _ in range(workload.scale.tasks)))
+
+
+def _generate_shifts(cursor, workload, rng):
+    shift_types = {8: ShiftType.DAY.value, 16: ShiftType.SPECIAL.value, 0: ShiftType.NIGHT.value}
+    rows = []
+    for number in range(workload.scale.shifts):
+        start = FIRST_DAY + timedelta(hours=8 * number)
+        rows.append((start.isoformat(), (start + timedelta(hours=8)).isoformat(), shift_types[start.hour]))
+    cursor.executemany("INSERT INTO shifts (start_date_time, end_date_time, shift_type) VALUES (?, ?, ?)", rows)
+
+
+def _generate_medical_history(cursor, workload, rng):
+    span = int(timedelta(days=365).total_seconds())
+    cursor.executemany("INSERT INTO medical_history (patient_table, patient_id, entry, date_added) VALUES (?, ?, ?, ?)",
+                       ((*_random_patient(workload, rng), rng.choice(HISTORY_ENTRIES),
+                         to_db_datetime(FIRST_DAY + timedelta(seconds=rng.randrange(span))))
+                        for _ in range(workload.scale.medical_history)))
+
+
+def _random_patient(workload, rng):
+    # Patients are bulk inserted in order, so the IDs in each table run from 1 upwards
+    number = rng.randrange(len(workload.inpatients) + len(workload.outpatients))
+    if number < len(workload.inpatients):
+        return 'inpatients', number + 1
+    return 'outpatients', number - len(workload.inpatients) + 1
@@ -0,0 +1,67 @@
+"""
+Benchmark: concurrent add_medical_history() calls with and without the write coalescer.
+
+Every thread adds history entries for its own patient. Without coalescing each entry is its own
+transaction and the threads queue for SQLite's write lock; with coalescing one writer thread
+commits them in groups.
+
+    python -m benchmarks.write_coalescing [threads] [entries_per_thread]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.suite import quiet_logging
+from controllers.database_controller import DatabaseController
+from controllers.patient_controller import PatientController
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+
+
+def run_case(db_name, threads, entries, **options):
+    db = DatabaseController(db_name, pool_size=threads + 1, **options)
+    db.initialize_database()
+    patients = [OutPatient(f"Writer {number}", 20 + number, 'Female', 'bench@example.com', '01001', 'AETNA',
+                           Condition.STABLE) for number in range(threads)]
+    for patient in patients:
+        PatientController.add_patient(db, patient)
+    failures = []
+
+    def add_entries(patient):
+        for number in range(entries):
+            if not PatientController.add_medical_history(db, patient, f"Observation {number}"):
+                failures.append(number)
+
+    workers = [threading.Thread(target=add_entries, args=(patient,)) for patient in patients]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stored = db.query("SELECT COUNT(*) FROM medical_history")[0][0]
+    batches = db.write_coalescer.stats()['batches'] if db.write_coalescer else stored
+    db.close()
+    return {'seconds': elapsed, 'writes_per_s': stored / elapsed, 'stored': stored, 'failed': len(failures),
+            'commits': batches}
+
+
+def run(threads=16, entries=200):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir, quiet_logging():
+        for label, options in (('per-call commits', {'pragma_profile': 'durable'}),
+                               ('coalesced', {'pragma_profile': 'durable', 'coalesce_writes': True})):
+            results[label] = run_case(os.path.join(tmp_dir, f"{label.split()[0]}.db"), threads, entries, **options)
+
+    for label, result in results.items():
+        print(f"{label:>16}: {result['writes_per_s']:>8.0f} writes/s  {result['commits']:>5} commits  "
+              f"{result['stored']} stored, {result['failed']} failed")
+    speedup = results['coalesced']['writes_per_s'] / results['per-call commits']['writes_per_s']
+    print(f"coalesced writes are {speedup:.2f}x the throughput of per-call commits")
+    return results
+
+
+if __name__ == '__main__':
+    run(*(int(argument) for argument in sys.argv[1:3]))
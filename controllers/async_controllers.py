@@ -0,0 +1,157 @@
+import weakref
+import asyncio
+from datetime import timedelta
+from controllers.patient_controller import PatientController
+from controllers.doctor_controller import DoctorController
+from controllers.nurse_controller import NurseController
+
+# Operations that change a doctor's or nurse's in-memory queue run one at a time per model object,
+# so concurrent requests for the same person cannot interleave on its heap
+_model_locks = weakref.WeakKeyDictionary()
+
+
+async def _run_exclusive(async_db, model, function, *args):
+    lock = _model_locks.get(model)
+    if lock is None:
+        lock = _model_locks[model] = asyncio.Lock()
+    async with lock:
+        future = await async_db.submit(function, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.done():
+                # The job had already started; keep the model locked until it has finished
+                await asyncio.wait([asyncio.wrap_future(future)])
+            raise
+
+
+class AsyncPatientController:
+    """Coroutine versions of the PatientController operations, run on an AsyncDatabaseController."""
+
+    @staticmethod
+    async def add_patient(async_db, patient):
+        return await async_db.run(PatientController.add_patient, async_db.db_controller, patient)
+
+    @staticmethod
+    async def add_patients_bulk(async_db, patients, batch_size=500):
+        return await async_db.run(PatientController.add_patients_bulk, async_db.db_controller, patients, batch_size)
+
+    @staticmethod
+    async def find_patient_record(async_db, patient):
+        return await async_db.run(PatientController.find_patient_record, async_db.db_controller, patient)
+
+    @staticmethod
+    async def save_patient(async_db, patient):
+        return await async_db.run(PatientController.save_patient, async_db.db_controller, patient)
+
+    @staticmethod
+    async def remove_patient(async_db, patient):
+        return await async_db.run(PatientController.remove_patient, async_db.db_controller, patient)
+
+    @staticmethod
+    async def admit_patient(async_db, patient):
+        return await async_db.run(PatientController.admit_patient, async_db.db_controller, patient)
+
+    @staticmethod
+    async def discharge_patient(async_db, patient):
+        return await async_db.run(PatientController.discharge_patient, async_db.db_controller, patient)
+
+    @staticmethod
+    async def discharge_patients_bulk(async_db, patients):
+        return await async_db.run(PatientController.discharge_patients_bulk, async_db.db_controller, patients)
+
+    @staticmethod
+    async def allocate_bed(async_db, room_type):
+        return await async_db.run(PatientController.allocate_bed, async_db.db_controller, room_type)
+
+    @staticmethod
+    async def release_bed(async_db, room_number, bed=None):
+        return await async_db.run(PatientController.release_bed, async_db.db_controller, room_number, bed)
+
+    @staticmethod
+    async def add_medical_history(async_db, patient, entry):
+        return await async_db.run(PatientController.add_medical_history, async_db.db_controller, patient, entry)
+
+    @staticmethod
+    async def get_medical_history(async_db, patient, limit=None):
+        return await async_db.run(PatientController.get_medical_history, async_db.db_controller, patient, limit)
+
+
+class AsyncDoctorController:
+    """Coroutine versions of the DoctorController operations, run on an AsyncDatabaseController."""
+
+    @staticmethod
+    async def add_doctor(async_db, doctor):
+        return await async_db.run(DoctorController.add_doctor, async_db.db_controller, doctor)
+
+    @staticmethod
+    async def save_doctor(async_db, doctor):
+        return await async_db.run(DoctorController.save_doctor, async_db.db_controller, doctor)
+
+    @staticmethod
+    async def remove_doctor(async_db, doctor):
+        return await async_db.run(DoctorController.remove_doctor, async_db.db_controller, doctor)
+
+    @staticmethod
+    async def create_appointment(async_db, doctor, appointment):
+        return await _run_exclusive(async_db, doctor, DoctorController.create_appointment, async_db.db_controller,
+                                    doctor, appointment)
+
+    @staticmethod
+    async def next_appointment(async_db, doctor, moment):
+        return await async_db.run(DoctorController.next_appointment, async_db.db_controller, doctor, moment)
+
+    @staticmethod
+    async def appointments_between(async_db, doctor, start, end):
+        return await async_db.run(DoctorController.appointments_between, async_db.db_controller, doctor, start, end)
+
+    @staticmethod
+    async def find_free_slots(async_db, specialization, start, end, duration=timedelta(minutes=30), limit=1,
+                              day_start=None, day_end=None):
+        return await async_db.run(DoctorController.find_free_slots, async_db.db_controller, specialization, start,
+                                  end, duration, limit, day_start=day_start, day_end=day_end)
+
+    @staticmethod
+    async def perform_duty(async_db, doctor):
+        return await _run_exclusive(async_db, doctor, DoctorController.perform_duty, async_db.db_controller, doctor)
+
+    @staticmethod
+    async def prescribe(async_db, patient, entry):
+        return await async_db.run(DoctorController.prescribe, async_db.db_controller, patient, entry)
+
+
+class AsyncNurseController:
+    """
+        Coroutine versions of the NurseController operations.
+
+        NurseController works on the module-level controller in controllers.nurse_controller, so
+        async_db should wrap that same controller; it only supplies the worker threads here.
+        """
+
+    @staticmethod
+    async def add_nurse(async_db, nurse):
+        return await async_db.run(NurseController.add_nurse, nurse)
+
+    @staticmethod
+    async def save_nurse(async_db, nurse):
+        return await async_db.run(NurseController.save_nurse, nurse)
+
+    @staticmethod
+    async def remove_nurse(async_db, nurse):
+        return await async_db.run(NurseController.remove_nurse, nurse)
+
+    @staticmethod
+    async def assign_task(async_db, nurse, new_task):
+        return await _run_exclusive(async_db, nurse, NurseController.assign_task, nurse, new_task)
+
+    @staticmethod
+    async def perform_task(async_db, nurse):
+        return await _run_exclusive(async_db, nurse, NurseController.perform_task, nurse)
+
+    @staticmethod
+    async def reprioritise_task(async_db, nurse, task, priority):
+        return await _run_exclusive(async_db, nurse, NurseController.reprioritise_task, nurse, task, priority)
+
+    @staticmethod
+    async def add_shift(async_db, nurse, shift):
+        return await _run_exclusive(async_db, nurse, NurseController.add_shift, nurse, shift)
@@ -0,0 +1,218 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from log_config import get_logger
+from controllers.database_controller import DatabaseController
+
+logger = get_logger()
+
+
+class QueueFullError(Exception):
+    """Raised when a job cannot be queued before the submit timeout expires."""
+
+
+class ExecutorClosedError(Exception):
+    """Raised when a job is submitted to an AsyncDatabaseController that has been closed."""
+
+
+_STOP = object()
+
+
+class AsyncDatabaseController:
+    """
+        asyncio front-end that runs blocking DatabaseController work on dedicated worker threads.
+
+        Jobs wait in a bounded queue. When the queue is full, run() suspends the calling coroutine
+        until a slot frees up (or raises QueueFullError after submit_timeout), so a burst of requests
+        slows its producers down instead of piling up unbounded work. A job cancelled while still
+        queued is skipped by the workers; a job that already started runs to completion, since
+        controller operations may span several statements, and its result is discarded.
+
+        Every coroutine must run on the same event loop.
+
+        Args:
+            db_controller (DatabaseController or str): The controller to wrap, or a database file name.
+            workers (int, optional): Worker threads; defaults to the connection pool size so workers
+                never wait for a pooled connection.
+            queue_size (int): Jobs that may wait for a worker before submitters are held back.
+            submit_timeout (float, optional): Seconds run() waits for a queue slot; None waits forever.
+        """
+
+    def __init__(self, db_controller='database.db', workers=None, queue_size=100, submit_timeout=None):
+        if not isinstance(db_controller, DatabaseController):
+            db_controller = DatabaseController(db_controller)
+        workers = workers or db_controller.pool_stats()['size']
+        if workers < 1 or queue_size < 1:
+            raise ValueError("workers and queue_size must be positive integers.")
+        self.db_controller = db_controller
+        self.workers = workers
+        self.queue_size = queue_size
+        self.submit_timeout = submit_timeout
+        # The queue holds every accepted job; the semaphore admits at most queue_size waiting plus
+        # one running job per worker, and is released by the worker that finishes the job
+        self._jobs = queue.Queue()
+        self._slots = None
+        self._loop = None
+        self._threads = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+        self._running = 0
+
+    async def run(self, function, *args, **kwargs):
+        """
+            Run function(*args, **kwargs) on a worker thread and return its result.
+
+            Raises:
+                QueueFullError: If no queue slot frees up within submit_timeout.
+                ExecutorClosedError: If the controller has been closed.
+            """
+        future = await self.submit(function, *args, **kwargs)
+        # Cancelling the awaiting task cancels the job if it has not started yet
+        return await asyncio.wrap_future(future)
+
+    async def submit(self, function, *args, **kwargs):
+        """
+            Queue function(*args, **kwargs) once a queue slot is free, without waiting for the result.
+
+            Returns:
+                concurrent.futures.Future: The job's future; cancel() succeeds until a worker starts the job.
+            """
+        if self._closed:
+            raise ExecutorClosedError("AsyncDatabaseController is closed.")
+        self._start()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.submit_timeout)
+        except asyncio.TimeoutError:
+            self._count('rejected')
+            raise QueueFullError(f"No queue slot became free within {self.submit_timeout} seconds.") from None
+        if self._closed:
+            self._slots.release()
+            raise ExecutorClosedError("AsyncDatabaseController is closed.")
+
+        future = Future()
+        self._count('submitted')
+        self._jobs.put((future, function, args, kwargs))
+        return future
+
+    async def query(self, sql, params=None):
+        """Asynchronous DatabaseController.query()."""
+        return await self.run(self.db_controller.query, sql, params)
+
+    async def insert_record(self, sql, params):
+        """Asynchronous DatabaseController.insert_record()."""
+        return await self.run(self.db_controller.insert_record, sql, params)
+
+    async def update_record(self, sql, params):
+        """Asynchronous DatabaseController.update_record()."""
+        return await self.run(self.db_controller.update_record, sql, params)
+
+    async def delete_record(self, sql, params):
+        """Asynchronous DatabaseController.delete_record()."""
+        return await self.run(self.db_controller.delete_record, sql, params)
+
+    async def run_transaction(self, operations):
+        """Asynchronous DatabaseController.run_transaction()."""
+        return await self.run(self.db_controller.run_transaction, operations)
+
+    async def read_changes(self, since_seq=0, limit=100):
+        """Asynchronous DatabaseController.read_changes()."""
+        return await self.run(self.db_controller.read_changes, since_seq, limit)
+
+    async def wait_for_changes(self, since_seq=0, limit=100, timeout=30.0):
+        """Asynchronous DatabaseController.wait_for_changes(); occupies a worker thread while it waits."""
+        return await self.run(self.db_controller.wait_for_changes, since_seq, limit, timeout)
+
+    async def initialize_database(self):
+        """Asynchronous DatabaseController.initialize_database()."""
+        return await self.run(self.db_controller.initialize_database)
+
+    def stats(self):
+        """Return the executor counters (queued and running jobs, completed, failed, cancelled and rejected)."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['running'] = self._running
+        stats['queued'] = self._jobs.qsize()
+        stats['workers'] = self.workers
+        stats['queue_size'] = self.queue_size
+        return stats
+
+    async def close(self, close_database=True):
+        """
+            Stop accepting jobs, let the queued ones finish and stop the workers.
+
+            Args:
+                close_database (bool): Also close the wrapped controller's connection pool.
+            """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(_STOP)
+        threads, self._threads = self._threads, []
+        await asyncio.get_running_loop().run_in_executor(None, self._join, threads)
+        if close_database:
+            self.db_controller.close()
+        logger.info("AsyncDatabaseController for %s closed.", self.db_controller.db_name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            raise RuntimeError("AsyncDatabaseController is bound to a different event loop.")
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self.queue_size + self.workers)
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"db-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is _STOP:
+                return
+            future, function, args, kwargs = job
+            try:
+                if not future.set_running_or_notify_cancel():
+                    self._count('cancelled')
+                    continue
+                with self._lock:
+                    self._running += 1
+                try:
+                    result = function(*args, **kwargs)
+                except BaseException as e:
+                    self._count('failed')
+                    future.set_exception(e)
+                else:
+                    self._count('completed')
+                    future.set_result(result)
+                finally:
+                    with self._lock:
+                        self._running -= 1
+            finally:
+                self._release_slot()
+
+    def _release_slot(self):
+        try:
+            self._loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # The event loop is closed; nobody is left waiting for a slot
+            pass
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def _join(threads):
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,256 @@
+import sqlite3
+import threading
+from array import array
+from log_config import get_logger
+
+logger = get_logger()
+
+# The patient attributes the census counts by, in the order of every group key
+DIMENSIONS = ('patient_table', 'condition', 'admission_status', 'insurance', 'room_type')
+
+CENSUS_SQL = """
+    SELECT 'inpatients', inpatients.id, inpatients.condition, inpatients.admission_status, inpatients.insurance,
+           rooms.room_type, inpatients.room_number
+    FROM inpatients LEFT JOIN rooms ON rooms.room_number = inpatients.room_number
+    UNION ALL
+    SELECT 'outpatients', id, condition, admission_status, insurance, NULL, NULL FROM outpatients
+"""
+
+CENSUS_GROUPS_SQL = """
+    SELECT 'inpatients', inpatients.condition, inpatients.admission_status, inpatients.insurance, rooms.room_type,
+           COUNT(*)
+    FROM inpatients LEFT JOIN rooms ON rooms.room_number = inpatients.room_number
+    GROUP BY 2, 3, 4, 5
+    UNION ALL
+    SELECT 'outpatients', condition, admission_status, insurance, NULL, COUNT(*) FROM outpatients GROUP BY 2, 3, 4
+"""
+
+
+class CensusEngine:
+    """
+        Column-oriented in-memory snapshot of every patient's census attributes.
+
+        Each dimension is dictionary-encoded: a patient's value is stored as a small integer code
+        in one array per dimension, indexed by the patient's slot. Next to the columns the engine
+        keeps a count per distinct combination of codes. There are at most a few thousand
+        combinations however many patients there are, so aggregates and filtered counts only
+        walk those counts and never the patients.
+
+        The snapshot is read from the patient tables on first use or by calling load(), then kept
+        current by the controllers' write paths through record(), update() and remove(). Writes
+        made by other processes are not seen; verify() compares the snapshot with GROUP BY
+        queries over the tables.
+
+        Args:
+            db_controller (DatabaseController): The controller used to read the patient tables.
+        """
+
+    def __init__(self, db_controller):
+        self._db_controller = db_controller
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._values = {dimension: [] for dimension in DIMENSIONS}
+        self._codes = {dimension: {} for dimension in DIMENSIONS}
+        self._columns = {dimension: array('I') for dimension in DIMENSIONS}
+        self._slots = {}
+        self._free_slots = []
+        self._groups = {}
+        self._room_types = {}
+
+    def load(self):
+        """Read every patient from the inpatients and outpatients tables and rebuild the snapshot."""
+        self._db_controller.initialize_database()
+        with self._lock:
+            rows = self._db_controller.query(CENSUS_SQL)
+            if rows is None:
+                raise sqlite3.Error("Could not read the patient tables for the census.")
+            self._reset()
+            for table, patient_id, condition, admission_status, insurance, room_type, room_number in rows:
+                if room_number is not None:
+                    self._room_types[room_number] = room_type
+                self._insert((table, patient_id), (table, condition, admission_status, insurance, room_type))
+            self._loaded = True
+        logger.info("Loaded the census of %s patients.", len(rows))
+
+    def invalidate(self):
+        """Drop the snapshot; the next read loads it again."""
+        with self._lock:
+            self._loaded = False
+            self._reset()
+
+    def record(self, table, patient_id, condition, admission_status, insurance, room_number=None, room_type=None):
+        """Add a stored patient to the snapshot, or replace the attributes of a known one."""
+        with self._lock:
+            if not self._loaded:
+                # The next load() reads the patient from the table
+                return
+            if room_number is not None:
+                self._room_types[room_number] = room_type
+            key = (table, patient_id)
+            if key in self._slots:
+                self._delete(key)
+            self._insert(key, (table, condition, admission_status, insurance, room_type))
+
+    def update(self, table, patient_id, **values):
+        """Change some attributes of a patient in the snapshot, e.g. update(table, id, admission_status='Admitted')."""
+        unknown = set(values) - set(DIMENSIONS[1:])
+        if unknown:
+            raise ValueError(f"Unknown census dimensions: {', '.join(sorted(unknown))}.")
+        with self._lock:
+            if not self._loaded:
+                return
+            key = (table, patient_id)
+            slot = self._slots.get(key)
+            if slot is None:
+                logger.warning("Patient %s of %s is not in the census; reloading it.", patient_id, table)
+                self.invalidate()
+                return
+            old = self._group(slot)
+            self._count(old, -1)
+            for dimension, value in values.items():
+                self._columns[dimension][slot] = self._encode(dimension, value)
+            self._count(self._group(slot), 1)
+
+    def remove(self, table, patient_id):
+        """Drop a deleted patient from the snapshot."""
+        with self._lock:
+            if self._loaded and (table, patient_id) in self._slots:
+                self._delete((table, patient_id))
+
+    def room_changed(self, room_number, room_type):
+        """Note a room's type; patients in a room whose type changed are recounted on the next read."""
+        with self._lock:
+            if self._loaded and room_number in self._room_types and self._room_types[room_number] != room_type:
+                self.invalidate()
+
+    def count(self, **filters):
+        """
+            Count the patients matching every filter, e.g. count(condition='Critical', room_type='ICU').
+
+            A filter value may also be a list, tuple or set of accepted values.
+            """
+        with self._lock:
+            self._ensure_loaded()
+            return sum(count for _, count in self._matching(filters))
+
+    def counts(self, dimension, **filters):
+        """
+            Count the patients matching the filters per value of one dimension.
+
+            Returns:
+                dict: Value to patient count, leaving out values with no patients.
+            """
+        return self.summary(**filters)[dimension]
+
+    def summary(self, **filters):
+        """
+            Count the patients matching the filters per value of every dimension in one pass.
+
+            Returns:
+                dict: Dimension to a dict of value to patient count.
+            """
+        with self._lock:
+            self._ensure_loaded()
+            # Sum per code first and decode once per distinct value
+            totals = [{} for _ in DIMENSIONS]
+            for group, count in self._matching(filters):
+                for index, code in enumerate(group):
+                    totals[index][code] = totals[index].get(code, 0) + count
+            return {dimension: {self._values[dimension][code]: count for code, count in totals[index].items()}
+                    for index, dimension in enumerate(DIMENSIONS)}
+
+    def verify(self):
+        """
+            Compare the snapshot with GROUP BY counts over the patient tables.
+
+            Returns:
+                list: (group, census count, table count) for every combination of dimension values
+                whose counts differ, where group holds the values in DIMENSIONS order; empty if the
+                snapshot is consistent.
+            """
+        rows = self._db_controller.query(CENSUS_GROUPS_SQL)
+        if rows is None:
+            raise sqlite3.Error("Could not count the patient tables for the census check.")
+        stored = {tuple(row[:-1]): row[-1] for row in rows}
+        with self._lock:
+            self._ensure_loaded()
+            held = {tuple(self._values[dimension][code] for dimension, code in zip(DIMENSIONS, group)): count
+                    for group, count in self._groups.items()}
+        differences = [(group, held.get(group, 0), stored.get(group, 0))
+                       for group in sorted(set(held) | set(stored), key=repr)
+                       if held.get(group, 0) != stored.get(group, 0)]
+        if differences:
+            logger.warning("Census differs from the patient tables in %s groups.", len(differences))
+        return differences
+
+    def stats(self):
+        """Return the number of patients, distinct groups and free slots in the snapshot."""
+        with self._lock:
+            return {'loaded': self._loaded, 'patients': len(self._slots), 'groups': len(self._groups),
+                    'free_slots': len(self._free_slots)}
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _matching(self, filters):
+        unknown = set(filters) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown census dimensions: {', '.join(sorted(unknown))}.")
+        accepted = []
+        for index, dimension in enumerate(DIMENSIONS):
+            if dimension not in filters:
+                continue
+            wanted = filters[dimension]
+            wanted = wanted if isinstance(wanted, (list, tuple, set, frozenset)) else (wanted,)
+            codes = {self._codes[dimension][value] for value in wanted if value in self._codes[dimension]}
+            accepted.append((index, codes))
+        if not accepted:
+            return list(self._groups.items())
+        matching = []
+        for group, count in self._groups.items():
+            for index, codes in accepted:
+                if group[index] not in codes:
+                    break
+            else:
+                matching.append((group, count))
+        return matching
+
+    def _encode(self, dimension, value):
+        codes = self._codes[dimension]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._values[dimension])
+            self._values[dimension].append(value)
+        return code
+
+    def _group(self, slot):
+        return tuple(self._columns[dimension][slot] for dimension in DIMENSIONS)
+
+    def _count(self, group, delta):
+        count = self._groups.get(group, 0) + delta
+        if count:
+            self._groups[group] = count
+        else:
+            del self._groups[group]
+
+    def _insert(self, key, values):
+        codes = [self._encode(dimension, value) for dimension, value in zip(DIMENSIONS, values)]
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            for dimension, code in zip(DIMENSIONS, codes):
+                self._columns[dimension][slot] = code
+        else:
+            slot = len(self._columns[DIMENSIONS[0]])
+            for dimension, code in zip(DIMENSIONS, codes):
+                self._columns[dimension].append(code)
+        self._slots[key] = slot
+        self._count(tuple(codes), 1)
+
+    def _delete(self, key):
+        slot = self._slots.pop(key)
+        self._count(self._group(slot), -1)
+        self._free_slots.append(slot)
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+import time
+from log_config import get_logger
+
+logger = get_logger()
+
+# Append-only log of the changes downstream systems follow. seq comes from AUTOINCREMENT, so it
+# only ever grows and is never reused, even after prune(). SQLite commits one writer at a time,
+# so a reader never sees a change before every change with a lower seq.
+CHANGES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    data TEXT,  -- JSON object with the row's values at the time of the change
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+"""
+
+
+def _patient_triggers(table):
+    room_number = 'new.room_number' if table == 'inpatients' else 'NULL'
+    data = (f"json_object('full_name', new.full_name, 'room_number', {room_number}, "
+            f"'admission_status', new.admission_status, 'previous_status', {{previous}})")
+    event = "CASE new.admission_status WHEN 'Admitted' THEN 'patient_admitted' ELSE 'patient_discharged' END"
+    return (
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_insert AFTER INSERT ON {table}
+        WHEN new.admission_status = 'Admitted' BEGIN
+            INSERT INTO changes (event, table_name, row_id, data)
+            VALUES ('patient_admitted', '{table}', new.id, {data.format(previous='NULL')});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_admission AFTER UPDATE OF admission_status ON {table}
+        WHEN new.admission_status IN ('Admitted', 'Discharged')
+             AND new.admission_status IS NOT old.admission_status BEGIN
+            INSERT INTO changes (event, table_name, row_id, data)
+            VALUES ({event}, '{table}', new.id, {data.format(previous='old.admission_status')});
+        END;
+        """,
+    )
+
+
+# One trigger per event source; a write that does not change the watched column records nothing
+CHANGE_TRIGGERS_SQL = _patient_triggers('inpatients') + _patient_triggers('outpatients') + (
+    """
+    CREATE TRIGGER IF NOT EXISTS appointments_changes_completed AFTER UPDATE OF is_completed ON appointments
+    WHEN new.is_completed = 1 AND old.is_completed = 0 BEGIN
+        INSERT INTO changes (event, table_name, row_id, data)
+        VALUES ('appointment_completed', 'appointments', new.appointment_id,
+                json_object('patient_id', new.patient_id, 'patient_table', new.patient_table,
+                            'doctor_id', new.doctor_id, 'appointment_type', new.appointment_type,
+                            'date_time', new.date_time));
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_changes_completed AFTER UPDATE OF is_completed ON tasks
+    WHEN new.is_completed = 1 AND old.is_completed = 0 BEGIN
+        INSERT INTO changes (event, table_name, row_id, data)
+        VALUES ('task_completed', 'tasks', new.task_id,
+                json_object('patient_id', new.patient_id, 'patient_table', new.patient_table,
+                            'nurse_id', new.nurse_id, 'priority', new.priority));
+    END;
+    """,
+)
+
+READ_CHANGES_SQL = """
+    SELECT seq, event, table_name, row_id, data, changed_at FROM changes
+    WHERE seq > ? ORDER BY seq LIMIT ?
+"""
+
+
+class ChangeFeed:
+    """
+        Cursor-based reader of the changes table for one DatabaseController.
+
+        The triggers of migration 9 append a row to changes in the same transaction as every
+        admission, discharge, completed appointment and completed task, whichever code path or
+        process made the write. Consumers keep the seq of the last change they handled and ask
+        for the changes after it, so they never rescan the tables.
+
+        wait() is the long-poll variant. Commits made through this controller wake waiting
+        consumers at once; commits made by other processes are picked up by re-reading the table
+        every poll_interval seconds.
+
+        Args:
+            db_controller (DatabaseController): The controller used to read the changes table.
+            poll_interval (float): Longest wait between reads of the table while long-polling.
+        """
+
+    def __init__(self, db_controller, poll_interval=0.5):
+        self._db_controller = db_controller
+        self.poll_interval = poll_interval
+        self._condition = threading.Condition()
+        self._waiters = 0
+        # Bumped by every notify(); a waiter only sleeps if no commit happened since its last read
+        self._generation = 0
+
+    def read(self, since_seq=0, limit=100):
+        """
+            Return the changes with a seq greater than since_seq, oldest first.
+
+            Args:
+                since_seq (int): The seq of the last change the consumer handled; 0 reads from the start.
+                limit (int): Most changes returned.
+
+            Returns:
+                list: Changes as dicts with seq, event, table, row_id, data and changed_at, or None
+                if the table could not be read. The last seq is the cursor for the next call.
+            """
+        if not self._db_controller.initialize_database():
+            return None
+        rows = self._db_controller.query(READ_CHANGES_SQL, (since_seq, limit))
+        if rows is None:
+            return None
+        return [{'seq': seq, 'event': event, 'table': table, 'row_id': row_id,
+                 'data': json.loads(data) if data is not None else None, 'changed_at': changed_at}
+                for seq, event, table, row_id, data, changed_at in rows]
+
+    def wait(self, since_seq=0, limit=100, timeout=30.0):
+        """
+            Like read(), but block until there is at least one change after since_seq.
+
+            Args:
+                since_seq (int): The seq of the last change the consumer handled.
+                limit (int): Most changes returned.
+                timeout (float): Seconds to wait before giving up.
+
+            Returns:
+                list: The changes, empty if none arrived within the timeout, or None if the table
+                could not be read.
+            """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._waiters += 1
+        try:
+            while True:
+                with self._condition:
+                    generation = self._generation
+                changes = self.read(since_seq, limit)
+                remaining = deadline - time.monotonic()
+                if changes or changes is None or remaining <= 0:
+                    return changes
+                with self._condition:
+                    if self._generation == generation:
+                        self._condition.wait(min(remaining, self.poll_interval))
+        finally:
+            with self._condition:
+                self._waiters -= 1
+
+    def notify(self):
+        """Wake the consumers waiting in wait(); called after a commit that wrote rows."""
+        if self._waiters:
+            with self._condition:
+                self._generation += 1
+                self._condition.notify_all()
+
+    def last_seq(self):
+        """Return the seq of the newest change, or 0 if there are none."""
+        rows = self._db_controller.query("SELECT COALESCE(MAX(seq), 0) FROM changes")
+        return rows[0][0] if rows else 0
+
+    def prune(self, before_seq):
+        """
+            Delete the changes with a seq below before_seq, once every consumer has handled them.
+
+            Returns:
+                int or None: Number of changes deleted, or None if the delete failed.
+            """
+        try:
+            with self._db_controller.connect() as cursor:
+                cursor.execute("DELETE FROM changes WHERE seq < ?", (before_seq,))
+                deleted = cursor.rowcount
+            logger.info("Pruned %s changes before seq %s.", deleted, before_seq)
+            return deleted
+        except sqlite3.Error as e:
+            logger.error("Failed to prune changes: %s", e)
+            return None
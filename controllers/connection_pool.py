@@ -0,0 +1,255 @@
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from log_config import get_logger
+
+logger = get_logger()
+
+
+class PoolClosedError(sqlite3.Error):
+    """Raised when a connection is requested from a pool that has been shut down."""
+
+
+class PoolTimeoutError(sqlite3.Error):
+    """Raised when no pooled connection becomes available within the timeout."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+        Connection that mirrors sqlite3's per-connection statement cache to count its hits.
+
+        sqlite3 keeps the last cached_statements SQL strings prepared in an LRU cache but does not
+        report on it, so note_statement() replays every executed string through an LRU of the same
+        size. Connection.execute() is noted here; cursors note their own statements. The pool's own
+        health checks and connection setup go through execute_internal() so they are not counted.
+        """
+
+    def __init__(self, *args, cached_statements=128, **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        self.cached_statements = cached_statements
+        self.statement_hits = 0
+        self.statement_misses = 0
+        self._statements = OrderedDict()
+
+    def note_statement(self, sql):
+        statements = self._statements
+        if sql in statements:
+            statements.move_to_end(sql)
+            self.statement_hits += 1
+            return
+        self.statement_misses += 1
+        statements[sql] = None
+        if len(statements) > self.cached_statements:
+            statements.popitem(last=False)
+
+    def execute(self, sql, *args):
+        self.note_statement(sql)
+        return super().execute(sql, *args)
+
+    def execute_internal(self, sql, *args):
+        """Execute bookkeeping SQL without noting it in the statement cache counters."""
+        return super().execute(sql, *args)
+
+
+class ConnectionPool:
+    """
+        Pool of long-lived SQLite connections shared by a DatabaseController.
+
+        A thread keeps the connection it borrowed for as long as it holds it, so nested
+        borrows from the same thread get the same connection back. Once the outermost
+        borrow is released the connection goes back to the idle stack for reuse. stats()
+        counts nested borrows as 'nested' rather than as hits, since they never reach the
+        idle stack.
+
+        Args:
+            db_name (str): Path of the SQLite database file.
+            size (int): Maximum number of connections open at the same time.
+            timeout (float): Seconds to wait for a free connection before giving up.
+            health_check (bool): Run a cheap probe on idle connections before reusing them.
+            on_connect (callable, optional): Called with every newly opened connection, once.
+            cached_statements (int): Size of each connection's prepared statement cache.
+        """
+
+    def __init__(self, db_name, size=5, timeout=5.0, health_check=True, on_connect=None, cached_statements=256):
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("Pool size must be a positive integer.")
+        self._db_name = db_name
+        self._size = size
+        self._timeout = timeout
+        self._health_check = health_check
+        self._on_connect = on_connect
+        self._cached_statements = cached_statements
+        self._connections = weakref.WeakSet()
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._hits = 0
+        self._misses = 0
+        self._nested = 0
+        self._replaced = 0
+
+    def acquire(self):
+        """Borrow a connection for the calling thread, reusing the one it already holds."""
+        local = self._local
+        connection = getattr(local, 'connection', None)
+        if connection is not None:
+            local.depth += 1
+            with self._condition:
+                self._nested += 1
+            return connection
+
+        connection = self._checkout()
+        local.connection = connection
+        local.depth = 1
+        return connection
+
+    def release(self, connection):
+        """Give back a connection borrowed with acquire()."""
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        local.connection = None
+        self._checkin(connection)
+
+    def checkout(self):
+        """Borrow a connection exclusively, without pinning it to the calling thread."""
+        return self._checkout()
+
+    def checkin(self, connection):
+        """Give back a connection borrowed with checkout()."""
+        self._checkin(connection)
+
+    @property
+    def depth(self):
+        """How many nested borrows the calling thread currently holds."""
+        return getattr(self._local, 'depth', 0)
+
+    def close(self):
+        """Close idle connections and refuse new borrows; borrowed connections close on release."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for connection in idle:
+            connection.close()
+        logger.info("Connection pool for %s closed.", self._db_name)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def size(self):
+        """Maximum number of connections open at the same time."""
+        return self._size
+
+    def stats(self):
+        """Return a snapshot of the pool counters."""
+        with self._condition:
+            return {
+                'size': self._size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'hits': self._hits,
+                'misses': self._misses,
+                'nested': self._nested,
+                'replaced': self._replaced,
+            }
+
+    def statement_cache_stats(self):
+        """Return the prepared statement cache hits and misses summed over the pool's connections."""
+        with self._condition:
+            connections = list(self._connections)
+        hits = sum(connection.statement_hits for connection in connections)
+        misses = sum(connection.statement_misses for connection in connections)
+        return {
+            'cached_statements': self._cached_statements,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+    def _checkout(self):
+        deadline = time.monotonic() + self._timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("Connection pool is closed.")
+                if self._idle:
+                    connection = self._idle.pop()
+                    self._hits += 1
+                    break
+                if self._open < self._size:
+                    self._open += 1
+                    self._misses += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No connection available after {self._timeout} seconds.")
+                self._condition.wait(remaining)
+
+        if connection is not None:
+            if not self._health_check or self._is_healthy(connection):
+                return connection
+            logger.warning("Discarding unhealthy pooled connection.")
+            with self._condition:
+                self._replaced += 1
+
+        try:
+            return self._create_connection()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def _checkin(self, connection):
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error as e:
+            logger.error("Failed to reset pooled connection: %s", e)
+
+        with self._condition:
+            if self._closed:
+                self._open -= 1
+                discard = True
+            else:
+                self._idle.append(connection)
+                discard = False
+            self._condition.notify()
+        if discard:
+            connection.close()
+
+    def _create_connection(self):
+        connection = sqlite3.connect(self._db_name, check_same_thread=False, factory=PooledConnection,
+                                     cached_statements=self._cached_statements)
+        if self._on_connect is not None:
+            try:
+                self._on_connect(connection)
+            except Exception:
+                connection.close()
+                raise
+        with self._condition:
+            self._connections.add(connection)
+        return connection
+
+    @staticmethod
+    def _is_healthy(connection):
+        try:
+            connection.execute_internal('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+            return False
@@ -1,44 +1,611 @@
+import os
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from log_config import setup_logging
+from log_config import get_logger
 from datetime import datetime
+from controllers.connection_pool import ConnectionPool
+from controllers.patient_directory import PatientDirectory
+from controllers.identity_map import IdentityMap
+from controllers.census import CensusEngine
+from controllers.change_feed import ChangeFeed, CHANGES_TABLE_SQL, CHANGE_TRIGGERS_SQL
+from controllers.doctor_schedule import DoctorScheduleIndex
+from controllers.room_allocator import RoomAllocator
+from controllers.query_stats import InstrumentedCursor, QueryStats
+from controllers.write_coalescer import WriteCoalescer
+from controllers.statement_registry import StatementRegistry
 
-logger = setup_logging()
+logger = get_logger()
+
+
+PATIENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name TEXT NOT NULL UNIQUE,
+    age INTEGER,
+    gender TEXT,
+    contact_info TEXT,
+    personal_number TEXT,
+    insurance TEXT,
+    condition TEXT,
+    admission_status TEXT
+);
+"""
+
+INPATIENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS inpatients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    unique_identifier TEXT NOT NULL UNIQUE,
+    full_name TEXT NOT NULL UNIQUE,
+    age INTEGER,
+    gender TEXT,
+    contact_info TEXT,
+    personal_number TEXT,
+    insurance TEXT,
+    condition TEXT,
+    room_number INTEGER,
+    admission_status TEXT,
+    FOREIGN KEY (room_number) REFERENCES rooms(room_number)
+);
+"""
+
+OUTPATIENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS outpatients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    unique_identifier TEXT NOT NULL UNIQUE,
+    full_name TEXT NOT NULL UNIQUE,
+    age INTEGER,
+    gender TEXT,
+    contact_info TEXT,
+    personal_number TEXT,
+    insurance TEXT,
+    condition TEXT,
+    admission_status TEXT
+);
+"""
+
+ROOMS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS rooms (
+    room_number INTEGER PRIMARY KEY,
+    room_type TEXT NOT NULL,
+    daily_rate REAL NOT NULL,
+    capacity INTEGER NOT NULL,
+    is_occupied INTEGER NOT NULL DEFAULT 0,
+    CHECK (room_type IN ('Single', 'Double', 'ICU')),
+    CHECK (daily_rate >= 1),
+    CHECK (capacity BETWEEN 1 AND 2),
+    CHECK (is_occupied IN (0, 1))
+);
+"""
+
+APPOINTMENTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS appointments (
+    appointment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT NOT NULL,
+    date_time DATETIME NOT NULL,  -- Store as TEXT in ISO8601 format ("YYYY-MM-DD HH:MM:SS")
+    appointment_type TEXT NOT NULL,
+    patient_id INTEGER NOT NULL,
+    doctor_id INTEGER NOT NULL,
+    is_completed INTEGER NOT NULL DEFAULT 0,  -- 0 for false, 1 for true
+    FOREIGN KEY (patient_id) REFERENCES patients(id),
+    FOREIGN KEY (doctor_id) REFERENCES doctors(id),
+    CHECK (appointment_type IN ('Surgery', 'Consultation', 'Visit', 'Procedure')),
+    CHECK (is_completed IN (0, 1))
+);
+"""
+
+DOCTORS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS doctors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    work_id INTEGER NOT NULL,
+    full_name TEXT NOT NULL,
+    age INTEGER,
+    gender TEXT,
+    department TEXT,
+    specialization TEXT NOT NULL
+);
+"""
+
+NURSES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS nurses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    work_id INTEGER NOT NULL,
+    full_name TEXT NOT NULL,
+    age INTEGER,
+    gender TEXT,
+    department TEXT
+);
+"""
+
+MEDICAL_HISTORY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS medical_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    date_added TEXT NOT NULL,
+    FOREIGN KEY (patient_id) REFERENCES patients(id)
+);
+"""
+
+TASKS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT NOT NULL,
+    patient_id INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    is_completed INTEGER NOT NULL DEFAULT 0,  -- 0 for false, 1 for true
+    FOREIGN KEY (patient_id) REFERENCES patients(id),
+    CHECK (priority >= 0)  -- Ensure priority is non-negative
+);
+"""
+
+SHIFTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS shifts (
+    shift_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    start_date_time TEXT NOT NULL,
+    end_date_time TEXT NOT NULL,
+    shift_type TEXT NOT NULL
+);
+"""
+
+SCHEMA_VERSION_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+);
+"""
+
+# Named PRAGMA presets applied to every pooled connection when it is opened.
+# All presets use WAL so readers are not blocked by the writer; they differ in how much
+# durability they trade for write speed.
+PRAGMA_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,  # Negative values are KiB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,  # Milliseconds
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 134217728,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'bulk_load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -256000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+}
+
+# Secondary indexes for the name and foreign-key lookups the controllers run, as (name, table, columns).
+# full_name on inpatients and outpatients is already covered by its UNIQUE constraint. This is the
+# declared set missing_indexes() checks; each index is created by the migration that introduced it.
+INDEXES = [
+    ('idx_doctors_full_name', 'doctors', ('full_name',)),
+    ('idx_nurses_full_name', 'nurses', ('full_name',)),
+    ('idx_doctors_work_id', 'doctors', ('work_id',)),
+    ('idx_nurses_work_id', 'nurses', ('work_id',)),
+    ('idx_appointments_doctor_date', 'appointments', ('doctor_id', 'date_time')),
+    ('idx_appointments_patient', 'appointments', ('patient_id',)),
+    ('idx_medical_history_patient_date', 'medical_history', ('patient_id', 'date_added')),
+    ('idx_tasks_patient_open_priority', 'tasks', ('patient_id', 'is_completed', 'priority')),
+    ('idx_inpatients_room_number', 'inpatients', ('room_number',)),
+    ('idx_doctors_specialization', 'doctors', ('specialization',)),
+    ('idx_tasks_nurse_open', 'tasks', ('nurse_id', 'is_completed')),
+]
+
+
+# One name lookup across both patient tables; the filter is pushed into each branch,
+# so both UNIQUE full_name indexes are used.
+PATIENT_DIRECTORY_VIEW_SQL = """
+CREATE VIEW IF NOT EXISTS patient_directory AS
+    SELECT 'inpatients' AS patient_table, id, unique_identifier, full_name FROM inpatients
+    UNION ALL
+    SELECT 'outpatients' AS patient_table, id, unique_identifier, full_name FROM outpatients;
+"""
+
+# Full-text index over medical_history.entry. It is an external-content table: the text lives only
+# in medical_history and the triggers keep the index in step with every insert, update and delete.
+MEDICAL_HISTORY_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS medical_history_fts USING fts5(
+    entry, content='medical_history', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+
+MEDICAL_HISTORY_FTS_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_history_fts_insert AFTER INSERT ON medical_history BEGIN
+        INSERT INTO medical_history_fts (rowid, entry) VALUES (new.id, new.entry);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_history_fts_delete AFTER DELETE ON medical_history BEGIN
+        INSERT INTO medical_history_fts (medical_history_fts, rowid, entry) VALUES ('delete', old.id, old.entry);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_history_fts_update AFTER UPDATE OF entry ON medical_history BEGIN
+        INSERT INTO medical_history_fts (medical_history_fts, rowid, entry) VALUES ('delete', old.id, old.entry);
+        INSERT INTO medical_history_fts (rowid, entry) VALUES (new.id, new.entry);
+    END;
+    """,
+)
+
+
+def _create_medical_history_fts(cursor):
+    try:
+        cursor.execute(MEDICAL_HISTORY_FTS_SQL)
+    except sqlite3.OperationalError as e:
+        if 'no such module' not in str(e):
+            raise
+        logger.warning("SQLite was built without FTS5 (%s); medical history search is unavailable.", e)
+        return
+    for trigger in MEDICAL_HISTORY_FTS_TRIGGERS_SQL:
+        cursor.execute(trigger)
+    # Index the entries written before the migration
+    cursor.execute("INSERT INTO medical_history_fts (medical_history_fts) VALUES ('rebuild');")
+
+
+def _index_sql(name, table, columns):
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)});"
+
+
+# Ordered schema migrations as (version, description, statements). A statement is either
+# a SQL string or a callable taking the migration cursor. Append new versions at the end and never
+# change an applied one: databases already past its version will not run it again.
+MIGRATIONS = [
+    (1, 'Base hospital tables', (
+        PATIENTS_TABLE_SQL, INPATIENTS_TABLE_SQL, OUTPATIENTS_TABLE_SQL, ROOMS_TABLE_SQL,
+        DOCTORS_TABLE_SQL, NURSES_TABLE_SQL, APPOINTMENTS_TABLE_SQL, MEDICAL_HISTORY_TABLE_SQL,
+        TASKS_TABLE_SQL, SHIFTS_TABLE_SQL,
+    )),
+    (2, 'Secondary lookup indexes', (
+        _index_sql('idx_doctors_full_name', 'doctors', ('full_name',)),
+        _index_sql('idx_nurses_full_name', 'nurses', ('full_name',)),
+        _index_sql('idx_doctors_work_id', 'doctors', ('work_id',)),
+        _index_sql('idx_nurses_work_id', 'nurses', ('work_id',)),
+        _index_sql('idx_appointments_doctor_date', 'appointments', ('doctor_id', 'date_time')),
+        _index_sql('idx_appointments_patient', 'appointments', ('patient_id',)),
+        _index_sql('idx_medical_history_patient_date', 'medical_history', ('patient_id', 'date_added')),
+        _index_sql('idx_tasks_patient_open_priority', 'tasks', ('patient_id', 'is_completed', 'priority')),
+        _index_sql('idx_inpatients_room_number', 'inpatients', ('room_number',)),
+    )),
+    (3, 'Patient directory view', (PATIENT_DIRECTORY_VIEW_SQL,)),
+    (4, 'Appointment durations', (
+        "ALTER TABLE appointments ADD COLUMN duration_minutes INTEGER NOT NULL DEFAULT 30 CHECK (duration_minutes > 0);",
+    )),
+    (5, 'Doctor specialization index', (_index_sql('idx_doctors_specialization', 'doctors', ('specialization',)),)),
+    # Rooms overbooked before beds were counted are recorded as full; RoomAllocator.load() reports them
+    (6, 'Room bed occupancy', (
+        "ALTER TABLE rooms ADD COLUMN occupied_beds INTEGER NOT NULL DEFAULT 0 "
+        "CHECK (occupied_beds BETWEEN 0 AND capacity);",
+        """
+        UPDATE rooms SET occupied_beds = MIN(capacity, (
+            SELECT COUNT(*) FROM inpatients
+            WHERE inpatients.room_number = rooms.room_number AND admission_status IS NOT 'Discharged'
+        ));
+        """,
+        "UPDATE rooms SET is_occupied = (occupied_beds >= capacity);",
+    )),
+    (7, 'Medical history full-text search', (_create_medical_history_fts,)),
+    # patient_id alone cannot tell an inpatient from an outpatient with the same ID; rows written
+    # before this migration keep a NULL patient_table
+    (8, 'Patient tables and task nurses', (
+        "ALTER TABLE appointments ADD COLUMN patient_table TEXT CHECK (patient_table IN ('inpatients', 'outpatients'));",
+        "ALTER TABLE tasks ADD COLUMN patient_table TEXT CHECK (patient_table IN ('inpatients', 'outpatients'));",
+        "ALTER TABLE tasks ADD COLUMN nurse_id INTEGER REFERENCES nurses(id);",
+        _index_sql('idx_tasks_nurse_open', 'tasks', ('nurse_id', 'is_completed')),
+    )),
+    (9, 'Change feed', (CHANGES_TABLE_SQL,) + CHANGE_TRIGGERS_SQL),
+    # The same gap as migration 8, in medical_history. Earlier entries get the table their patient_id
+    # is found in; where both tables have the ID the entry keeps a NULL patient_table
+    (10, 'Medical history patient tables', (
+        "ALTER TABLE medical_history ADD COLUMN patient_table TEXT CHECK (patient_table IN ('inpatients', 'outpatients'));",
+        """
+        UPDATE medical_history SET patient_table = CASE
+            WHEN EXISTS (SELECT 1 FROM outpatients WHERE outpatients.id = medical_history.patient_id)
+                THEN CASE WHEN EXISTS (SELECT 1 FROM inpatients WHERE inpatients.id = medical_history.patient_id)
+                          THEN NULL ELSE 'outpatients' END
+            WHEN EXISTS (SELECT 1 FROM inpatients WHERE inpatients.id = medical_history.patient_id) THEN 'inpatients'
+        END;
+        """,
+    )),
+]
+
+
+class QueryStream:
+    """
+        Iterator over the rows of an executed query, returned by DatabaseController.iter_query().
+
+        Rows are fetched chunk_size at a time. The borrowed connection is given back when the rows
+        are exhausted, when close() is called or when the stream is garbage collected.
+        """
+
+    def __init__(self, cursor, release, chunk_size, rows=()):
+        self._cursor = cursor
+        self._release = release
+        self._chunk_size = chunk_size
+        self._rows = iter(rows)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows, None)
+        if row is not None:
+            return row
+        if self._cursor is None:
+            raise StopIteration
+        try:
+            rows = self._cursor.fetchmany(self._chunk_size)
+        except sqlite3.Error as e:
+            logger.error("Failed to stream query results: %s", e)
+            self.close()
+            raise
+        if not rows:
+            self.close()
+            raise StopIteration
+        self._rows = iter(rows)
+        return next(self._rows)
+
+    def close(self):
+        """Stop reading and give the connection back."""
+        if self._cursor is None:
+            return
+        cursor, self._cursor = self._cursor, None
+        self._rows = iter(())
+        try:
+            cursor.close()
+        finally:
+            self._release()
+
+    def __del__(self):
+        self.close()
 
 
 class DatabaseController:
-    def __init__(self, db_name='database.db'):
+    def __init__(self, db_name='database.db', pool_size=5, pool_timeout=5.0, pragma_profile='balanced',
+                 instrument=True, slow_query_ms=100.0, coalesce_writes=False, write_batch_size=100,
+                 write_delay_ms=0.0, cached_statements=256):
         self.db_name = db_name
+        if isinstance(pragma_profile, dict):
+            self.pragma_profile = 'custom'
+            self.pragmas = dict(pragma_profile)
+        elif pragma_profile in PRAGMA_PROFILES:
+            self.pragma_profile = pragma_profile
+            self.pragmas = dict(PRAGMA_PROFILES[pragma_profile])
+        else:
+            raise ValueError(f"Unknown PRAGMA profile: {pragma_profile}. Expected one of: {', '.join(PRAGMA_PROFILES)}.")
+        for name, value in self.pragmas.items():
+            if not name.isidentifier() or not (isinstance(value, int) or str(value).isalnum()):
+                raise ValueError(f"Invalid PRAGMA setting: {name} = {value}")
+        self.pool = ConnectionPool(db_name, size=pool_size, timeout=pool_timeout, on_connect=self._apply_pragmas,
+                                   cached_statements=cached_statements)
+        # SQL for the per-table controller operations, built once per (operation, table)
+        self.statements = StatementRegistry()
+        # Per-statement latency statistics; see top_queries()
+        self.query_stats = QueryStats(slow_query_ms) if instrument else None
+        self.patient_directory = PatientDirectory(self)
+        # Model objects attached to their rows; see IdentityMap
+        self.identity_map = IdentityMap(self)
+        self.doctor_schedules = DoctorScheduleIndex(self)
+        self.room_allocator = RoomAllocator(self)
+        # Patient counts for dashboards, kept current by the patient controller's write paths
+        self.census = CensusEngine(self)
+        # Admissions, discharges and completed appointments and tasks; see read_changes()
+        self.change_feed = ChangeFeed(self)
+        # Single-writer group commits for insert_record, update_record and delete_record
+        self.write_coalescer = WriteCoalescer(self, write_batch_size, write_delay_ms) if coalesce_writes else None
+
+    # Database files whose schema has already been verified by this process.
+    _verified_schemas = {}
+    _verified_lock = threading.Lock()
 
     def initialize_database(self):
-        self.create_patients_table()
-        self.create_inpatients_table()
-        self.create_outpatients_table()
-        self.create_rooms_table()
-        self.create_doctors_table()
-        self.create_nurse_table()
-        self.create_appointments_table()
-        self.create_medical_history_table()
-        self.create_tasks_table()
-        self.create_shifts_table()
+        """
+            Bring the schema up to date, checking each database file at most once per process.
+
+            Returns:
+                bool: True if the schema is current, False if a migration failed.
+            """
+        key = os.path.abspath(self.db_name)
+        with self._verified_lock:
+            identity = self._file_identity()
+            if identity is not None and self._verified_schemas.get(key) == identity:
+                return True
+
+        if not self.migrate():
+            return False
+
+        with self._verified_lock:
+            identity = self._file_identity()
+            if identity is not None:
+                self._verified_schemas[key] = identity
+        return True
+
+    def migrate(self, migrations=None):
+        """
+            Apply every migration newer than the recorded schema version.
+
+            Each migration runs in its own IMMEDIATE transaction together with its schema_version
+            row, so a failed migration leaves the database at the previous version.
+
+            Args:
+                migrations (list, optional): (version, description, statements) tuples. Defaults to MIGRATIONS.
+
+            Returns:
+                bool: True if all migrations were applied, False otherwise.
+            """
+        migrations = MIGRATIONS if migrations is None else migrations
+        try:
+            with self.connect() as cursor:
+                cursor.execute(SCHEMA_VERSION_TABLE_SQL)
+            current_version = self.schema_version()
+
+            for version, description, statements in migrations:
+                if version <= current_version:
+                    continue
+                with self.connect() as cursor:
+                    cursor.execute('BEGIN IMMEDIATE;')
+                    # Another process may have migrated while we waited for the write lock
+                    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                    if cursor.fetchone()[0] >= version:
+                        continue
+                    for statement in statements:
+                        if callable(statement):
+                            statement(cursor)
+                        else:
+                            cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                        (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                    )
+                logger.info("Applied schema migration %s: %s", version, description)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Schema migration failed: %s", e)
+            return False
+
+    def schema_version(self):
+        """Return the highest applied migration version, or 0 for an unversioned database."""
+        try:
+            with self.connect() as cursor:
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                return cursor.fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+
+    def missing_indexes(self):
+        """Return the names of the indexes declared in INDEXES that do not exist in the database."""
+        existing = self.query("SELECT name FROM sqlite_master WHERE type = 'index'") or []
+        existing = {row[0] for row in existing}
+        return [name for name, _, _ in INDEXES if name not in existing]
+
+    def explain_query_plan(self, sql, params=None):
+        """Return the detail column of EXPLAIN QUERY PLAN for the given statement."""
+        with self.connect() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            return [row[3] for row in cursor.fetchall()]
+
+    def full_table_scans(self, sql, params=None):
+        """
+            List the plan steps that read a whole table or index instead of searching it.
+
+            Returns:
+                list: Plan details such as 'SCAN doctors'; empty when every table is searched by key.
+            """
+        return [detail for detail in self.explain_query_plan(sql, params) if detail.startswith('SCAN ')]
+
+    def _file_identity(self):
+        # The identity survives writes but changes when the file is deleted or replaced,
+        # which is when the schema has to be checked again.
+        if self.db_name == ':memory:' or self.db_name.startswith('file:'):
+            return None
+        try:
+            stat = os.stat(self.db_name)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
 
     @contextmanager
     def connect(self, start_transaction = False):
-        """Manage database connection, ensuring it is closed after use."""
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
+        """
+            Borrow a pooled connection for the duration of the block.
+
+            Blocks nested on the same thread share the outer block's connection; only the
+            outermost block commits or rolls back, so nested calls join the outer transaction.
+            """
+        started = time.perf_counter()
+        connection = self.pool.acquire()
+        # Until the cursor exists there is nothing to roll back, only the borrow to give back
+        try:
+            outermost = self.pool.depth == 1
+            written = connection.total_changes
+            cursor = self._cursor(connection, time.perf_counter() - started)
+        except BaseException:
+            self.pool.release(connection)
+            raise
         try:
-            if start_transaction:
+            if start_transaction and not connection.in_transaction:
                 cursor.execute('BEGIN;')
             yield cursor
         except Exception as e:
-            connection.rollback()
-            logger.error(f"Database operation failed: {e}")
+            if outermost:
+                connection.rollback()
+                logger.error("Database operation failed: %s", e)
             raise
         else:
-            connection.commit()
+            if outermost:
+                connection.commit()
+                if connection.total_changes != written:
+                    self.change_feed.notify()
         finally:
-            connection.close()
+            cursor.close()
+            self.pool.release(connection)
+
+    def _cursor(self, connection, wait):
+        if self.query_stats is None:
+            return connection.cursor()
+        return connection.cursor(InstrumentedCursor).bind(self.query_stats, wait * 1000)
+
+    def top_queries(self, n=10, by='total_ms'):
+        """
+            Return the statements with the highest total time, or another statistic.
+
+            Args:
+                n (int): Number of statements to return.
+                by (str): 'total_ms', 'count', 'mean_ms', 'max_ms', 'rows' or 'wait_ms'.
+
+            Returns:
+                list: Per-statement statistics with normalized SQL, latency percentiles and histogram,
+                highest first; empty when the controller is not instrumented.
+            """
+        return self.query_stats.top(n, by) if self.query_stats is not None else []
+
+    def _apply_pragmas(self, connection):
+        for name, value in self.pragmas.items():
+            connection.execute_internal(f"PRAGMA {name} = {value}")
+
+    def pragma_settings(self):
+        """Read back the active value of every PRAGMA in the profile from a pooled connection."""
+        settings = {}
+        with self.connect() as cursor:
+            for name in self.pragmas:
+                cursor.execute(f"PRAGMA {name}")
+                row = cursor.fetchone()
+                settings[name] = row[0] if row else None
+        return settings
+
+    def pool_stats(self):
+        """Return the connection pool counters (hits, misses, open and idle connections)."""
+        return self.pool.stats()
+
+    def statement_cache_stats(self):
+        """
+            Return how well SQL text is reused.
+
+            Returns:
+                dict: 'registry' with the statement registry counts and 'connections' with the
+                prepared statement cache hits of the pooled connections (counted by instrumented
+                cursors and Connection.execute()).
+            """
+        return {'registry': self.statements.stats(), 'connections': self.pool.statement_cache_stats()}
+
+    def close(self):
+        """Close every pooled connection. The controller cannot be used afterwards."""
+        if self.write_coalescer is not None:
+            self.write_coalescer.close()
+        self.pool.close()
 
     def create_table(self, sql):
         """Creates a table in the database based on the provided SQL statement."""
@@ -47,18 +614,22 @@ class DatabaseController:
                 cursor.execute(sql)
                 logger.info("Table created successfully.")
         except sqlite3.Error as e:
-            logger.error(f"Failed to create table: {e}")
+            logger.error("Failed to create table: %s", e)
 
     def insert_record(self, sql, params):
         """Inserts a record into the database using the provided SQL statement and parameters."""
         try:
+            if self._coalesced():
+                last_row_id = self.write_coalescer.execute(sql, params)
+                logger.info("Record inserted successfully, ID: %s", last_row_id)
+                return last_row_id
             with self.connect() as cursor:
                 cursor.execute(sql, params)
                 last_row_id = cursor.lastrowid
-                logger.info(f"Record inserted successfully, ID: {last_row_id}")
+                logger.info("Record inserted successfully, ID: %s", last_row_id)
                 return last_row_id
         except sqlite3.Error as e:
-            logger.error(f"Failed to insert record: {e}")
+            logger.error("Failed to insert record: %s", e)
             return None
 
     def query(self, sql, params=None):
@@ -67,29 +638,165 @@ class DatabaseController:
             with self.connect() as cursor:
                 cursor.execute(sql, params or ())
                 results = cursor.fetchall()
-                logger.debug("Query executed successfully.")
+                logger.debug("Query executed successfully: %s (%s rows)", sql, len(results))
                 return results
         except sqlite3.Error as e:
-            logger.error(f"Failed to execute query: {e}")
+            logger.error("Failed to execute query: %s", e)
             return None
 
+    def iter_query(self, sql, params=None, chunk_size=500):
+        """
+            Execute a SQL query and return an iterator over its rows, fetching chunk_size rows per round trip.
+
+            The connection is chosen and the statement executed when iter_query() is called, not when
+            iteration starts. Called inside a connect() block, the stream reads through that block's
+            connection, so uncommitted rows are visible; consume it before the block ends. Otherwise it
+            holds a pooled connection of its own until it is exhausted or closed, so the caller can keep
+            using the controller while iterating. A pool of one connection has none to spare: there
+            the rows are fetched at once and the connection is given back before iter_query() returns.
+
+            Args:
+                sql (str): The SELECT statement to run.
+                params (tuple, optional): Statement parameters.
+                chunk_size (int): Number of rows fetched from SQLite at a time.
+
+            Returns:
+                QueryStream: Iterator over the result rows; close() it to give the connection back early.
+            """
+        shared = self.pool.depth > 0
+        if not shared and self.pool.size < 2:
+            # Streaming would hold the only connection and block every other call on this controller
+            with self.connect() as cursor:
+                cursor.execute(sql, params or ())
+                return QueryStream(None, None, chunk_size, cursor.fetchall())
+
+        started = time.perf_counter()
+        connection = self.pool.acquire() if shared else self.pool.checkout()
+        release = self.pool.release if shared else self.pool.checkin
+        try:
+            cursor = self._cursor(connection, time.perf_counter() - started)
+            cursor.execute(sql, params or ())
+        except BaseException as e:
+            logger.error("Failed to stream query results: %s", e)
+            release(connection)
+            raise
+        return QueryStream(cursor, lambda: release(connection), chunk_size)
+
+    def page_appointments(self, after=None, limit=500, doctor_id=None):
+        """
+            Fetch one page of appointments using keyset pagination.
+
+            Without a doctor the pages follow appointment_id; for a single doctor they follow
+            (date_time, appointment_id) on the doctor's schedule index.
+
+            Args:
+                after: The cursor returned with the previous page, or None for the first page.
+                limit (int): Maximum number of rows in the page.
+                doctor_id (int, optional): Only return this doctor's appointments.
+
+            Returns:
+                tuple: (rows, cursor) where cursor is passed as after for the next page, or None after the last page.
+            """
+        columns = "appointment_id, description, date_time, appointment_type, patient_id, doctor_id, is_completed"
+        if doctor_id is None:
+            return self._keyset_page(
+                f"SELECT {columns} FROM appointments WHERE appointment_id > ? ORDER BY appointment_id LIMIT ?",
+                (0 if after is None else after,), limit, lambda row: row[0]
+            )
+        after = after or ('', 0)
+        return self._keyset_page(
+            f"SELECT {columns} FROM appointments WHERE doctor_id = ? AND (date_time, appointment_id) > (?, ?) "
+            f"ORDER BY date_time, appointment_id LIMIT ?",
+            (doctor_id, after[0], after[1]), limit, lambda row: (row[2], row[0])
+        )
+
+    def page_medical_history(self, after=None, limit=500, patient_id=None):
+        """
+            Fetch one page of medical history entries using keyset pagination.
+
+            Without a patient the pages follow id; for a single patient they follow (date_added, id)
+            on the patient's history index.
+
+            Args:
+                after: The cursor returned with the previous page, or None for the first page.
+                limit (int): Maximum number of rows in the page.
+                patient_id (int, optional): Only return this patient's entries.
+
+            Returns:
+                tuple: (rows, cursor) where cursor is passed as after for the next page, or None after the last page.
+            """
+        columns = "id, patient_id, entry, date_added"
+        if patient_id is None:
+            return self._keyset_page(
+                f"SELECT {columns} FROM medical_history WHERE id > ? ORDER BY id LIMIT ?",
+                (0 if after is None else after,), limit, lambda row: row[0]
+            )
+        after = after or ('', 0)
+        return self._keyset_page(
+            f"SELECT {columns} FROM medical_history WHERE patient_id = ? AND (date_added, id) > (?, ?) "
+            f"ORDER BY date_added, id LIMIT ?",
+            (patient_id, after[0], after[1]), limit, lambda row: (row[3], row[0])
+        )
+
+    def _coalesced(self):
+        # Writes inside a connect() block stay on that block's connection so they join its transaction
+        return self.write_coalescer is not None and self.pool.depth == 0
+
+    def read_changes(self, since_seq=0, limit=100):
+        """
+            Fetch the changes recorded after since_seq from the change feed, oldest first.
+
+            Args:
+                since_seq (int): The seq of the last change already handled; 0 reads from the start.
+                limit (int): Most changes returned.
+
+            Returns:
+                list: Changes as dicts with seq, event, table, row_id, data and changed_at, or None on error.
+                Pass the last seq as since_seq to read the next changes.
+            """
+        return self.change_feed.read(since_seq, limit)
+
+    def wait_for_changes(self, since_seq=0, limit=100, timeout=30.0):
+        """
+            Long-poll variant of read_changes(): block until a change after since_seq is recorded.
+
+            Returns:
+                list: The changes, empty if none arrived within timeout seconds, or None on error.
+            """
+        return self.change_feed.wait(since_seq, limit, timeout)
+
+    def _keyset_page(self, sql, params, limit, key):
+        rows = self.query(sql, params + (limit,))
+        if not rows:
+            return [], None
+        # A short page is the last one
+        return rows, key(rows[-1]) if len(rows) == limit else None
+
     def update_record(self, sql, params):
         """Updates records in the database."""
         try:
+            if self._coalesced():
+                self.write_coalescer.execute(sql, params)
+                logger.info("Record updated successfully.")
+                return
             with self.connect() as cursor:
                 cursor.execute(sql, params)
                 logger.info("Record updated successfully.")
         except sqlite3.Error as e:
-            logger.error(f"Failed to update record: {e}")
+            logger.error("Failed to update record: %s", e)
 
     def delete_record(self, sql, params):
         """Deletes records from the database."""
         try:
+            if self._coalesced():
+                self.write_coalescer.execute(sql, params)
+                logger.info("Record deleted successfully.")
+                return
             with self.connect() as cursor:
                 cursor.execute(sql, params)
                 logger.info("Record deleted successfully.")
         except sqlite3.Error as e:
-            logger.error(f"Failed to delete record: {e}")
+            logger.error("Failed to delete record: %s", e)
 
     def run_transaction(self, operations):
         """Runs a set of database operations as a single transaction."""
@@ -100,200 +807,87 @@ class DatabaseController:
                 logger.info("Transaction executed successfully.")
                 return True
         except sqlite3.Error as e:
-            logger.error(f"Transaction failed: {e}")
+            logger.error("Transaction failed: %s", e)
             return False
 
     def create_patients_table(self):
         try:
-            sql = """
-            CREATE TABLE IF NOT EXISTS patients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                full_name TEXT NOT NULL UNIQUE,
-                age INTEGER,
-                gender TEXT,
-                contact_info TEXT,
-                personal_number TEXT,
-                insurance TEXT,
-                condition TEXT,
-                admission_status TEXT
-            );
-        """
+            sql = PATIENTS_TABLE_SQL
             self.create_table(sql)
         except Exception as e:
-            logger.error(f'Error creating table: {e}')
+            logger.error('Error creating table: %s', e)
 
     def create_inpatients_table(self):
         try:
-            sql = """
-                        CREATE TABLE IF NOT EXISTS inpatients (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            unique_identifier TEXT NOT NULL UNIQUE,
-                            full_name TEXT NOT NULL UNIQUE,
-                            age INTEGER,
-                            gender TEXT,
-                            contact_info TEXT,
-                            personal_number TEXT,
-                            insurance TEXT,
-                            condition TEXT,
-                            room_number INTEGER,
-                            admission_status TEXT,
-                            FOREIGN KEY (room_number) REFERENCES rooms(room_number)
-                        );
-                    """
+            sql = INPATIENTS_TABLE_SQL
             self.create_table(sql)
 
             logger.info("Table 'inpatients' created successfully.")
         except Exception as e:
             # Handle any exceptions that may occur
-            logger.error(f"Error creating table: {e}")
+            logger.error("Error creating table: %s", e)
 
     def create_outpatients_table(self):
         try:
-            sql = """
-            CREATE TABLE IF NOT EXISTS outpatients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                unique_identifier TEXT NOT NULL UNIQUE,
-                full_name TEXT NOT NULL UNIQUE,
-                age INTEGER,
-                gender TEXT,
-                contact_info TEXT,
-                personal_number TEXT,
-                insurance TEXT,
-                condition TEXT,
-                admission_status TEXT
-            );
-        """
+            sql = OUTPATIENTS_TABLE_SQL
             self.create_table(sql)
 
             logger.info("Table 'outpatients' created successfully.")
         except Exception as e:
             # Handle any exceptions that may occur
-            logger.error(f"Error creating table: {e}")
+            logger.error("Error creating table: %s", e)
 
     def create_rooms_table(self):
         try:
-            sql = """
-    CREATE TABLE IF NOT EXISTS rooms (
-        room_number INTEGER PRIMARY KEY,
-        room_type TEXT NOT NULL,
-        daily_rate REAL NOT NULL,
-        capacity INTEGER NOT NULL,
-        is_occupied INTEGER NOT NULL DEFAULT 0,
-        CHECK (room_type IN ('Single', 'Double', 'ICU')),
-        CHECK (daily_rate >= 1),
-        CHECK (capacity BETWEEN 1 AND 2),
-        CHECK (is_occupied IN (0, 1))
-    );
-    """
+            sql = ROOMS_TABLE_SQL
             self.create_table(sql)
         except Exception as e:
-            logger.error(f'Error creating table: {e}')
+            logger.error('Error creating table: %s', e)
 
     def create_appointments_table(self):
         try:
-            sql = """
-                CREATE TABLE IF NOT EXISTS appointments (
-                    appointment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    description TEXT NOT NULL,
-                    date_time DATETIME NOT NULL,  -- Store as TEXT in ISO8601 format ("YYYY-MM-DD HH:MM:SS")
-                    appointment_type TEXT NOT NULL,
-                    patient_id INTEGER NOT NULL,
-                    doctor_id INTEGER NOT NULL,
-                    is_completed INTEGER NOT NULL DEFAULT 0,  -- 0 for false, 1 for true
-                    FOREIGN KEY (patient_id) REFERENCES patients(id),
-                    FOREIGN KEY (doctor_id) REFERENCES doctors(id),
-                    CHECK (appointment_type IN ('Surgery', 'Consultation', 'Visit', 'Procedure')),
-                    CHECK (is_completed IN (0, 1))
-                );
-                """
+            sql = APPOINTMENTS_TABLE_SQL
             self.create_table(sql)
             logger.info("Appointments table created successfully.")
         except Exception as e:
-            logger.error(f'Error creating table: {e}')
+            logger.error('Error creating table: %s', e)
 
     def create_doctors_table(self):
         try:
-            sql = """
-            CREATE TABLE IF NOT EXISTS doctors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                work_id INTEGER NOT NULL,
-                full_name TEXT NOT NULL,
-                age INTEGER,
-                gender TEXT,
-                department TEXT,
-                specialization TEXT NOT NULL
-                );
-            """
+            sql = DOCTORS_TABLE_SQL
             self.create_table(sql)
             logger.info("Doctors table created successfully.")
         except Exception as e:
-            logger.error(f'Error creating table: {e}')
+            logger.error('Error creating table: %s', e)
 
     def create_nurse_table(self):
         try:
-            sql = """
-                CREATE TABLE IF NOT EXISTS nurses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    work_id INTEGER NOT NULL,
-                    full_name TEXT NOT NULL,
-                    age INTEGER,
-                    gender TEXT,
-                    department TEXT
-                );
-                """
+            sql = NURSES_TABLE_SQL
             self.create_table(sql)
             logger.info("Nurses table created successfully.")
         except Exception as e:
-            logger.error(f'Error creating table: {e}')
+            logger.error('Error creating table: %s', e)
 
     def create_medical_history_table(self):
         try:
-            sql = """
-                    CREATE TABLE IF NOT EXISTS medical_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        patient_id INTEGER NOT NULL,
-                        entry TEXT NOT NULL,
-                        date_added TEXT NOT NULL,
-                        FOREIGN KEY (patient_id) REFERENCES patients(id)
-                    );
-                    """
+            sql = MEDICAL_HISTORY_TABLE_SQL
             self.create_table(sql)
             logger.info("Medical history table created successfully.")
         except Exception as e:
-            logger.error(f"Error creating medical history table: {e}")
+            logger.error("Error creating medical history table: %s", e)
 
     def create_tasks_table(self):
         try:
-            sql = """
-                   CREATE TABLE IF NOT EXISTS tasks (
-                       task_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                       description TEXT NOT NULL,
-                       patient_id INTEGER NOT NULL,
-                       priority INTEGER NOT NULL,
-                       is_completed INTEGER NOT NULL DEFAULT 0,  -- 0 for false, 1 for true
-                       FOREIGN KEY (patient_id) REFERENCES patients(id),
-                       CHECK (priority >= 0)  -- Ensure priority is non-negative
-                   );
-               """
+            sql = TASKS_TABLE_SQL
             self.create_table(sql)
             logger.info("Tasks table created.")
         except Exception as e:
-            logger.error(f'Error creating tasks table: {e}')
+            logger.error('Error creating tasks table: %s', e)
 
     def create_shifts_table(self):
         try:
-            sql = """
-                    CREATE TABLE IF NOT EXISTS shifts (
-                        shift_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        start_date_time TEXT NOT NULL,
-                        end_date_time TEXT NOT NULL,
-                        shift_type TEXT NOT NULL
-                    );
-                """
+            sql = SHIFTS_TABLE_SQL
             self.create_table(sql)
             logger.info("Shifts table created.")
         except Exception as e:
-            logger.error(f'Error creating shifts table: {e}')
-
-
-
+            logger.error('Error creating shifts table: %s', e)
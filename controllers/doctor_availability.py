@@ -0,0 +1,116 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import islice
+from controllers.doctor_schedule import from_db_datetime, to_db_datetime
+
+SPECIALIZATION_DOCTORS_SQL = "SELECT id FROM doctors WHERE specialization = ? ORDER BY id"
+
+# Appointments that start inside the window, plus each doctor's last appointment starting before
+# it, which is the only one that can run into the window because bookings never overlap. Both
+# halves are searched through idx_doctors_specialization and idx_appointments_doctor_date.
+BUSY_INTERVALS_SQL = """
+    SELECT a.doctor_id, a.date_time, a.duration_minutes
+    FROM doctors d JOIN appointments a ON a.doctor_id = d.id
+    WHERE d.specialization = ? AND a.date_time >= ? AND a.date_time < ?
+    UNION ALL
+    SELECT a.doctor_id, a.date_time, a.duration_minutes
+    FROM doctors d JOIN appointments a ON a.appointment_id = (
+        SELECT appointment_id FROM appointments
+        WHERE doctor_id = d.id AND date_time < ?
+        ORDER BY date_time DESC LIMIT 1
+    )
+    WHERE d.specialization = ?
+"""
+
+
+def busy_intervals(db_controller, specialization, start, end):
+    """
+        Collect the booked intervals of every doctor with the given specialization.
+
+        Args:
+            db_controller (DatabaseController): The controller to query.
+            specialization (str): The doctors' specialization, e.g. 'Cardiology'.
+            start (datetime): Start of the window.
+            end (datetime): End of the window.
+
+        Returns:
+            dict: Sorted (start, end) tuples overlapping [start, end), keyed by doctor id. Every
+            matching doctor has an entry, so doctors without bookings map to an empty list.
+        """
+    db_controller.initialize_database()
+    window_start, window_end = to_db_datetime(start), to_db_datetime(end)
+    with db_controller.connect() as cursor:
+        cursor.execute(SPECIALIZATION_DOCTORS_SQL, (specialization,))
+        intervals = {doctor_id: [] for doctor_id, in cursor.fetchall()}
+        cursor.execute(BUSY_INTERVALS_SQL, (specialization, window_start, window_end, window_start, specialization))
+        rows = cursor.fetchall()
+
+    booked = defaultdict(list)
+    for doctor_id, date_time, duration_minutes in rows:
+        busy_start = from_db_datetime(date_time)
+        busy_end = busy_start + timedelta(minutes=duration_minutes)
+        if busy_end > start:
+            booked[doctor_id].append((busy_start, busy_end))
+    for doctor_id, slots in booked.items():
+        intervals[doctor_id] = sorted(slots)
+    return intervals
+
+
+def _align(moment, step):
+    # Round up to the next multiple of step counted from midnight
+    midnight = datetime.combine(moment.date(), time.min, moment.tzinfo)
+    remainder = (moment - midnight) % step
+    return moment if not remainder else moment + (step - remainder)
+
+
+def _free_slots(doctor_id, busy, start, end, duration, step, day_start, day_end):
+    # Walks the doctor's busy intervals once, jumping over each booking and each night
+    index = 0
+    moment = _align(start, step)
+    while moment + duration <= end:
+        if day_start is not None and moment.time() < day_start:
+            moment = _align(datetime.combine(moment.date(), day_start, moment.tzinfo), step)
+            continue
+        if day_end is not None and moment + duration > datetime.combine(moment.date(), day_end, moment.tzinfo):
+            next_day = datetime.combine(moment.date() + timedelta(days=1), day_start or time.min, moment.tzinfo)
+            moment = _align(next_day, step)
+            continue
+        while index < len(busy) and busy[index][1] <= moment:
+            index += 1
+        if index < len(busy) and busy[index][0] < moment + duration:
+            moment = _align(busy[index][1], step)
+            continue
+        yield moment, moment + duration, doctor_id
+        moment += step
+
+
+def free_slots(db_controller, specialization, start, end, duration=timedelta(minutes=30), limit=1,
+               step=None, day_start=None, day_end=None):
+    """
+        Find the earliest free slots with any doctor of a specialization.
+
+        Only the appointments inside the window are read, so the cost grows with the bookings in
+        the window and the number of matching doctors rather than with the appointments table.
+
+        Args:
+            db_controller (DatabaseController): The controller to query.
+            specialization (str): The doctors' specialization, e.g. 'Cardiology'.
+            start (datetime): Earliest start of a slot.
+            end (datetime): Latest end of a slot.
+            duration (timedelta): Length of the slot.
+            limit (int): Maximum number of slots to return.
+            step (timedelta): Spacing of candidate start times from midnight; defaults to duration.
+            day_start (time): Optional start of the working day; slots never begin earlier.
+            day_end (time): Optional end of the working day; slots never run later.
+
+        Returns:
+            list: Up to limit (start, end, doctor_id) tuples ordered by start time, then doctor id.
+        """
+    if duration <= timedelta(0):
+        raise ValueError("Slot duration must be positive.")
+    step = step or duration
+    intervals = busy_intervals(db_controller, specialization, start, end)
+    per_doctor = [_free_slots(doctor_id, busy, start, end, duration, step, day_start, day_end)
+                  for doctor_id, busy in intervals.items()]
+    return list(islice(heapq.merge(*per_doctor), limit))
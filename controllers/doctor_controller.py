@@ -1,8 +1,12 @@
-from log_config import setup_logging
+import math
+from datetime import timedelta
+from log_config import get_logger
 from controllers.database_controller import DatabaseController
 from controllers.patient_controller import PatientController
+from controllers.doctor_schedule import to_db_datetime
+from controllers import doctor_availability
 
-logger = setup_logging()
+logger = get_logger()
 
 
 class DoctorController:
@@ -15,7 +19,7 @@ class DoctorController:
                 sql_query = "SELECT id FROM doctors WHERE full_name = ?"
                 existing_doctor = db_controller.query(sql_query, (doctor.full_name,))
                 if existing_doctor:
-                    logger.warning(f"Doctor already exists in the database: {doctor.full_name}")
+                    logger.warning("Doctor already exists in the database: %s", doctor.full_name)
                     return False
 
                 # Prepare the values for insertion
@@ -31,30 +35,40 @@ class DoctorController:
                            INSERT INTO doctors (work_id, full_name, age, gender, department, specialization)
                            VALUES (?, ?, ?, ?, ?, ?)
                            """
-                db_controller.insert_record(sql_insert, values)
+                doctor_id = db_controller.insert_record(sql_insert, values)
+                if not doctor_id:
+                    logger.error("Failed to add doctor: %s", doctor.full_name)
+                    return False
+                db_controller.identity_map.attach(doctor, 'doctors', doctor_id, clean=True)
 
-                logger.info(f"Doctor added successfully: {doctor.full_name}")
+                logger.info("Doctor added successfully: %s", doctor.full_name)
                 return True
             except Exception as e:
-                logger.error(f"Error adding doctor: {e}")
+                logger.error("Error adding doctor: %s", e)
                 return False
 
         @staticmethod
         def remove_doctor(db_controller, doctor):
             try:
-                # Find the doctor ID by name
-                doctor_id = DoctorController.find_doctor_id_by_name(db_controller, doctor.full_name)
+                doctor_id = DoctorController.find_doctor_id(db_controller, doctor)
                 if doctor_id is None:
-                    logger.warning(f"Doctor {doctor.full_name} not found in the database.")
+                    logger.warning("Doctor %s not found in the database.", doctor.full_name)
                     return False
 
                 # Remove the doctor from the database
                 sql_delete_doctor = "DELETE FROM doctors WHERE id = ?"
-                db_controller.delete_record(sql_delete_doctor, (doctor_id,))
-                logger.info(f"Doctor {doctor.full_name} removed successfully.")
+                with db_controller.connect() as cursor:
+                    cursor.execute(sql_delete_doctor, (doctor_id,))
+                    deleted = cursor.rowcount
+                db_controller.identity_map.detach(doctor)
+                if not deleted:
+                    # The cached ID was stale; the next lookup goes by name
+                    logger.warning("Doctor %s no longer exists in the database.", doctor.full_name)
+                    return False
+                logger.info("Doctor %s removed successfully.", doctor.full_name)
                 return True
             except Exception as e:
-                logger.error(f"Error removing doctor: {e}")
+                logger.error("Error removing doctor: %s", e)
                 return False
 
         @staticmethod
@@ -73,44 +87,142 @@ class DoctorController:
                     # Return None if the doctor is not found
                     return None
             except Exception as e:
-                logger.error(f"Error finding doctor ID: {e}")
+                logger.error("Error finding doctor ID: %s", e)
                 return None
 
+        @staticmethod
+        def find_doctor_id(db_controller, doctor):
+            """Return the ID of the doctor's record from the identity map, looking it up by name on first use."""
+            identity = db_controller.identity_map.identify(doctor)
+            if identity is not None:
+                return identity[1]
+            doctor_id = DoctorController.find_doctor_id_by_name(db_controller, doctor.full_name)
+            if doctor_id is not None:
+                db_controller.identity_map.attach(doctor, 'doctors', doctor_id)
+            return doctor_id
+
+        @staticmethod
+        def save_doctor(db_controller, doctor):
+            """
+                Write the doctor's changed fields to their record, updating only the columns that changed.
+
+                Returns:
+                    bool: True if the record is up to date, False if the doctor is not found or the update failed.
+                """
+            try:
+                if DoctorController.find_doctor_id(db_controller, doctor) is None:
+                    logger.warning("Doctor %s not found in the database.", doctor.full_name)
+                    return False
+                changes = db_controller.identity_map.save(doctor)
+                logger.info("Doctor %s saved, %s columns updated.", doctor.full_name, len(changes))
+                return True
+            except Exception as e:
+                logger.error("Error saving doctor: %s", e)
+                return False
+
         @staticmethod
         def create_appointment(db_controller, doctor, appointment):
             try:
-                doctor_id = DoctorController.find_doctor_id_by_name(doctor.full_name)
-                patient_id = PatientController.find_patient_id_by_name(db_controller, appointment.patient.full_name)
+                doctor_id = DoctorController.find_doctor_id(db_controller, doctor)
+                patient_record = PatientController.find_patient_record(db_controller, appointment.patient)
                 if doctor_id is None:
-                    logger.warning(f"Doctor {doctor.full_name} not found in the database.")
+                    logger.warning("Doctor %s not found in the database.", doctor.full_name)
                     return False
-                if patient_id is None:
-                    logger.warning(f"Patient {appointment.patient.full_name} not found in the database.")
+                if patient_record is None:
+                    logger.warning("Patient %s not found in the database.", appointment.patient.full_name)
                     return False
-                else:
-                    description = appointment.description
-                    date_time = appointment.date_time
-                    appointment_type = appointment.appointment_type.value
-
-                    sql_insert = """
-                                    INSERT INTO appointments (description, date_time, appointment_type, patient_id, doctor_id)
-                                    VALUES (?, ?, ?, ?, ?)
-                                """
-                    values = (description, date_time, appointment_type, patient_id, doctor_id)
-                    db_controller.insert_record(sql_insert, values)
-                    doctor.assign_task(appointment)
-                    logger.info("Appointment created successfully.")
-                    return True
+                patient_table, patient_id, _ = patient_record
+
+                # Stored in whole minutes; round up so the saved slot covers the whole appointment
+                duration_minutes = math.ceil(appointment.duration.total_seconds() / 60)
+                start = appointment.date_time
+                end = start + timedelta(minutes=duration_minutes)
+                if doctor.appointments_between(start, end):
+                    logger.warning("Appointment at %s overlaps another appointment of Doctor %s.", start, doctor.full_name)
+                    return False
+
+                # Claim the slot in the doctor's schedule index first so concurrent bookings cannot overlap
+                schedules = db_controller.doctor_schedules
+                if not schedules.reserve(doctor_id, start, end):
+                    logger.warning("Appointment at %s overlaps another appointment of Doctor %s.", start, doctor.full_name)
+                    return False
+
+                description = appointment.description
+                appointment_type = appointment.appointment_type.value
 
+                sql_insert = db_controller.statements.get('add_appointment', patient_table)
+                values = (description, to_db_datetime(start), appointment_type, patient_id, doctor_id, duration_minutes)
+                appointment_id = db_controller.insert_record(sql_insert, values)
+                if not appointment_id:
+                    schedules.release(doctor_id, start)
+                    # The insert also fails if the doctor's or the patient's cached ID is stale;
+                    # look both up again next time
+                    db_controller.identity_map.detach(doctor)
+                    PatientController.forget_patient(db_controller, appointment.patient)
+                    logger.error("Failed to create appointment.")
+                    return False
+
+                schedules.confirm(doctor_id, start, appointment_id)
+                appointment.appointment_id = appointment_id
+                doctor.assign_task(appointment)
+                logger.info("Appointment created successfully.")
+                return True
+
+            except Exception as e:
+                logger.error("Error creating appointment: %s", e)
+                return False
+
+        @staticmethod
+        def load_schedules(db_controller):
+            """Rebuild every doctor's schedule index from the appointments table, e.g. at startup."""
+            try:
+                db_controller.doctor_schedules.load()
+                return True
             except Exception as e:
-                logger.error(f"Error creating appointment: {e}")
+                logger.error("Error loading doctor schedules: %s", e)
                 return False
 
+        @staticmethod
+        def next_appointment(db_controller, doctor, moment):
+            """Return (start, end, appointment_id) of the doctor's first appointment at or after moment, or None."""
+            doctor_id = DoctorController.find_doctor_id(db_controller, doctor)
+            if doctor_id is None:
+                logger.warning("Doctor %s not found in the database.", doctor.full_name)
+                return None
+            return db_controller.doctor_schedules.next_appointment(doctor_id, moment)
+
+        @staticmethod
+        def appointments_between(db_controller, doctor, start, end):
+            """Return (start, end, appointment_id) for the doctor's appointments overlapping [start, end)."""
+            doctor_id = DoctorController.find_doctor_id(db_controller, doctor)
+            if doctor_id is None:
+                logger.warning("Doctor %s not found in the database.", doctor.full_name)
+                return []
+            return db_controller.doctor_schedules.between(doctor_id, start, end)
+
+        @staticmethod
+        def find_free_slots(db_controller, specialization, start, end, duration=timedelta(minutes=30), limit=1,
+                            day_start=None, day_end=None):
+            """
+                Return the earliest free slots with any doctor of the given specialization.
+
+                Returns:
+                    list: Up to limit (start, end, doctor_id) tuples in time order; empty on error.
+                """
+            try:
+                slots = doctor_availability.free_slots(db_controller, specialization, start, end, duration, limit,
+                                                       day_start=day_start, day_end=day_end)
+                logger.info("Found %s free %s slots.", len(slots), specialization)
+                return slots
+            except Exception as e:
+                logger.error("Error finding free slots: %s", e)
+                return []
+
         @staticmethod
         def perform_duty(db_controller, doctor):
             try:
-                if doctor.appointments:
-                    # Pop the last appointment
+                if doctor.has_appointments():
+                    # Pop the earliest upcoming appointment
                     appointment = doctor.perform_duty()
                     # Mark the appointment as completed
                     appointment.mark_completed()
@@ -120,34 +232,34 @@ class DoctorController:
                     values = (1, appointment.appointment_id)  # Marking as completed (1)
                     db_controller.update_record(sql_update, values)
 
-                    logger.info(f"Appointment completed and removed: {appointment.description}")
+                    logger.info("Appointment completed and removed: %s", appointment.description)
                     return True
                 else:
                     logger.info("No upcoming appointments for the doctor.")
                     return False
             except Exception as e:
-                logger.error(f"Error performing duty: {e}")
+                logger.error("Error performing duty: %s", e)
                 return False
 
         @staticmethod
         def prescribe(db_controller, patient, entry):
             try:
                 # Check if the patient exists
-                patient_id = PatientController.find_patient_id_by_name(db_controller, patient.full_name)
+                patient_id = PatientController.find_patient_id(db_controller, patient)
                 if patient_id is None:
-                    logger.warning(f"Patient {patient.full_name} not found in the database.")
+                    logger.warning("Patient %s not found in the database.", patient.full_name)
                     return False
 
                 # Provide treatment to the patient
                 treatment_successful = PatientController.provide_treatment(patient, entry)
                 if treatment_successful:
-                    logger.info(f"Prescription provided to patient: {patient.full_name}")
+                    logger.info("Prescription provided to patient: %s", patient.full_name)
                     return True
                 else:
                     logger.error("Failed to provide prescription.")
                     return False
             except Exception as e:
-                logger.error(f"Error prescribing medication: {e}")
+                logger.error("Error prescribing medication: %s", e)
                 return False
 
 
@@ -0,0 +1,109 @@
+import threading
+from datetime import datetime, timedelta
+from log_config import get_logger
+from models.schedule_model import Schedule
+
+logger = get_logger()
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def to_db_datetime(value):
+    """Format a datetime the way the appointments table stores it."""
+    return value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+
+
+def from_db_datetime(value):
+    """Parse a stored date_time value; accepts both space and 'T' separators and fractional seconds."""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+class DoctorScheduleIndex:
+    """
+        In-memory index of booked appointment slots, one Schedule per doctor id.
+
+        The index is built from the appointments table on first use (or by calling load() at
+        startup) and is then kept current by DoctorController as appointments are booked. Slots
+        are never double-booked: reserve() checks for overlaps and claims the slot in one step.
+
+        Args:
+            db_controller (DatabaseController): The controller used to read the appointments table.
+        """
+
+    def __init__(self, db_controller):
+        self._db_controller = db_controller
+        self._schedules = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def load(self):
+        """Rebuild the index from the appointments table."""
+        self._db_controller.initialize_database()
+        schedules = {}
+        skipped = 0
+        sql = "SELECT appointment_id, doctor_id, date_time, duration_minutes FROM appointments ORDER BY doctor_id, date_time"
+        with self._lock:
+            for appointment_id, doctor_id, date_time, duration_minutes in self._db_controller.iter_query(sql):
+                start = from_db_datetime(date_time)
+                schedule = schedules.setdefault(doctor_id, Schedule())
+                try:
+                    schedule.add(start, start + timedelta(minutes=duration_minutes), appointment_id)
+                except ValueError:
+                    # Rows booked before overlap checks existed; the earlier booking keeps the slot
+                    skipped += 1
+            self._schedules = schedules
+            self._loaded = True
+        if skipped:
+            logger.warning("Skipped %s overlapping appointments while loading doctor schedules.", skipped)
+        logger.info("Loaded schedules for %s doctors.", len(schedules))
+
+    def conflicts(self, doctor_id, start, end):
+        """Return the IDs of the doctor's appointments that overlap [start, end)."""
+        with self._lock:
+            schedule = self._schedule(doctor_id)
+            return schedule.overlapping(start, end) if schedule else []
+
+    def reserve(self, doctor_id, start, end):
+        """Claim [start, end) for the doctor if it is free. Returns True if the slot was reserved."""
+        with self._lock:
+            self._ensure_loaded()
+            schedule = self._schedules.setdefault(doctor_id, Schedule())
+            if schedule.overlapping(start, end):
+                return False
+            schedule.add(start, end, None)
+            return True
+
+    def confirm(self, doctor_id, start, appointment_id):
+        """Attach the appointment ID to a slot claimed with reserve()."""
+        with self._lock:
+            self._schedules[doctor_id].replace(start, appointment_id)
+
+    def release(self, doctor_id, start):
+        """Free the doctor's slot starting at start, if there is one."""
+        with self._lock:
+            schedule = self._schedule(doctor_id)
+            if schedule is not None:
+                try:
+                    schedule.remove(start)
+                except KeyError:
+                    pass
+
+    def next_appointment(self, doctor_id, moment):
+        """Return (start, end, appointment_id) of the doctor's first appointment starting at or after moment."""
+        with self._lock:
+            schedule = self._schedule(doctor_id)
+            return schedule.next_after(moment) if schedule else None
+
+    def between(self, doctor_id, start, end):
+        """Return (start, end, appointment_id) for the doctor's appointments overlapping [start, end)."""
+        with self._lock:
+            schedule = self._schedule(doctor_id)
+            return schedule.between(start, end) if schedule else []
+
+    def _schedule(self, doctor_id):
+        self._ensure_loaded()
+        return self._schedules.get(doctor_id)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
@@ -0,0 +1,230 @@
+import threading
+import weakref
+
+# Columns written through save(), as column: function reading the value from the model object.
+# room_number and admission_status are left out because changing them must also move beds, which
+# only the admit, discharge and room controller operations do; unique_identifier is fixed at insert.
+PATIENT_COLUMNS = {
+    'full_name': lambda patient: patient.full_name,
+    'age': lambda patient: patient.age,
+    'gender': lambda patient: patient.gender,
+    'contact_info': lambda patient: patient.contact_info,
+    'personal_number': lambda patient: patient.personal_number,
+    'insurance': lambda patient: patient.insurance,
+    'condition': lambda patient: patient.display_condition(),
+}
+EMPLOYEE_COLUMNS = {
+    'work_id': lambda employee: employee.work_id,
+    'full_name': lambda employee: employee.full_name,
+    'age': lambda employee: employee.age,
+    'gender': lambda employee: employee.gender,
+}
+TRACKED_COLUMNS = {
+    'inpatients': PATIENT_COLUMNS,
+    'outpatients': PATIENT_COLUMNS,
+    'doctors': dict(EMPLOYEE_COLUMNS, specialization=lambda doctor: doctor.specialization),
+    'nurses': EMPLOYEE_COLUMNS,
+}
+# Column compared alongside the id whenever the map knows its stored value, so a row rewritten
+# outside this controller is not taken for the object's
+KEY_COLUMNS = {
+    'inpatients': 'unique_identifier',
+    'outpatients': 'unique_identifier',
+    'doctors': 'work_id',
+    'nurses': 'work_id',
+}
+
+
+class IdentityMap:
+    """
+        Ties model objects to their database rows for one DatabaseController.
+
+        Each attached object is mapped to its (table, row id) and the other way round, so a row
+        loaded twice comes back as the same object and controllers find an object's row without
+        searching by name. Alongside the row id the map keeps the column values last written to or
+        read from the row; save() compares them with the object and updates only the columns that
+        changed. Columns the map has never seen count as changed. Objects are held weakly, so the
+        map does not keep patients or staff alive.
+
+        Rows can be deleted or re-inserted under a new id through another controller or process,
+        which this map never hears about. Lookups trust the map and cost no query; a stale entry
+        shows when a write through it finds no row. save() then detaches the object itself, and the
+        controllers detach it when their own keyed writes miss, so the next lookup reads the
+        database.
+
+        Args:
+            db_controller (DatabaseController): The controller that save() writes through.
+            columns (dict, optional): Tracked columns per table in the form of TRACKED_COLUMNS.
+        """
+
+    def __init__(self, db_controller, columns=None):
+        self._db_controller = db_controller
+        self._columns = TRACKED_COLUMNS if columns is None else columns
+        self._objects = weakref.WeakValueDictionary()
+        self._records = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._saved_columns = 0
+        self._skipped_columns = 0
+
+    def attach(self, obj, table, row_id, values=None, clean=False):
+        """
+            Map an object to its row, replacing any object previously mapped to the same row.
+
+            Args:
+                obj: The model object.
+                table (str): The table holding the row.
+                row_id (int): The row's id.
+                values (dict, optional): Column values known to be stored in the row.
+                clean (bool): The object's tracked columns match the row, e.g. right after inserting it.
+            """
+        if table not in self._columns:
+            raise ValueError(f"Table {table!r} is not tracked by the identity map.")
+        stored = dict(values or {})
+        if clean:
+            stored.update(self._read(obj, table))
+        with self._lock:
+            previous = self._objects.get((table, row_id))
+            if previous is not None and previous is not obj:
+                self._records.pop(previous, None)
+            record = self._records.get(obj)
+            if record is not None and record[:2] != [table, row_id]:
+                self._objects.pop((record[0], record[1]), None)
+            self._objects[(table, row_id)] = obj
+            self._records[obj] = [table, row_id, stored]
+
+    def detach(self, obj):
+        """Forget an object, e.g. after its row was deleted."""
+        with self._lock:
+            record = self._records.pop(obj, None)
+            if record is not None and self._objects.get((record[0], record[1])) is obj:
+                del self._objects[(record[0], record[1])]
+
+    def identify(self, obj):
+        """Return (table, row id) of an attached object, or None."""
+        with self._lock:
+            record = self._records.get(obj)
+            if record is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return record[0], record[1]
+
+    def stored_value(self, obj, column):
+        """Return the value last known to be stored in a column of the object's row, or None."""
+        with self._lock:
+            record = self._records.get(obj)
+            return None if record is None else record[2].get(column)
+
+    def get(self, table, row_id):
+        """Return the object mapped to a row, or None."""
+        with self._lock:
+            return self._objects.get((table, row_id))
+
+    def load(self, table, row_id, build, values=None):
+        """
+            Return the object mapped to a row, building and attaching it on first load.
+
+            Args:
+                table (str): The table holding the row.
+                row_id (int): The row's id.
+                build (callable): Called without arguments to create the object from the row's data;
+                    its tracked columns are taken to match the row.
+                values (dict, optional): Untracked column values of the row, as for attach().
+            """
+        obj = self.get(table, row_id)
+        if obj is None:
+            obj = build()
+            with self._lock:
+                # Another thread may have loaded the row meanwhile; the first object wins
+                existing = self._objects.get((table, row_id))
+            if existing is not None:
+                return existing
+            self.attach(obj, table, row_id, values, clean=True)
+        return obj
+
+    def dirty_columns(self, obj):
+        """
+            Return the tracked columns whose value on the object differs from the row.
+
+            Returns:
+                dict or None: Column to new value, or None if the object is not attached.
+            """
+        with self._lock:
+            record = self._records.get(obj)
+            if record is None:
+                return None
+            table, _, stored = record
+            stored = dict(stored)
+        missing = object()
+        return {column: value for column, value in self._read(obj, table).items()
+                if stored.get(column, missing) != value}
+
+    def mark_clean(self, obj, *columns):
+        """Record that the given columns, or all tracked columns, were written from the object."""
+        with self._lock:
+            record = self._records.get(obj)
+            if record is None:
+                return
+            values = self._read(obj, record[0])
+            record[2].update((column, values[column]) for column in columns or values)
+
+    def save(self, obj):
+        """
+            Write the object's changed columns to its row in one UPDATE.
+
+            Returns:
+                dict: The columns written; empty if nothing changed.
+
+            Raises:
+                KeyError: If the object is not attached, or its row no longer exists; the object is
+                    then detached.
+                sqlite3.Error: If the update fails; the columns stay dirty.
+            """
+        changes = self.dirty_columns(obj)
+        if changes is None:
+            raise KeyError(f"{type(obj).__name__} is not attached to a row.")
+        table, row_id = self.identify(obj)
+        if changes:
+            assignments = ', '.join(f"{column} = ?" for column in changes)
+            sql = f"UPDATE {table} SET {assignments} WHERE id = ?"
+            parameters = [*changes.values(), row_id]
+            key = KEY_COLUMNS.get(table)
+            key_value = self.stored_value(obj, key) if key else None
+            if key_value is not None:
+                sql += f" AND {key} = ?"
+                parameters.append(key_value)
+            with self._db_controller.connect() as cursor:
+                cursor.execute(sql, parameters)
+                updated = cursor.rowcount
+            if not updated:
+                self.detach(obj)
+                raise KeyError(f"The {table} row {row_id} of {type(obj).__name__} no longer exists.")
+        with self._lock:
+            record = self._records.get(obj)
+            if record is not None:
+                record[2].update(changes)
+            self._saved_columns += len(changes)
+            self._skipped_columns += len(self._columns[table]) - len(changes)
+        return changes
+
+    def clear(self):
+        """Forget every object."""
+        with self._lock:
+            self._objects.clear()
+            self._records.clear()
+
+    def stats(self):
+        """Return the map size, lookup hits and misses, and how many columns save() wrote and skipped."""
+        with self._lock:
+            return {
+                'size': len(self._records),
+                'hits': self._hits,
+                'misses': self._misses,
+                'saved_columns': self._saved_columns,
+                'skipped_columns': self._skipped_columns,
+            }
+
+    def _read(self, obj, table):
+        return {column: read(obj) for column, read in self._columns[table].items()}
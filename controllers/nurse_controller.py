@@ -1,7 +1,7 @@
-from log_config import setup_logging
+from log_config import get_logger
 from controllers.database_controller import DatabaseController
 from controllers.patient_controller import PatientController
-logger = setup_logging()
+logger = get_logger()
 db_controller = DatabaseController()
 
 
@@ -13,7 +13,7 @@ class NurseController:
                 sql_query = "SELECT work_id FROM nurses WHERE full_name = ?"
                 existing_nurse = db_controller.query(sql_query, (nurse.full_name,))
                 if existing_nurse:
-                    logger.warning(f"Nurse already exists in the database: {nurse.full_name}")
+                    logger.warning("Nurse already exists in the database: %s", nurse.full_name)
                     return False
 
                 # Prepare the values for insertion
@@ -27,12 +27,16 @@ class NurseController:
                                 INSERT INTO nurses (work_id, full_name, age, gender, department)
                                 VALUES (?, ?, ?, ?, ?)
                                 """
-                db_controller.insert_record(sql_insert, values)
+                nurse_id = db_controller.insert_record(sql_insert, values)
+                if not nurse_id:
+                    logger.error("Failed to add nurse: %s", nurse.full_name)
+                    return False
+                db_controller.identity_map.attach(nurse, 'nurses', nurse_id, clean=True)
 
-                logger.info(f"Nurse added successfully: {nurse.full_name}")
+                logger.info("Nurse added successfully: %s", nurse.full_name)
                 return True
             except Exception as e:
-                logger.error(f"Error adding nurse: {e}")
+                logger.error("Error adding nurse: %s", e)
                 return False
 
         @staticmethod
@@ -45,86 +49,177 @@ class NurseController:
                 if result:
                     return result[0][0]  # Return the nurse's ID if found
                 else:
-                    logger.warning(f"No nurse found with name: {full_name}")
+                    logger.warning("No nurse found with name: %s", full_name)
                     return None
             except Exception as e:
-                logger.error(f"Error finding nurse by name: {e}")
+                logger.error("Error finding nurse by name: %s", e)
                 return None
 
+        @staticmethod
+        def find_nurse_id(nurse):
+            """Return the ID of the nurse's record from the identity map, looking it up by name on first use."""
+            identity = db_controller.identity_map.identify(nurse)
+            if identity is not None:
+                return identity[1]
+            nurse_id = NurseController.find_nurse_id_by_name(nurse.full_name)
+            if nurse_id is not None:
+                db_controller.identity_map.attach(nurse, 'nurses', nurse_id)
+            return nurse_id
+
+        @staticmethod
+        def save_nurse(nurse):
+            """
+                Write the nurse's changed fields to their record, updating only the columns that changed.
+
+                Returns:
+                    bool: True if the record is up to date, False if the nurse is not found or the update failed.
+                """
+            try:
+                if NurseController.find_nurse_id(nurse) is None:
+                    return False
+                changes = db_controller.identity_map.save(nurse)
+                logger.info("Nurse %s saved, %s columns updated.", nurse.full_name, len(changes))
+                return True
+            except Exception as e:
+                logger.error("Error saving nurse: %s", e)
+                return False
+
         @staticmethod
         def remove_nurse(nurse):
             try:
-                # Find the doctor ID by name
-                nurse_id = NurseController.find_nurse_id_by_name(nurse.full_name)
+                nurse_id = NurseController.find_nurse_id(nurse)
                 if nurse_id is None:
-                    logger.warning(f"Doctor {nurse.full_name} not found in the database.")
+                    logger.warning("Doctor %s not found in the database.", nurse.full_name)
                     return False
 
                 # Remove the doctor from the database
                 sql_delete_nurse = "DELETE FROM nurses WHERE id = ?"
-                db_controller.delete_record(sql_delete_nurse, (nurse_id,))
-                logger.info(f"Doctor {nurse.full_name} removed successfully.")
+                with db_controller.connect() as cursor:
+                    cursor.execute(sql_delete_nurse, (nurse_id,))
+                    deleted = cursor.rowcount
+                db_controller.identity_map.detach(nurse)
+                if not deleted:
+                    # The cached ID was stale; the next lookup goes by name
+                    logger.warning("Nurse %s no longer exists in the database.", nurse.full_name)
+                    return False
+                logger.info("Doctor %s removed successfully.", nurse.full_name)
                 return True
             except Exception as e:
-                logger.error(f"Error removing doctor: {e}")
+                logger.error("Error removing doctor: %s", e)
                 return False
 
         @staticmethod
         def assign_task(nurse, new_task):
             try:
-                patient_id = PatientController.find_patient_id_by_name(db_controller, new_task.patient.full_name)
-                if patient_id is not None:
-                    # Insert the task into the tasks table
-                    sql_insert = """
-                               INSERT INTO tasks (description, patient_id, priority)
-                               VALUES (?, ?, ?)
-                           """
-                    values = (new_task.description, patient_id, new_task.priority)
+                patient_record = PatientController.find_patient_record(db_controller, new_task.patient)
+                if patient_record is not None:
+                    # Insert the task into the tasks table; nurses not stored in the database leave nurse_id NULL
+                    sql_insert = db_controller.statements.get('add_task', patient_record[0])
+                    values = (new_task.description, patient_record[1], new_task.priority,
+                              NurseController.find_nurse_id(nurse))
                     task_id = db_controller.insert_record(sql_insert, values)
 
                     if task_id:
                         # Assign the task to the nurse
+                        new_task.task_id = task_id
                         nurse.assign_task(new_task)
-                        logger.info(f"Task assigned to Nurse {nurse.full_name}")
+                        logger.info("Task assigned to Nurse %s", nurse.full_name)
                         return True
                     else:
+                        # The insert also fails if the patient's cached ID is stale; look them up again next time
+                        PatientController.forget_patient(db_controller, new_task.patient)
                         logger.error("Failed to assign task.")
                         return False
                 else:
                     logger.error("Patient not found.")
                     return False
             except Exception as e:
-                logger.error(f"Error assigning task: {e}")
+                logger.error("Error assigning task: %s", e)
                 return False
 
         @staticmethod
         def perform_task(nurse):
             try:
-                if nurse.assigned_tasks:  # Update this line to match the attribute name
-                    # Get the highest priority task
-                    sorted_tasks = sorted(nurse.assigned_tasks, key=lambda x: x.priority)
-                    highest_priority_task = sorted_tasks[0]
-
-                    # Mark the task as completed
-                    highest_priority_task.mark_completed()
+                if nurse.assigned_tasks:
+                    highest_priority_task = nurse.next_task()
 
                     # Update the completion status in the database
                     sql_update = "UPDATE tasks SET is_completed = ? WHERE task_id = ?"
                     values = (1, highest_priority_task.task_id)  # Marking as completed (1)
-                    db_controller.update_record(sql_update, values)
-
-                    # Remove the task from the nurse's list of assigned tasks
-                    nurse.assigned_tasks.remove(highest_priority_task)  # Update this line
+                    with db_controller.connect() as cursor:
+                        cursor.execute(sql_update, values)
+                        updated = cursor.rowcount
+                    if not updated:
+                        logger.error("Task %s is not stored in the database.", highest_priority_task.description)
+                        return False
 
-                    logger.info(f"Task performed and marked as completed: {highest_priority_task.description}")
+                    # The queue follows only once the completion is committed
+                    nurse.perform_duty()
+                    logger.info("Task performed and marked as completed: %s", highest_priority_task.description)
                     return True
                 else:
                     logger.info("No tasks assigned to the nurse.")
                     return False
             except Exception as e:
-                logger.error(f"Error performing task: {e}")
+                logger.error("Error performing task: %s", e)
                 return False
 
+        @staticmethod
+        def reprioritise_task(nurse, task, priority):
+            if not isinstance(priority, int) or priority < 0:
+                logger.warning("Task priority must be a non-negative integer.")
+                return False
+            try:
+                if task not in nurse.assigned_tasks:
+                    logger.warning("Task is not assigned to Nurse %s", nurse.full_name)
+                    return False
+
+                sql_update = "UPDATE tasks SET priority = ? WHERE task_id = ?"
+                with db_controller.connect() as cursor:
+                    cursor.execute(sql_update, (priority, task.task_id))
+                    updated = cursor.rowcount
+                if not updated:
+                    logger.error("Task %s is not stored in the database.", task.description)
+                    return False
+
+                nurse.reprioritise_task(task, priority)
+                logger.info("Task reprioritised to %s: %s", priority, task.description)
+                return True
+            except Exception as e:
+                logger.error("Error reprioritising task: %s", e)
+                return False
+
+        @staticmethod
+        def sync_tasks(nurse, batch_size=500):
+            """
+                Drop tasks from the nurse's queue that are already completed in the tasks table.
+
+                Args:
+                    nurse (Nurse): The nurse whose queue is checked.
+                    batch_size (int): Task IDs checked per query.
+
+                Returns:
+                    int or None: Number of tasks dropped, or None if the check failed.
+                """
+            try:
+                queued = {task.task_id: task for task in nurse.assigned_tasks if task.task_id is not None}
+                task_ids = list(queued)
+                dropped = 0
+                for start in range(0, len(task_ids), batch_size):
+                    chunk = task_ids[start:start + batch_size]
+                    placeholders = ', '.join('?' * len(chunk))
+                    sql_query = f"SELECT task_id FROM tasks WHERE is_completed = 1 AND task_id IN ({placeholders})"
+                    for (task_id,) in db_controller.query(sql_query, chunk) or []:
+                        task = queued[task_id]
+                        task.mark_completed()
+                        nurse.drop_task(task)
+                        dropped += 1
+                logger.debug("Dropped %s completed tasks from Nurse %s", dropped, nurse.full_name)
+                return dropped
+            except Exception as e:
+                logger.error("Error syncing tasks: %s", e)
+                return None
+
         @staticmethod
         def add_shift(nurse, shift):
             try:
@@ -138,12 +233,12 @@ class NurseController:
 
                 if shift_id:
                     nurse.add_shift(shift)
-                    logger.info(f"Shift added successfully with ID: {shift_id}")
+                    logger.info("Shift added successfully with ID: %s", shift_id)
                     return True
                 else:
                     logger.error("Failed to add shift to the database.")
                     return False
             except Exception as e:
-                logger.error(f"Error adding shift: {e}")
+                logger.error("Error adding shift: %s", e)
                 return False
 
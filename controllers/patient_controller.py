@@ -1,35 +1,42 @@
 # patient_controller.py
+import json
+import sqlite3
 from models.inpatient_model import InPatient
 from models.outpatient_model import OutPatient
 from models.payment_method import Card
-from log_config import setup_logging
+from log_config import get_logger
 from datetime import datetime
 
 from controllers.database_controller import DatabaseController
+from controllers.statement_registry import patient_table
+from controllers.room_allocator import FREE_BEDS_SQL
+from controllers.doctor_schedule import to_db_datetime
 
-logger = setup_logging()
+logger = get_logger()
 
 
 class PatientController:
     @staticmethod
     def add_patient(db_controller, patient):
+        # Cheap after the first call: the schema is verified once per process
         db_controller.initialize_database()
         try:
-            # Check if the patient already exists in the database
-            sql_query = "SELECT id FROM patients WHERE full_name = ?"
-            existing_patient = db_controller.query(sql_query, (patient.full_name,))
-            if existing_patient:
-                logger.warning(f"Patient already exists in the database: {patient.full_name}")
-                return False
-
+            # Duplicate names are rejected by the UNIQUE constraint on full_name, so no lookup is needed.
             # Prepare the values, ensuring all are in a compatible format
             condition_value = patient.display_condition()
             admission_value = patient.display_admission_status()
             unique_identifier = patient.generate_unique_identifier()
+            bed = None
             if isinstance(patient, InPatient):
                 if not PatientController.add_room(db_controller, patient.room):
                     logger.error("Failed to add or update room for the patient.")
                     return False
+                # Discharged inpatients keep their room on record but do not take a bed, as in add_patients_bulk
+                if admission_value != 'Discharged':
+                    bed = db_controller.room_allocator.occupy(patient.room.room_number)
+                    if bed is None:
+                        logger.error("Room %s has no free bed.", patient.room.room_number)
+                        return False
 
                 sql_insert = """
                         INSERT INTO inpatients (
@@ -61,17 +68,176 @@ class PatientController:
                 return False
 
             # Execute the insertion
-            if db_controller.insert_record(sql_insert, values):
-                logger.info(f"New patient added successfully: {patient.full_name}")
+            inserted = db_controller.insert_record(sql_insert, values)
+            db_controller.patient_directory.invalidate(patient.full_name)
+            if not inserted and bed is not None:
+                db_controller.room_allocator.release(patient.room.room_number, bed)
+            if inserted:
+                db_controller.identity_map.attach(patient, patient_table(patient), inserted,
+                                                  {'unique_identifier': unique_identifier}, clean=True)
+                room_number, room_type = (patient.room.room_number, patient.room.room_type) \
+                    if isinstance(patient, InPatient) else (None, None)
+                db_controller.census.record(patient_table(patient), inserted, condition_value, admission_value,
+                                            patient.insurance, room_number, room_type)
+                logger.info("New patient added successfully: %s", patient.full_name)
                 return True
             else:
                 logger.error("Failed to add the patient to the database.")
                 return False
 
         except Exception as e:
-            logger.error(f"Error adding patient: {e}")
+            logger.error("Error adding patient: %s", e)
             return False
 
+    @staticmethod
+    def add_patients_bulk(db_controller, patients, batch_size=500):
+        """
+            Add many patients at once, inserting them with executemany inside a single transaction.
+
+            Rooms used by the inpatients are upserted in one pass before the patients are inserted.
+            Patients whose name or identifier already exists, in the database or earlier in the
+            same call, are skipped instead of aborting the whole load. Each inpatient who is not
+            discharged takes a bed in their room, in input order; those who find their room full
+            are skipped, as add_patient() would refuse them.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                patients (iterable): InPatient and OutPatient objects to add.
+                batch_size (int): Rows per executemany call and per duplicate-check query.
+
+            Returns:
+                list: One outcome per patient, in input order: 'inserted', 'duplicate', 'no_bed', 'invalid'
+                or 'failed'.
+            """
+        patients = list(patients)
+        outcomes = ['invalid'] * len(patients)
+        if not isinstance(batch_size, int) or batch_size < 1:
+            logger.error("Batch size must be a positive integer.")
+            return outcomes
+        db_controller.initialize_database()
+
+        # Split the input by table and build the rows up front
+        rows = {'inpatients': [], 'outpatients': []}
+        for index, patient in enumerate(patients):
+            try:
+                table = patient_table(patient)
+                if table is None:
+                    logger.warning("Skipping invalid patient object at position %s.", index)
+                    continue
+                extra = (patient.room.room_number,) if table == 'inpatients' else ()
+                values = (
+                    patient.generate_unique_identifier(), patient.full_name, patient.age, patient.gender,
+                    patient.contact_info, patient.personal_number, patient.insurance,
+                    patient.display_condition()
+                ) + extra + (patient.display_admission_status(),)
+                rows[table].append((index, values))
+            except Exception as e:
+                logger.warning("Skipping patient at position %s: %s", index, e)
+
+        sql_inserts = {
+            'inpatients': """
+                    INSERT INTO inpatients (
+                        unique_identifier, full_name, age, gender, contact_info, personal_number,
+                        insurance, condition, room_number, admission_status
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+            'outpatients': """
+                    INSERT INTO outpatients (
+                        unique_identifier, full_name, age, gender, contact_info, personal_number,
+                        insurance, condition, admission_status
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+        }
+        sql_upsert_room = """
+                INSERT INTO rooms (room_number, room_type, daily_rate, capacity)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(room_number) DO UPDATE SET
+                    room_type = excluded.room_type, daily_rate = excluded.daily_rate, capacity = excluded.capacity
+            """
+
+        inserted = []
+        rooms = {}
+        try:
+            with db_controller.connect(True) as cursor:
+                for table, table_rows in rows.items():
+                    # Collect the names and identifiers that already exist, one chunk at a time
+                    existing_names, existing_identifiers = set(), set()
+                    for start in range(0, len(table_rows), batch_size):
+                        chunk = table_rows[start:start + batch_size]
+                        cursor.execute(
+                            db_controller.statements.get('existing_patients', table),
+                            (json.dumps([values[1] for _, values in chunk]),
+                             json.dumps([values[0] for _, values in chunk]))
+                        )
+                        for full_name, unique_identifier in cursor.fetchall():
+                            existing_names.add(full_name)
+                            existing_identifiers.add(unique_identifier)
+
+                    accepted = []
+                    for index, values in table_rows:
+                        if values[1] in existing_names or values[0] in existing_identifiers:
+                            outcomes[index] = 'duplicate'
+                            continue
+                        existing_names.add(values[1])
+                        existing_identifiers.add(values[0])
+                        accepted.append((index, values))
+
+                    if table == 'inpatients' and accepted:
+                        for index, _ in accepted:
+                            room = patients[index].room
+                            rooms[room.room_number] = (room.room_number, room.room_type, room.daily_rate, room.capacity)
+                        cursor.executemany(sql_upsert_room, list(rooms.values()))
+                        accepted = PatientController._take_beds(cursor, accepted, rooms, outcomes)
+
+                    for start in range(0, len(accepted), batch_size):
+                        chunk = accepted[start:start + batch_size]
+                        cursor.executemany(sql_inserts[table], [values for _, values in chunk])
+                        inserted.extend(index for index, _ in chunk)
+
+                if rooms:
+                    # Recount the beds once for the whole load instead of per patient
+                    for sql, params in db_controller.room_allocator.sync_operations(rooms):
+                        cursor.execute(sql, params)
+
+            for index in inserted:
+                outcomes[index] = 'inserted'
+            db_controller.patient_directory.invalidate(*(patients[index].full_name for index in inserted))
+            if inserted:
+                # executemany does not return the new IDs, so the census is read again on its next use
+                db_controller.census.invalidate()
+            if rooms:
+                db_controller.room_allocator.refresh(rooms)
+            logger.info("Bulk patient load finished: %s of %s patients inserted.", len(inserted), len(patients))
+        except Exception as e:
+            # The transaction was rolled back, so nothing from this call was stored
+            for index in inserted:
+                outcomes[index] = 'failed'
+            for table_rows in rows.values():
+                for index, _ in table_rows:
+                    if outcomes[index] == 'invalid':
+                        outcomes[index] = 'failed'
+            logger.error("Bulk patient load failed, no patients were added: %s", e)
+        return outcomes
+
+    @staticmethod
+    def _take_beds(cursor, accepted, rooms, outcomes):
+        # Hand out the free beds of each room in input order; discharged inpatients need none
+        cursor.execute(FREE_BEDS_SQL, (json.dumps(sorted(rooms)),))
+        free_beds = dict(cursor.fetchall())
+        fitting = []
+        for index, values in accepted:
+            room_number, admission_status = values[-2:]
+            if admission_status != 'Discharged':
+                if free_beds.get(room_number, 0) < 1:
+                    outcomes[index] = 'no_bed'
+                    logger.warning("Room %s has no free bed for %s.", room_number, values[1])
+                    continue
+                free_beds[room_number] -= 1
+            fitting.append((index, values))
+        return fitting
+
     @staticmethod
     def find_patient_id_by_name(db_controller, full_name):
         """
@@ -85,26 +251,168 @@ class PatientController:
                 int or None: The patient's ID if found, otherwise None.
             """
         try:
-            # First, try to find the patient in the inpatients table
-            inpatient_sql = "SELECT id FROM inpatients WHERE full_name = ?"
-            with db_controller.connect() as cursor:
-                cursor.execute(inpatient_sql, (full_name,))
-                result = cursor.fetchone()
-                if result:
-                    return result[0]  # Return the ID
+            # One indexed lookup over both tables, served from the directory cache when possible; a cached
+            # entry is only dropped once a write through it fails
+            entry = db_controller.patient_directory.lookup(full_name)
+            if entry:
+                return entry[1]  # Return the ID
+        except Exception as e:
+            logger.error("Failed to find patient ID for %s: %s", full_name, e)
 
-            # If not found, try the outpatients table
-            outpatient_sql = "SELECT id FROM outpatients WHERE full_name = ?"
-            with db_controller.connect() as cursor:
-                cursor.execute(outpatient_sql, (full_name,))
-                result = cursor.fetchone()
-                if result:
-                    return result[0]  # Return the ID
+        return None  # Return None if no patient is found
+
+    @staticmethod
+    def find_patient_record(db_controller, patient):
+        """
+            Resolve a patient object to its database record.
 
+            Patients already attached to the identity map are resolved without a query; others are
+            looked up by name through the patient directory and attached. Neither cache is checked
+            against the database here; see _write_record() for how stale records are dropped.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                patient (InPatient or OutPatient): The patient to look up.
+
+            Returns:
+                tuple or None: (table, id, unique_identifier) if found, otherwise None.
+            """
+        table = patient_table(patient)
+        if table is None:
+            logger.error("Invalid patient type provided.")
+            return None
+        try:
+            identity = db_controller.identity_map.identify(patient)
+            if identity is not None:
+                unique_identifier = db_controller.identity_map.stored_value(patient, 'unique_identifier')
+                if unique_identifier is not None:
+                    return identity + (unique_identifier,)
+            record = db_controller.patient_directory.lookup(patient.full_name, table)
+            if record:
+                db_controller.identity_map.attach(patient, table, record[1], {'unique_identifier': record[2]})
+            return record
         except Exception as e:
-            logger.error(f"Failed to find patient ID for {full_name}: {e}")
+            logger.error("Failed to find record for patient %s: %s", patient.full_name, e)
+            return None
 
-        return None  # Return None if no patient is found
+    @staticmethod
+    def find_patient_id(db_controller, patient):
+        """Return the ID of the patient's record, or None if the patient is not in the database."""
+        record = PatientController.find_patient_record(db_controller, patient)
+        return record[1] if record else None
+
+    @staticmethod
+    def forget_patient(db_controller, patient):
+        """Drop a patient from the identity map and the patient directory, e.g. after a write found no record."""
+        db_controller.identity_map.detach(patient)
+        db_controller.patient_directory.invalidate(patient.full_name)
+
+    @staticmethod
+    def _write_record(db_controller, patient, write):
+        """
+            Find the patient's record and run write(table, patient_id) against it.
+
+            The identity map and the patient directory trust their entries, so a record deleted or
+            re-inserted through another controller only shows when a write through it finds no row.
+            A falsy result drops the patient from both caches and looks them up again; if that finds
+            a different record, the write is retried once against it.
+
+            Returns:
+                tuple: (record, result), where record is None if the patient is not in the database.
+            """
+        record = PatientController.find_patient_record(db_controller, patient)
+        if record is None:
+            return None, None
+        result = write(record[0], record[1])
+        if result:
+            return record, result
+        PatientController.forget_patient(db_controller, patient)
+        fresh = PatientController.find_patient_record(db_controller, patient)
+        if fresh is None or fresh[:2] == record[:2]:
+            return fresh, result
+        return fresh, write(fresh[0], fresh[1])
+
+    @staticmethod
+    def save_patient(db_controller, patient):
+        """
+            Write the patient's changed fields to their record, updating only the columns that changed.
+
+            Room and admission status changes go through the room and admission operations instead.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                patient (InPatient or OutPatient): The patient to save.
+
+            Returns:
+                bool: True if the record is up to date, False if the patient is not found or the update failed.
+            """
+        if PatientController.find_patient_record(db_controller, patient) is None:
+            logger.error("No existing record for patient %s in the database.", patient.full_name)
+            return False
+        try:
+            old_name = db_controller.identity_map.stored_value(patient, 'full_name')
+            try:
+                changes = db_controller.identity_map.save(patient)
+            except KeyError:
+                # save() detached the patient because their row is gone; they may have been re-inserted elsewhere
+                PatientController.forget_patient(db_controller, patient)
+                if PatientController.find_patient_record(db_controller, patient) is None:
+                    logger.error("No existing record for patient %s in the database.", patient.full_name)
+                    return False
+                old_name = None
+                changes = db_controller.identity_map.save(patient)
+            census_changes = {column: changes[column] for column in ('condition', 'insurance') if column in changes}
+            if census_changes:
+                table, patient_id = db_controller.identity_map.identify(patient)
+                db_controller.census.update(table, patient_id, **census_changes)
+            if 'full_name' in changes:
+                if old_name is None:
+                    db_controller.patient_directory.clear()
+                else:
+                    db_controller.patient_directory.invalidate(old_name, patient.full_name)
+            logger.info("Patient %s saved, %s columns updated.", patient.full_name, len(changes))
+            return True
+        except Exception as e:
+            logger.error("Error saving patient: %s", e)
+            return False
+
+    @staticmethod
+    def rename_patient(db_controller, patient, new_name):
+        """
+            Change a patient's full name in the database and on the patient object.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                patient (InPatient or OutPatient): The patient to rename.
+                new_name (str): The new full name.
+
+            Returns:
+                bool: True if the patient was renamed, False otherwise.
+            """
+        if not isinstance(new_name, str):
+            logger.warning("Patient name must be a string.")
+            return False
+
+        def rename(table, patient_id):
+            with db_controller.connect() as cursor:
+                cursor.execute(db_controller.statements.get('rename', table), (new_name, patient_id))
+                return cursor.rowcount
+
+        old_name = patient.full_name
+        try:
+            record, renamed = PatientController._write_record(db_controller, patient, rename)
+            if not renamed:
+                logger.error("No existing record for patient %s in the database.", patient.full_name)
+                return False
+            patient.full_name = new_name
+            db_controller.identity_map.mark_clean(patient, 'full_name')
+            logger.info("Patient %s renamed to %s.", old_name, new_name)
+            return True
+        except Exception as e:
+            logger.error("Error renaming patient: %s", e)
+            return False
+        finally:
+            db_controller.patient_directory.invalidate(old_name, new_name)
 
     @staticmethod
     def remove_patient(db_controller, patient):
@@ -119,106 +427,161 @@ class PatientController:
             Returns:
                 bool: True if the patient was successfully removed, False otherwise.
             """
-        try:
+        def remove(table, patient_id):
             # Begin transaction
             with db_controller.connect(True) as cursor:
+                cursor.execute(db_controller.statements.get('admission_status', table), (patient_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                # The bed is still taken unless the stored record was already discharged
+                holds_bed = table == 'inpatients' and row[0] != 'Discharged'
+
                 # Discharge the patient if not already discharged
                 if patient.admission_status != 'Discharged':
-                    patient.discharge()  # This method should update the object's admission_status to 'Discharged'
-                    update_status_sql = f"UPDATE {type(patient).__name__.lower()}s SET admission_status = 'Discharged' WHERE id = ?"
-                    cursor.execute(update_status_sql, (PatientController.find_patient_id_by_name(db_controller, patient.full_name),))
-
-                # If the patient is an inpatient, update room occupancy
-                if isinstance(patient, InPatient):
-                    update_room_sql = "UPDATE rooms SET is_occupied = 0 WHERE room_number = ?"
-                    cursor.execute(update_room_sql, (patient.room.room_number,))
+                    cursor.execute(db_controller.statements.get('discharge', table), (patient_id,))
 
                 # Delete the patient record
-                delete_sql = f"DELETE FROM {type(patient).__name__.lower()}s WHERE id = ?"
-                cursor.execute(delete_sql, (PatientController.find_patient_id_by_name(db_controller, patient.full_name),))
+                cursor.execute(db_controller.statements.get('delete', table), (patient_id,))
+            return {'holds_bed': holds_bed}
 
-            logger.info(f"Patient removed successfully: {patient.full_name} (ID: {PatientController.find_patient_id_by_name(db_controller, patient.full_name)})")
+        try:
+            record, removed = PatientController._write_record(db_controller, patient, remove)
+            if not removed:
+                logger.error("No existing record for patient %s in the database.", patient.full_name)
+                return False
+            table, patient_id, _ = record
+            holds_bed = removed['holds_bed']
+            if patient.admission_status != 'Discharged':
+                patient.discharge()  # This method should update the object's admission_status to 'Discharged'
+            db_controller.identity_map.detach(patient)
+            db_controller.census.remove(table, patient_id)
+
+            # Free the bed once the removal is committed
+            if holds_bed and isinstance(patient, InPatient):
+                db_controller.room_allocator.release(patient.room.room_number)
+
+            logger.info("Patient removed successfully: %s (ID: %s)", patient.full_name, patient_id)
             return True
 
         except Exception as e:
-            logger.error(f"Error removing patient: {e}")
+            logger.error("Error removing patient: %s", e)
             return False
+        finally:
+            db_controller.patient_directory.invalidate(patient.full_name)
 
     @staticmethod
     def add_room(db_controller, room):
         try:
-            # Check if the room already exists
-            sql_check_room = "SELECT COUNT(*) FROM rooms WHERE room_number = ?"
-            result = db_controller.query(sql_check_room, (room.room_number,))
-            room_exists = result[0][0] > 0
-
-            if room_exists:
-                # Room already exists, update it
-                sql_update_room = """
-                        UPDATE rooms 
-                        SET room_type = ?, daily_rate = ?, capacity = ?, is_occupied = ? 
-                        WHERE room_number = ?
-                    """
-                values = (
-                    room.room_type, room.daily_rate, room.capacity, 1 if room.is_occupied else 0, room.room_number)
-                db_controller.update_record(sql_update_room, values)
-            else:
-                # Room doesn't exist, insert it
-                sql_insert_room = """
-                        INSERT INTO rooms (room_number, room_type, daily_rate, capacity, is_occupied)
-                        VALUES (?, ?, ?, ?, ?)
-                    """
-                values = (
-                    room.room_number, room.room_type, room.daily_rate, room.capacity, 1 if room.is_occupied else 0)
-                db_controller.insert_record(sql_insert_room, values)
+            # Insert the room, or update it in place if the room number already exists
+            # Bed occupancy is owned by the room allocator and is left untouched here
+            sql_upsert_room = """
+                    INSERT INTO rooms (room_number, room_type, daily_rate, capacity)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(room_number) DO UPDATE SET
+                        room_type = excluded.room_type, daily_rate = excluded.daily_rate, capacity = excluded.capacity
+                """
+            values = (room.room_number, room.room_type, room.daily_rate, room.capacity)
+            with db_controller.connect() as cursor:
+                cursor.execute(sql_upsert_room, values)
+            db_controller.room_allocator.register(room.room_number, room.room_type, room.capacity)
+            db_controller.census.room_changed(room.room_number, room.room_type)
 
             logger.debug("Room added or updated successfully.")
             return True
         except Exception as e:
-            logger.error(f"Error adding or updating room: {e}")
+            logger.error("Error adding or updating room: %s", e)
             return False
 
     @staticmethod
     def update_room_occupancy(db_controller, room_number, is_occupied):
+        """
+            Take a bed in the room if is_occupied is true, otherwise free one.
+
+            Returns:
+                bool: True if a bed was taken or freed, False if the room is full, empty or unknown.
+            """
         try:
-            # Define the SQL UPDATE statement for rooms
-            sql_update = """
-                    UPDATE rooms
-                    SET is_occupied = ?
-                    WHERE room_number = ?
-                """
+            allocator = db_controller.room_allocator
+            if is_occupied:
+                updated = allocator.occupy(room_number) is not None
+            else:
+                updated = allocator.release(room_number)
+            if updated:
+                logger.debug("Room occupancy updated successfully.")
+            else:
+                logger.warning("Room %s occupancy was not changed.", room_number)
+            return updated
+        except Exception as e:
+            # Handle any exceptions that may occur
+            logger.error("Error updating room occupancy: %s", e)
+            return False
 
-            # Execute the SQL UPDATE statement using db_controller
-            db_controller.update_record(sql_update, (is_occupied, room_number))
+    @staticmethod
+    def allocate_bed(db_controller, room_type):
+        """
+            Take a free bed in any room of the given type.
 
-            logger.debug("Room occupancy updated successfully.")
-            return True
+            The allocation is transient: occupancy is rebuilt from the inpatients table on load(), so a bed
+            taken here without a matching inpatient row is freed again by the next load. To keep a bed,
+            store the inpatient through add_patient() or add_patients_bulk() instead.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                room_type (str): One of Room.RoomType: 'Single', 'Double' or 'ICU'.
+
+            Returns:
+                tuple or None: (room_number, bed) of the bed taken, or None if no bed of that type is free.
+            """
+        try:
+            allocation = db_controller.room_allocator.allocate(room_type)
+            if allocation is None:
+                logger.warning("No free %s beds.", room_type)
+            return allocation
         except Exception as e:
-            # Handle any exceptions that may occur
-            logger.error(f"Error updating room occupancy: {e}")
+            logger.error("Error allocating a bed: %s", e)
+            return None
+
+    @staticmethod
+    def release_bed(db_controller, room_number, bed=None):
+        """Free a bed taken with allocate_bed(). Returns True if a bed was freed."""
+        try:
+            return db_controller.room_allocator.release(room_number, bed)
+        except Exception as e:
+            logger.error("Error releasing a bed: %s", e)
             return False
 
+    @staticmethod
+    def free_beds(db_controller, room_type=None):
+        """Return the free bed count of one room type, or a dict of counts keyed by room type."""
+        return db_controller.room_allocator.free_beds(room_type)
+
     @staticmethod
     def admit_patient(db_controller, patient):
-        try:
-            table = 'inpatients' if isinstance(patient, InPatient) else 'outpatients'
-            # Check if the patient exists in the database
-            sql_check_patient = f"SELECT id FROM {table} WHERE full_name = ?"
-            result = db_controller.query(sql_check_patient, (patient.full_name,))
-            if result:
-                patient_id = result[0][0]
-                patient.admit()  # Assumes that the admit method updates the patient object state
+        table = patient_table(patient)
+        if table is None:
+            logger.error("Invalid patient type provided.")
+            return False
 
-                # Update admission status in the database
-                sql_update = f"UPDATE {table} SET admission_status = 'Admitted' WHERE id = ?"
-                db_controller.update_record(sql_update, (patient_id,))
-                logger.info(f"{type(patient).__name__} {patient.full_name} has been admitted.")
-            else:
-                logger.error(f"{type(patient).__name__} does not exist in the database.")
+        def admit(table, patient_id):
+            # Update admission status in the database
+            with db_controller.connect() as cursor:
+                cursor.execute(db_controller.statements.get('admit', table), (patient_id,))
+                return cursor.rowcount
+
+        try:
+            record, admitted = PatientController._write_record(db_controller, patient, admit)
+            if not admitted:
+                logger.error("%s does not exist in the database.", type(patient).__name__)
                 return False
+
+            # The object and the census follow only once the admission is committed
+            patient.admit()
+            db_controller.census.update(table, record[1], admission_status='Admitted')
+            logger.info("%s %s has been admitted.", type(patient).__name__, patient.full_name)
             return True
         except Exception as e:
-            logger.error(f"Error updating admission status: {e}")
+            logger.error("Error updating admission status: %s", e)
             return False
 
     @staticmethod
@@ -239,11 +602,12 @@ class PatientController:
 
             # Execute the SQL DELETE statement using the db_controller
             db_controller.delete_record(sql_delete, (room_number,))
+            db_controller.room_allocator.unregister(room_number)
             logger.info("Room removed successfully.")
             return True
         except Exception as e:
             # Handle any exceptions that may occur
-            logger.error(f"Error removing room: {e}")
+            logger.error("Error removing room: %s", e)
             return False
 
     @staticmethod
@@ -260,43 +624,167 @@ class PatientController:
             """
         patient.discharge()  # This method should update the object's admission_status to 'Discharged'
 
-        # Define the basic SQL commands based on the patient type
-        if isinstance(patient, InPatient):
-            table_name = "inpatients"
-            additional_update = "UPDATE rooms SET is_occupied = 0 WHERE room_number = ?"
-            additional_params = (patient.room.room_number,)
-        elif isinstance(patient, OutPatient):
-            table_name = "outpatients"
-            additional_update = None
-            additional_params = None
-        else:
+        table_name = patient_table(patient)
+        if table_name is None:
             logger.error("Invalid patient type provided.")
             return False
 
+        def discharge(table, patient_id):
+            with db_controller.connect() as cursor:
+                cursor.execute(db_controller.statements.get('discharge', table), (patient_id,))
+                return cursor.rowcount
+
         try:
-            # Check if the patient exists in the database
-            sql_check_patient = f"SELECT id FROM {table_name} WHERE full_name = ?"
-            result = db_controller.query(sql_check_patient, (patient.full_name,))
+            # Find the patient's record and update their admission status; a patient who was already
+            # discharged updates no row, which looks like a stale record and costs one more lookup
+            result, discharged = PatientController._write_record(db_controller, patient, discharge)
             if result:
-                # Patient exists, update admission status in the database
-                patient_id = result[0][0]
-                sql_update = f"UPDATE {table_name} SET admission_status = 'Discharged' WHERE id = ?"
-                db_controller.update_record(sql_update, (patient_id,))
+                patient_id = result[1]
+                newly_discharged = discharged == 1
 
-                # If there's an additional action required (e.g., updating room status for inpatients)
-                if additional_update:
-                    db_controller.update_record(additional_update, additional_params)
+                db_controller.census.update(table_name, patient_id, admission_status='Discharged')
+                # Inpatients give their bed back, but only on the first discharge
+                if newly_discharged and table_name == "inpatients":
+                    db_controller.room_allocator.release(patient.room.room_number)
 
-                logger.info(f"Patient {patient.full_name} successfully discharged.")
+                logger.info("Patient %s successfully discharged.", patient.full_name)
                 return True
             else:
-                logger.error(f"No existing record for patient {patient.full_name} in the database.")
+                logger.error("No existing record for patient %s in the database.", patient.full_name)
                 return False
 
         except Exception as e:
-            logger.error(f"Error during the discharge process: {e}")
+            logger.error("Error during the discharge process: %s", e)
             return False
 
+    @staticmethod
+    def discharge_patients_bulk(db_controller, patients):
+        """
+            Discharge many patients in one transaction.
+
+            Records not already in the identity map are resolved with one directory query. The
+            admission statuses and the bed counts of the rooms involved are then updated in one
+            transaction, with the IDs passed as JSON arrays, so the number of statements does not
+            grow with the batch. If fewer rows were updated than IDs passed, some cached records were
+            stale; those patients are dropped from the caches and discharged one by one through
+            discharge_patient(), which looks them up again.
+
+            Args:
+                db_controller (DatabaseController): The controller handling database operations.
+                patients (iterable): InPatient and OutPatient objects to discharge.
+
+            Returns:
+                list: One outcome per patient, in input order: 'discharged', 'not_found', 'invalid' or 'failed'.
+            """
+        patients = list(patients)
+        outcomes = ['invalid'] * len(patients)
+        tables = {}
+        for index, patient in enumerate(patients):
+            table = patient_table(patient)
+            if table is None:
+                logger.warning("Skipping invalid patient object at position %s.", index)
+            else:
+                tables[index] = table
+
+        try:
+            # Attached patients are resolved by the identity map, the rest with one directory query
+            identities = {index: db_controller.identity_map.identify(patients[index]) for index in tables}
+            records = db_controller.patient_directory.lookup_many(
+                patients[index].full_name for index, identity in identities.items() if identity is None
+            )
+            ids = {'inpatients': set(), 'outpatients': set()}
+            rooms = set()
+            found = {}
+            for index, table in tables.items():
+                record = identities[index]
+                if record is None:
+                    record = next((entry for entry in records[patients[index].full_name] if entry[0] == table), None)
+                    if record is None:
+                        outcomes[index] = 'not_found'
+                        continue
+                    db_controller.identity_map.attach(patients[index], table, record[1],
+                                                      {'unique_identifier': record[2]})
+                ids[table].add(record[1])
+                if table == 'inpatients':
+                    rooms.add(patients[index].room.room_number)
+                found[index] = (table, record[1])
+
+            existing = {table: table_ids for table, table_ids in ids.items() if table_ids}
+            try:
+                with db_controller.connect() as cursor:
+                    for table, table_ids in existing.items():
+                        id_list = (json.dumps(sorted(table_ids)),)
+                        cursor.execute(db_controller.statements.get('discharge_many', table), id_list)
+                        if cursor.rowcount < len(table_ids):
+                            cursor.execute(db_controller.statements.get('existing_ids', table), id_list)
+                            existing[table] = {row[0] for row in cursor.fetchall()}
+                    for sql, params in db_controller.room_allocator.sync_operations(rooms) if rooms else ():
+                        cursor.execute(sql, params)
+            except sqlite3.Error as e:
+                for index in found:
+                    outcomes[index] = 'failed'
+                logger.error("Bulk discharge failed, no patients were discharged: %s", e)
+                return outcomes
+
+            stale = []
+            for index, (table, patient_id) in found.items():
+                if patient_id not in existing.get(table, ()):
+                    stale.append(index)
+                    continue
+                patients[index].discharge()
+                outcomes[index] = 'discharged'
+                db_controller.census.update(table, patient_id, admission_status='Discharged')
+            if rooms:
+                db_controller.room_allocator.refresh(rooms)
+            for index in stale:
+                PatientController.forget_patient(db_controller, patients[index])
+                discharged = PatientController.discharge_patient(db_controller, patients[index])
+                outcomes[index] = 'discharged' if discharged else 'not_found'
+            logger.info("Bulk discharge finished: %s of %s patients discharged.", outcomes.count('discharged'),
+                        len(patients))
+        except Exception as e:
+            logger.error("Error during the bulk discharge: %s", e)
+            for index in tables:
+                if outcomes[index] not in ('discharged', 'not_found'):
+                    outcomes[index] = 'failed'
+        return outcomes
+
+    @staticmethod
+    def census_summary(db_controller, **filters):
+        """
+            Count the patients matching the filters by table, condition, admission status, insurance and room type.
+
+            Args:
+                db_controller (DatabaseController): The controller whose census is read.
+                **filters: Dimension values to match, e.g. condition='Critical' or room_type=['ICU', 'Double'].
+
+            Returns:
+                dict or None: Dimension to a dict of value to patient count, or None on error.
+            """
+        try:
+            return db_controller.census.summary(**filters)
+        except Exception as e:
+            logger.error("Error reading the census: %s", e)
+            return None
+
+    @staticmethod
+    def verify_census(db_controller):
+        """
+            Check the census against the patient tables and reload it if they differ.
+
+            Returns:
+                bool or None: True if the census matched the tables, False if it had to be reloaded,
+                None if the check failed.
+            """
+        try:
+            if not db_controller.census.verify():
+                return True
+            db_controller.census.load()
+            return False
+        except Exception as e:
+            logger.error("Error checking the census: %s", e)
+            return None
+
     @staticmethod
     def provide_treatment(patient, entry):
         if not isinstance(entry, str):
@@ -305,7 +793,7 @@ class PatientController:
 
         try:
             patient.provide_treatment_details(entry)
-            logger.debug(f"Treatment details added to patient record: {entry}")
+            logger.debug("Treatment details added to patient record: %s", entry)
             return True
         except AttributeError:
             # This error might occur if the patient object doesn't have the 'provide_treatment_details' method
@@ -313,7 +801,7 @@ class PatientController:
             return False
         except Exception as e:
             # Handle any other exceptions that could occur
-            logger.error(f"An error occurred while adding treatment details: {e}")
+            logger.error("An error occurred while adding treatment details: %s", e)
             return False
 
     @staticmethod
@@ -328,7 +816,7 @@ class PatientController:
             logger.debug("Card added successfully to patient's profile.")
             return True
         except Exception as e:
-            logger.error(f"Failed to add card due to an error: {e}")
+            logger.error("Failed to add card due to an error: %s", e)
             return False
 
     @staticmethod
@@ -343,10 +831,10 @@ class PatientController:
 
         try:
             patient.balance += amount
-            logger.info(f"Deposited ${amount} | Current balance: ${patient.balance}")
+            logger.info("Deposited $%s | Current balance: $%s", amount, patient.balance)
             return True  # Indicate successful deposit
         except Exception as e:
-            logger.error(f"An error occurred while updating the balance: {e}")
+            logger.error("An error occurred while updating the balance: %s", e)
             return False  # Return False in case of an exception to indicate failure
 
     @staticmethod
@@ -357,40 +845,142 @@ class PatientController:
         try:
             # Assume patient.charge(amount) method exists and performs the charging operation
             patient.charge(amount)
-            logger.info(f"Patient {patient.full_name} charged successfully: ${amount}.")
+            logger.info("Patient %s charged successfully: $%s.", patient.full_name, amount)
             return True
         except AttributeError:
             # If the patient object does not have a charge method
-            logger.error(f"Patient object does not support charging. Attempted to charge ${amount}.")
+            logger.error("Patient object does not support charging. Attempted to charge $%s.", amount)
             return False
         except Exception as e:
             # General error handling for any other unexpected issues during the charge operation
-            logger.error(f"An error occurred while attempting to charge patient {patient.full_name}: {e}")
+            logger.error("An error occurred while attempting to charge patient %s: %s", patient.full_name, e)
             return False
 
     @staticmethod
     def add_medical_history(db_controller, patient, entry):
         try:
-            # Check if the patient exists in the database
-            patient_id = PatientController.find_patient_id_by_name(db_controller, patient.full_name)
-            if not patient_id:
+            current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            # Insert the medical history entry into the database; inpatient and outpatient IDs overlap,
+            # so the entry records the patient's table too
+            def insert(table, patient_id):
+                return db_controller.insert_record(db_controller.statements.get('add_history', table),
+                                                   (patient_id, entry, current_datetime))
+
+            record, history_id = PatientController._write_record(db_controller, patient, insert)
+            if not history_id:
                 logger.error("Patient not found in the database.")
                 return False
 
             # Add the medical history entry to the patient's local medical history
             patient.add_medical_history(entry)
 
-            # Insert the medical history entry into the database
-            sql_insert = """
-                    INSERT INTO medical_history (patient_id, entry, date_added)
-                    VALUES (?, ?, ?)
-                    """
-            current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            db_controller.insert_record(sql_insert, (patient_id, entry, current_datetime))
-
             logger.info("Medical history entry added successfully.")
             return True
         except Exception as e:
-            logger.error(f"Error adding medical history entry: {e}")
+            logger.error("Error adding medical history entry: %s", e)
             return False
 
+    @staticmethod
+    def get_medical_history(db_controller, patient, limit=None):
+        """
+            Read a patient's medical history entries, oldest first.
+
+            Entries recorded before migration 10 whose patient ID exists in both patient tables
+            have no patient table and are not returned for either patient.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                patient (Patient): The patient whose history is read.
+                limit (int, optional): Return only the most recent limit entries.
+
+            Returns:
+                list or None: (entry, date_added) tuples, or None if the patient is not found or the query failed.
+            """
+        try:
+            record = PatientController.find_patient_record(db_controller, patient)
+            if not record:
+                logger.error("Patient not found in the database.")
+                return None
+            table, patient_id, _ = record
+
+            if limit is None:
+                sql_select = """
+                    SELECT entry, date_added FROM medical_history WHERE patient_id = ? AND patient_table = ?
+                    ORDER BY date_added, id
+                """
+                return db_controller.query(sql_select, (patient_id, table))
+            sql_select = """
+                    SELECT entry, date_added FROM medical_history WHERE patient_id = ? AND patient_table = ?
+                    ORDER BY date_added DESC, id DESC LIMIT ?
+                """
+            rows = db_controller.query(sql_select, (patient_id, table, limit))
+            return None if rows is None else rows[::-1]
+        except Exception as e:
+            logger.error("Error reading medical history: %s", e)
+            return None
+
+    @staticmethod
+    def search_medical_history(db_controller, query, limit=20, since=None, until=None, order='rank', raw=False):
+        """
+            Full-text search over every patient's medical history entries, best matches first.
+
+            The words of query must all appear in an entry, in any order and with stemming, so
+            'penicillin allergies' matches 'No known penicillin allergy'. Pass raw=True to use
+            FTS5 query syntax (phrases, OR, NOT, prefix*) instead.
+
+            Ranking scores every matching entry, which takes a while for words found in hundreds of
+            thousands of entries; order='recent' returns the most recently recorded matches instead
+            and stops after limit of them.
+
+            Args:
+                db_controller (DatabaseController): The controller managing database operations.
+                query (str): The words to search for.
+                limit (int): Maximum number of entries returned.
+                since (datetime, optional): Only entries added at or after this time.
+                until (datetime, optional): Only entries added before this time.
+                order (str): 'rank' for best matches first or 'recent' for the newest entries first.
+                raw (bool): Pass query to FTS5 unchanged.
+
+            Returns:
+                list or None: (history_id, patient_table, patient_id, date_added, snippet, rank) tuples,
+                where patient_table and patient_id identify the patient's record, snippet marks the
+                matched words with [ ] and a lower rank is a better match; None on error. Entries
+                recorded before migration 10 may have a patient_table of None.
+            """
+        if order not in ('rank', 'recent'):
+            logger.error("Unknown search order: %s", order)
+            return None
+        db_controller.initialize_database()
+        if raw:
+            match = query
+        else:
+            # Quote every word so punctuation in clinical notes is never read as query syntax
+            match = ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+        if not match:
+            return []
+        filters, params = '', [match]
+        if since is not None:
+            filters += " AND history.date_added >= ?"
+            params.append(to_db_datetime(since))
+        if until is not None:
+            filters += " AND history.date_added < ?"
+            params.append(to_db_datetime(until))
+        order_by = "bm25(medical_history_fts), history.id" if order == 'rank' else "medical_history_fts.rowid DESC"
+        sql_search = f"""
+                SELECT history.id, history.patient_table, history.patient_id, history.date_added,
+                       snippet(medical_history_fts, 0, '[', ']', '...', 12), bm25(medical_history_fts)
+                FROM medical_history_fts JOIN medical_history AS history ON history.id = medical_history_fts.rowid
+                WHERE medical_history_fts MATCH ?{filters}
+                ORDER BY {order_by}
+                LIMIT ?
+            """
+        try:
+            with db_controller.connect() as cursor:
+                cursor.execute(sql_search, params + [limit])
+                results = cursor.fetchall()
+            logger.debug("Medical history search returned %s entries.", len(results))
+            return results
+        except Exception as e:
+            logger.error("Error searching medical history: %s", e)
+            return None
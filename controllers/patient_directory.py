@@ -0,0 +1,156 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+class PatientDirectory:
+    """
+        Resolves a patient's name to the table, ID and unique identifier of their record.
+
+        Lookups go through the patient_directory view, which unions inpatients and outpatients
+        so that one indexed query searches both tables. Names that were found are kept in an
+        in-process LRU cache; the controllers invalidate a name whenever they insert, delete or
+        rename that patient. Misses are never cached, so a patient added through another controller
+        or process is found on the next lookup.
+
+        Hits are not checked against the database. The directory shares its staleness policy with
+        the identity map: a patient removed or re-inserted through another controller or process
+        stays cached until a write through the cached ID finds no row, and the controller then
+        drops the name from both (see PatientController.forget_patient). A patient renamed
+        elsewhere is still found under the old name until it is evicted; writes through that entry
+        reach the right row, since the ID did not change.
+
+        Args:
+            db_controller (DatabaseController): The controller used to run lookups.
+            capacity (int): Maximum number of names kept in the cache.
+        """
+
+    def __init__(self, db_controller, capacity=4096):
+        self._db_controller = db_controller
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, full_name, table=None):
+        """
+            Find a patient's directory entry by full name.
+
+            Args:
+                full_name (str): The full name of the patient.
+                table (str, optional): Restrict the match to 'inpatients' or 'outpatients'.
+
+            Returns:
+                tuple or None: (table, id, unique_identifier), inpatients first, or None if not found.
+            """
+        matches = self._matches(full_name)
+        for entry in matches:
+            if table is None or entry[0] == table:
+                return entry
+        return None
+
+    def lookup_many(self, full_names):
+        """
+            Find the directory entries of many patients, querying all uncached names at once.
+
+            The names are passed as a single JSON array parameter, so the lookup is one query
+            however many names are uncached.
+
+            Args:
+                full_names (iterable): Full names of the patients.
+
+            Returns:
+                dict: Maps each name to a tuple of (table, id, unique_identifier) matches, inpatients
+                first; names without a record map to an empty tuple.
+            """
+        results = {}
+        with self._lock:
+            for full_name in full_names:
+                matches = self._entries.get(full_name)
+                if matches is None:
+                    results[full_name] = None
+                    self._misses += 1
+                else:
+                    self._entries.move_to_end(full_name)
+                    results[full_name] = matches
+                    self._hits += 1
+            generation = self._generation
+        missing = [full_name for full_name, matches in results.items() if matches is None]
+        if not missing:
+            return results
+
+        self._db_controller.initialize_database()
+        sql = """
+                SELECT full_name, patient_table, id, unique_identifier FROM patient_directory
+                WHERE full_name IN (SELECT value FROM json_each(?))
+                ORDER BY patient_table
+            """
+        rows = self._db_controller.query(sql, (json.dumps(missing),))
+        if rows is None:
+            # Query failed; report the names as not found without caching the misses
+            results.update((full_name, ()) for full_name in missing)
+            return results
+        found = {full_name: [] for full_name in missing}
+        for full_name, *entry in rows:
+            found[full_name].append(tuple(entry))
+
+        with self._lock:
+            cache = generation == self._generation and self._capacity > 0
+            for full_name, matches in found.items():
+                results[full_name] = tuple(matches)
+                if cache and matches:
+                    self._entries[full_name] = results[full_name]
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+        return results
+
+    def invalidate(self, *full_names):
+        """Drop cached entries for the given names."""
+        with self._lock:
+            self._generation += 1
+            for full_name in full_names:
+                self._entries.pop(full_name, None)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache hit and miss counters."""
+        with self._lock:
+            return {'size': len(self._entries), 'capacity': self._capacity, 'hits': self._hits, 'misses': self._misses}
+
+    def _matches(self, full_name):
+        with self._lock:
+            matches = self._entries.get(full_name)
+            if matches is not None:
+                self._entries.move_to_end(full_name)
+                self._hits += 1
+                return matches
+            self._misses += 1
+            generation = self._generation
+
+        # The view is created by a schema migration; this is a no-op once the schema was verified
+        self._db_controller.initialize_database()
+        sql = """
+                SELECT patient_table, id, unique_identifier FROM patient_directory
+                WHERE full_name = ?
+                ORDER BY patient_table
+            """
+        rows = self._db_controller.query(sql, (full_name,))
+        if rows is None:
+            # Query failed; do not cache the miss
+            return ()
+        matches = tuple(rows)
+
+        with self._lock:
+            # Only cache a found name, and only if no write invalidated the directory while we were querying
+            if matches and generation == self._generation and self._capacity > 0:
+                self._entries[full_name] = matches
+                if len(self._entries) > self._capacity:
+                    self._entries.popitem(last=False)
+        return matches
@@ -0,0 +1,240 @@
+import re
+from bisect import bisect_left
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from log_config import get_slow_query_logger
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last bucket is open-ended
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """
+        Reduce a statement to its shape so that executions differing only in literals group together.
+
+        Literals become '?', lists of placeholders become '(?, ...)', whitespace is collapsed and a
+        trailing semicolon is dropped.
+        """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('(?, ...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip().rstrip(';').strip()
+
+
+class StatementStats:
+    """Latency histogram and counters for one normalized statement."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.rows = 0
+        self.wait_ms = 0.0
+        self.slow = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms, rows, wait_ms, slow):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.min_ms = elapsed_ms if self.min_ms is None else min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.wait_ms += wait_ms
+        self.slow += slow
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Estimate a latency percentile from the histogram, as the upper bound of its bucket."""
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return 0.0
+
+    def as_dict(self):
+        return {
+            'sql': self.sql,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 4),
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 4),
+            'max_ms': round(self.max_ms, 4),
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'rows': self.rows,
+            'wait_ms': round(self.wait_ms, 4),
+            'slow': self.slow,
+            'histogram': dict(zip([f"<={bound}ms" for bound in BUCKET_BOUNDS_MS] + ['>2500ms'], self.buckets)),
+        }
+
+
+class QueryStats:
+    """
+        Collects per-statement timings from the controller's cursors.
+
+        Statements are grouped by their normalized text. Every execution adds its wall time (execute
+        plus fetches), its row count and the time spent waiting for a pooled connection to the
+        statement's histogram. Executions slower than slow_query_ms are also written to the slow-query
+        log with their normalized text only, so patient data in the parameters never reaches the log.
+
+        Args:
+            slow_query_ms (float, optional): Threshold for the slow-query log; None disables it.
+        """
+
+    def __init__(self, slow_query_ms=100.0):
+        self.slow_query_ms = slow_query_ms
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql, elapsed_ms, rows, wait_ms=0.0):
+        """Add one execution of sql to its statement's statistics."""
+        normalized = normalize_sql(sql)
+        slow = self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+        with self._lock:
+            statement = self._statements.get(normalized)
+            if statement is None:
+                statement = self._statements[normalized] = StatementStats(normalized)
+            statement.add(elapsed_ms, rows, wait_ms, slow)
+        if slow:
+            get_slow_query_logger().warning("%.3f ms | rows=%s | wait=%.3f ms | %s",
+                                            elapsed_ms, rows, wait_ms, normalized)
+
+    def top(self, n=10, by='total_ms'):
+        """
+            Return the n statements with the highest value of a statistic.
+
+            Args:
+                n (int): Number of statements to return.
+                by (str): 'total_ms', 'count', 'mean_ms', 'max_ms', 'rows' or 'wait_ms'.
+
+            Returns:
+                list: Statement statistics as dicts, highest first.
+            """
+        with self._lock:
+            statements = [statement.as_dict() for statement in self._statements.values()]
+        return sorted(statements, key=lambda statement: statement[by], reverse=True)[:n]
+
+    def report(self, n=10, by='total_ms'):
+        """Format top() as a plain-text table."""
+        lines = [f"{'total ms':>10} {'count':>7} {'mean ms':>9} {'p95 ms':>8} {'rows':>8} {'wait ms':>9}  statement"]
+        for statement in self.top(n, by):
+            lines.append(f"{statement['total_ms']:>10.2f} {statement['count']:>7} {statement['mean_ms']:>9.3f} "
+                         f"{statement['p95_ms']:>8} {statement['rows']:>8} {statement['wait_ms']:>9.2f}  "
+                         f"{statement['sql']}")
+        return '\n'.join(lines)
+
+    def get(self, sql):
+        """Return the statistics of one statement, given in raw or normalized form, or None."""
+        with self._lock:
+            statement = self._statements.get(normalize_sql(sql))
+            return statement.as_dict() if statement else None
+
+    def reset(self):
+        """Forget every recorded statement."""
+        with self._lock:
+            self._statements.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+        Cursor that reports every statement it runs to a QueryStats collector.
+
+        A statement's time covers execute() and every fetch of its rows; it is recorded when the
+        next statement starts or the cursor is closed. Rows are the rows fetched for queries and
+        the rows affected for other statements.
+        """
+
+    stats = None
+    wait_ms = 0.0
+    _pending = None
+    _note_statement = None
+
+    def bind(self, stats, wait_ms=0.0):
+        """Attach the collector and the connection wait charged to the cursor's first statement."""
+        self.stats = stats
+        self.wait_ms = wait_ms
+        # Pooled connections count how often their statement cache is hit
+        self._note_statement = getattr(self.connection, 'note_statement', None)
+        return self
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        if self._note_statement is not None:
+            self._note_statement(sql)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, time.perf_counter() - started, 0]
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        if self._note_statement is not None:
+            self._note_statement(sql)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, time.perf_counter() - started, 0]
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            raise
+        self._fetched(started, 1)
+        return row
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def _fetched(self, started, rows):
+        pending = self._pending
+        if pending is not None:
+            pending[1] += time.perf_counter() - started
+            pending[2] += rows
+
+    def _flush(self):
+        pending, self._pending = self._pending, None
+        if pending is None or self.stats is None:
+            return
+        sql, elapsed, rows = pending
+        if not rows and self.description is None and self.rowcount > 0:
+            # Not a query: count the rows the statement changed
+            rows = self.rowcount
+        self.stats.record(sql, elapsed * 1000, rows, self.wait_ms)
+        self.wait_ms = 0.0
@@ -0,0 +1,325 @@
+import json
+from datetime import timedelta
+from log_config import get_logger
+from controllers.doctor_schedule import from_db_datetime
+from controllers.statement_registry import PATIENT_TABLES
+from models.appointment_model import Appointment, AppointmentType
+from models.doctor_model import Doctor
+from models.hospital_employee_model import Department
+from models.inpatient_model import InPatient
+from models.nurse_model import Nurse
+from models.outpatient_model import OutPatient
+from models.patient_model import AdmissionStatus, Condition
+from models.room_model import Room
+from models.task_model import Task
+
+logger = get_logger()
+
+# Stored text back to enum members; the controllers store the display strings
+CONDITIONS = {condition.value: condition for condition in Condition}
+ADMISSION_STATUSES = {'Admitted': AdmissionStatus.ADMITTED, 'Discharged': AdmissionStatus.DISCHARGED,
+                      'Pending': AdmissionStatus.PENDING}
+DEPARTMENTS = {'Doctor': Department.DOCTOR, 'Nurse': Department.NURSE}
+
+PATIENT_COLUMNS = ("id, unique_identifier, full_name, age, gender, contact_info, personal_number, insurance, "
+                   "condition, admission_status")
+
+
+class RoomRepository:
+    """
+        Loads rooms, keeping one Room instance per room number.
+
+        Every inpatient loaded through the same repository shares the Room object of its room.
+        Reloading updates the existing instances in place.
+
+        Args:
+            db_controller (DatabaseController): The controller to read from.
+        """
+
+    def __init__(self, db_controller):
+        self._db_controller = db_controller
+        self.rooms = {}
+
+    def load_all(self):
+        """
+            Load every room in one query.
+
+            Returns:
+                dict: Room objects keyed by room number.
+
+            Raises:
+                sqlite3.Error: If the query fails.
+            """
+        with self._db_controller.connect() as cursor:
+            cursor.execute("SELECT room_number, room_type, daily_rate, is_occupied FROM rooms")
+            for row in cursor.fetchall():
+                self._hydrate(*row)
+        return dict(self.rooms)
+
+    def _hydrate(self, room_number, room_type, daily_rate, is_occupied):
+        room = self.rooms.get(room_number)
+        if room is None:
+            # Room derives its capacity from the room type, as the rooms table's CHECK does
+            room = self.rooms[room_number] = Room(room_number, room_type, daily_rate)
+        else:
+            room.room_type = room_type
+            room.daily_rate = daily_rate
+        room.is_occupied = bool(is_occupied)
+        return room
+
+
+class PatientRepository:
+    """
+        Loads InPatient and OutPatient objects from their tables.
+
+        Patients are loaded through the controller's identity map, so loading a row that is already
+        mapped returns the existing object instead of a copy. Inpatients share the Room instances of
+        the room repository.
+
+        Args:
+            db_controller (DatabaseController): The controller to read from.
+            rooms (RoomRepository, optional): Repository whose Room instances are shared.
+        """
+
+    def __init__(self, db_controller, rooms=None):
+        self._db_controller = db_controller
+        self.rooms = RoomRepository(db_controller) if rooms is None else rooms
+
+    def load_all(self):
+        """
+            Load every patient with three queries: rooms, inpatients and outpatients.
+
+            Returns:
+                list: InPatient objects followed by OutPatient objects, each in ID order.
+
+            Raises:
+                sqlite3.Error: If a query fails.
+            """
+        patients = []
+        with self._db_controller.connect(start_transaction=True) as cursor:
+            rooms = self.rooms.load_all()
+            for table in PATIENT_TABLES:
+                extra = ", room_number" if table == 'inpatients' else ""
+                cursor.execute(f"SELECT {PATIENT_COLUMNS}{extra} FROM {table} ORDER BY id")
+                patients.extend(self._hydrate_rows(table, cursor.fetchall(), rooms))
+        return patients
+
+    def load_many(self, keys):
+        """
+            Load the patients with the given (table, id) keys, querying each table once.
+
+            Keys whose table is None stand for rows written before patient tables were recorded;
+            they resolve to the inpatient with that ID if there is one, else to the outpatient.
+
+            Returns:
+                dict: Patient objects keyed by the requested keys; keys without a row are left out.
+
+            Raises:
+                sqlite3.Error: If a query fails.
+            """
+        identity_map = self._db_controller.identity_map
+        keys = set(keys)
+        found = {}
+        missing = {table: set() for table in PATIENT_TABLES}
+        for table, patient_id in keys:
+            for candidate in (table,) if table is not None else PATIENT_TABLES:
+                patient = identity_map.get(candidate, patient_id)
+                if patient is not None:
+                    found[(candidate, patient_id)] = patient
+                else:
+                    missing[candidate].add(patient_id)
+
+        if any(missing.values()):
+            with self._db_controller.connect(start_transaction=True) as cursor:
+                rooms = self.rooms.rooms if not missing['inpatients'] else self.rooms.load_all()
+                for table, patient_ids in missing.items():
+                    if not patient_ids:
+                        continue
+                    extra = ", room_number" if table == 'inpatients' else ""
+                    cursor.execute(f"SELECT {PATIENT_COLUMNS}{extra} FROM {table} "
+                                   f"WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(sorted(patient_ids)),))
+                    for patient in self._hydrate_rows(table, cursor.fetchall(), rooms):
+                        found[identity_map.identify(patient)] = patient
+
+        results = {}
+        for table, patient_id in keys:
+            for candidate in (table,) if table is not None else PATIENT_TABLES:
+                patient = found.get((candidate, patient_id))
+                if patient is not None:
+                    results[(table, patient_id)] = patient
+                    break
+        return results
+
+    def _hydrate_rows(self, table, rows, rooms):
+        identity_map = self._db_controller.identity_map
+        patients = []
+        for row in rows:
+            if table == 'inpatients' and row[-1] not in rooms:
+                logger.warning("Skipping inpatient %s: room %s does not exist.", row[2], row[-1])
+                continue
+            patient = identity_map.load(table, row[0], lambda: self._build(table, row, rooms),
+                                        {'unique_identifier': row[1]})
+            patients.append(patient)
+        return patients
+
+    @staticmethod
+    def _build(table, row, rooms):
+        _, _, full_name, age, gender, contact_info, personal_number, insurance, condition, admission_status = row[:10]
+        condition = CONDITIONS.get(condition, Condition.UNKNOWN)
+        if table == 'inpatients':
+            patient = InPatient(full_name, age, gender, contact_info, personal_number, insurance, condition,
+                                rooms[row[10]])
+        else:
+            patient = OutPatient(full_name, age, gender, contact_info, personal_number, insurance, condition)
+        patient.change_admission_status(ADMISSION_STATUSES.get(admission_status, AdmissionStatus.PENDING))
+        return patient
+
+
+class DoctorRepository:
+    """
+        Loads doctors together with their upcoming appointments.
+
+        Args:
+            db_controller (DatabaseController): The controller to read from.
+            patients (PatientRepository, optional): Repository used to load the appointments' patients.
+        """
+
+    def __init__(self, db_controller, patients=None):
+        self._db_controller = db_controller
+        self.patients = PatientRepository(db_controller) if patients is None else patients
+
+    def load_all(self):
+        """
+            Load every doctor and put their open appointments back into their schedules.
+
+            Uses one query for the doctors, one for the open appointments and, for patients not
+            already loaded, one per patient table plus one for the rooms.
+
+            Returns:
+                list: Doctor objects in ID order.
+
+            Raises:
+                sqlite3.Error: If a query fails.
+            """
+        identity_map = self._db_controller.identity_map
+        with self._db_controller.connect(start_transaction=True) as cursor:
+            cursor.execute("SELECT id, full_name, age, gender, work_id, department, specialization "
+                           "FROM doctors ORDER BY id")
+            doctors = {row[0]: identity_map.load('doctors', row[0], lambda: self._build(row)) for row in cursor.fetchall()}
+            cursor.execute("""
+                    SELECT appointment_id, description, date_time, appointment_type, patient_table, patient_id,
+                           doctor_id, duration_minutes
+                    FROM appointments WHERE is_completed = 0 ORDER BY doctor_id, date_time
+                """)
+            rows = cursor.fetchall()
+            patients = self.patients.load_many((row[4], row[5]) for row in rows)
+
+        # Doctors already in the identity map may hold some of the appointments
+        scheduled = {}
+        for appointment_id, description, date_time, kind, table, patient_id, doctor_id, minutes in rows:
+            doctor, patient = doctors.get(doctor_id), patients.get((table, patient_id))
+            if doctor is None or patient is None:
+                logger.warning("Skipping appointment %s: its doctor or patient does not exist.", appointment_id)
+                continue
+            if doctor_id not in scheduled:
+                scheduled[doctor_id] = {appointment.appointment_id for appointment in doctor.appointments}
+            if appointment_id in scheduled[doctor_id]:
+                continue
+            appointment = Appointment(description, from_db_datetime(date_time), AppointmentType(kind), patient,
+                                      timedelta(minutes=minutes))
+            appointment.appointment_id = appointment_id
+            appointment.add_doctor(doctor)
+            try:
+                doctor.assign_task(appointment)
+            except ValueError:
+                logger.warning("Skipping appointment %s: it overlaps another appointment.", appointment_id)
+        return list(doctors.values())
+
+    @staticmethod
+    def _build(row):
+        _, full_name, age, gender, work_id, department, specialization = row
+        return Doctor(full_name, age, gender, work_id, DEPARTMENTS.get(department, Department.DOCTOR), specialization)
+
+
+class NurseRepository:
+    """
+        Loads nurses together with their open tasks.
+
+        Args:
+            db_controller (DatabaseController): The controller to read from.
+            patients (PatientRepository, optional): Repository used to load the tasks' patients.
+        """
+
+    def __init__(self, db_controller, patients=None):
+        self._db_controller = db_controller
+        self.patients = PatientRepository(db_controller) if patients is None else patients
+
+    def load_all(self):
+        """
+            Load every nurse and queue their open tasks again.
+
+            Uses one query for the nurses, one for the open tasks and, for patients not already
+            loaded, one per patient table plus one for the rooms. Tasks without a nurse_id, written
+            before tasks recorded their nurse, are not assigned to anyone.
+
+            Returns:
+                list: Nurse objects in ID order.
+
+            Raises:
+                sqlite3.Error: If a query fails.
+            """
+        identity_map = self._db_controller.identity_map
+        with self._db_controller.connect(start_transaction=True) as cursor:
+            cursor.execute("SELECT id, full_name, age, gender, work_id, department FROM nurses ORDER BY id")
+            nurses = {row[0]: identity_map.load('nurses', row[0], lambda: self._build(row)) for row in cursor.fetchall()}
+            cursor.execute("""
+                    SELECT task_id, description, patient_table, patient_id, priority, nurse_id FROM tasks
+                    WHERE is_completed = 0 AND nurse_id IS NOT NULL ORDER BY task_id
+                """)
+            rows = cursor.fetchall()
+            patients = self.patients.load_many((row[2], row[3]) for row in rows)
+
+        # Nurses already in the identity map may hold some of the tasks
+        queued = {}
+        for task_id, description, table, patient_id, priority, nurse_id in rows:
+            nurse, patient = nurses.get(nurse_id), patients.get((table, patient_id))
+            if nurse is None or patient is None:
+                logger.warning("Skipping task %s: its nurse or patient does not exist.", task_id)
+                continue
+            if nurse_id not in queued:
+                queued[nurse_id] = {task.task_id for task in nurse.assigned_tasks}
+            if task_id in queued[nurse_id]:
+                continue
+            task = Task(description, patient, priority)
+            task.task_id = task_id
+            nurse.assign_task(task)
+        return list(nurses.values())
+
+    @staticmethod
+    def _build(row):
+        _, full_name, age, gender, work_id, department = row
+        return Nurse(full_name, age, gender, work_id, DEPARTMENTS.get(department, Department.NURSE))
+
+
+def warm_start(db_controller):
+    """
+        Load the hospital's model graph: rooms, patients, doctors with their upcoming appointments
+        and nurses with their open tasks, sharing one Room and one patient object per row.
+
+        Returns:
+            dict: 'rooms' (dict by room number), 'patients', 'doctors' and 'nurses' (lists).
+
+        Raises:
+            sqlite3.Error: If a query fails.
+        """
+    patients = PatientRepository(db_controller)
+    with db_controller.connect(start_transaction=True):
+        loaded = {
+            'patients': patients.load_all(),
+            'doctors': DoctorRepository(db_controller, patients).load_all(),
+            'nurses': NurseRepository(db_controller, patients).load_all(),
+        }
+    loaded['rooms'] = dict(patients.rooms.rooms)
+    logger.info("Warm start loaded %s patients, %s doctors and %s nurses.", len(loaded['patients']),
+                len(loaded['doctors']), len(loaded['nurses']))
+    return loaded
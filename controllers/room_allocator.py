@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import threading
+from log_config import get_logger
+
+logger = get_logger()
+
+# Recounts the beds taken in every room from the inpatients who have not been discharged. A room
+# is flagged is_occupied once all of its beds are taken. A room holding more inpatients than beds
+# fails the CHECK on occupied_beds instead of being counted as merely full.
+ROOM_OCCUPANCY_SYNC_SQL = (
+    """
+    UPDATE rooms SET occupied_beds = (
+        SELECT COUNT(*) FROM inpatients
+        WHERE inpatients.room_number = rooms.room_number AND admission_status IS NOT 'Discharged'
+    );
+    """,
+    "UPDATE rooms SET is_occupied = (occupied_beds >= capacity);",
+)
+
+OVERBOOKED_ROOMS_SQL = """
+    SELECT rooms.room_number, rooms.capacity, COUNT(*) FROM rooms
+    JOIN inpatients ON inpatients.room_number = rooms.room_number AND inpatients.admission_status IS NOT 'Discharged'
+    GROUP BY rooms.room_number HAVING COUNT(*) > rooms.capacity
+"""
+
+FREE_BEDS_SQL = """
+    SELECT rooms.room_number, rooms.capacity - (
+        SELECT COUNT(*) FROM inpatients
+        WHERE inpatients.room_number = rooms.room_number AND admission_status IS NOT 'Discharged'
+    ) FROM rooms WHERE rooms.room_number IN (SELECT value FROM json_each(?))
+"""
+
+
+class RoomAllocator:
+    """
+        In-memory bed occupancy index over the rooms table, grouped by room type.
+
+        Each room keeps a bitmap of its taken beds, and each room type keeps a stack of the rooms
+        that still have a free bed plus a free-bed count, so allocating and releasing a bed never
+        scans the rooms. Every change is written to rooms.occupied_beds with a guarded UPDATE while
+        the index lock is held; if the row does not accept it the in-memory change is undone.
+        The index is rebuilt from inpatients.room_number on first use or by calling load().
+
+        Args:
+            db_controller (DatabaseController): The controller used to read and update the rooms table.
+        """
+
+    def __init__(self, db_controller):
+        self._db_controller = db_controller
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._rooms = {}
+        self._free_rooms = {}
+        self._positions = {}
+        self._free_beds = {}
+
+    def load(self):
+        """Recount occupied beds from the inpatients table and rebuild the index."""
+        self._db_controller.initialize_database()
+        with self._lock:
+            try:
+                with self._db_controller.connect(True) as cursor:
+                    for sql in ROOM_OCCUPANCY_SYNC_SQL:
+                        cursor.execute(sql)
+                    cursor.execute("SELECT room_number, room_type, capacity, occupied_beds FROM rooms "
+                                   "ORDER BY room_number DESC")
+                    rows = cursor.fetchall()
+            except sqlite3.IntegrityError:
+                overbooked = self._db_controller.query(OVERBOOKED_ROOMS_SQL) or []
+                logger.error("Rooms hold more inpatients than beds (room, beds, inpatients): %s", overbooked)
+                raise
+            self._rooms, self._free_rooms, self._positions, self._free_beds = {}, {}, {}, {}
+            for room_number, room_type, capacity, occupied_beds in rows:
+                self._track(room_number, room_type, capacity, (1 << occupied_beds) - 1)
+            self._loaded = True
+        logger.info("Loaded bed occupancy for %s rooms.", len(rows))
+
+    @staticmethod
+    def sync_operations(room_numbers):
+        """
+            Build run_transaction() operations that recount the beds taken in the given rooms.
+
+            Follow a successful transaction with refresh() so the index picks up the new counts.
+            """
+        rooms = (json.dumps(sorted(set(room_numbers))),)
+        where = " WHERE room_number IN (SELECT value FROM json_each(?));"
+        return [(sql.rstrip().rstrip(';') + where, rooms) for sql in ROOM_OCCUPANCY_SYNC_SQL]
+
+    def refresh(self, room_numbers):
+        """Reread the occupied bed counts of the given rooms from the rooms table."""
+        room_numbers = sorted(set(room_numbers))
+        with self._lock:
+            if not self._loaded:
+                # The next load() recounts every room
+                return
+            rows = self._db_controller.query(
+                "SELECT room_number, room_type, capacity, occupied_beds FROM rooms "
+                "WHERE room_number IN (SELECT value FROM json_each(?))", (json.dumps(room_numbers),))
+            if rows is None:
+                raise sqlite3.Error("Could not read the occupancy of the refreshed rooms.")
+            for room_number, room_type, capacity, occupied_beds in rows:
+                self._untrack(room_number)
+                self._track(room_number, room_type, capacity, (1 << occupied_beds) - 1)
+
+    def register(self, room_number, room_type, capacity):
+        """Add a new room to the index, or update the type and capacity of a known room."""
+        with self._lock:
+            if not self._loaded:
+                # The next load() reads the room from the table
+                return
+            beds = self._rooms.get(room_number, (None, None, 0))[2]
+            self._untrack(room_number)
+            self._track(room_number, room_type, capacity, beds & ((1 << capacity) - 1))
+
+    def unregister(self, room_number):
+        """Drop a room from the index."""
+        with self._lock:
+            self._untrack(room_number)
+
+    def allocate(self, room_type):
+        """
+            Take a free bed in any room of the given type.
+
+            The bed is only kept across load() while an inpatient row in the room accounts for it.
+
+            Returns:
+                tuple or None: (room_number, bed) of the bed taken, or None if every bed of that type is taken.
+            """
+        with self._lock:
+            self._ensure_loaded()
+            free_rooms = self._free_rooms.get(room_type)
+            while free_rooms:
+                room_number = free_rooms[-1]
+                bed = self._take(room_number)
+                if bed is not None:
+                    return room_number, bed
+            return None
+
+    def occupy(self, room_number):
+        """
+            Take a free bed in a specific room.
+
+            Returns:
+                int or None: The bed taken, or None if the room is unknown or full.
+            """
+        with self._lock:
+            self._ensure_loaded()
+            if room_number not in self._positions:
+                return None
+            return self._take(room_number)
+
+    def release(self, room_number, bed=None):
+        """Free a bed in the room, the highest taken bed unless one is given. Returns True if a bed was freed."""
+        with self._lock:
+            self._ensure_loaded()
+            room = self._rooms.get(room_number)
+            if room is None:
+                return False
+            room_type, capacity, beds = room
+            if bed is None:
+                bed = beds.bit_length() - 1
+            if bed < 0 or not beds >> bed & 1:
+                return False
+            self._set_beds(room_number, beds & ~(1 << bed))
+            if not self._persist(room_number, -1):
+                self._set_beds(room_number, beds)
+                return False
+            return True
+
+    def free_beds(self, room_type=None):
+        """Return the number of free beds of one room type, or a dict of counts for every type."""
+        with self._lock:
+            self._ensure_loaded()
+            if room_type is not None:
+                return self._free_beds.get(room_type, 0)
+            return dict(self._free_beds)
+
+    def occupied_beds(self, room_number):
+        """Return the bed numbers taken in the room."""
+        with self._lock:
+            self._ensure_loaded()
+            room = self._rooms.get(room_number)
+            beds = room[2] if room else 0
+            return [bed for bed in range(beds.bit_length()) if beds >> bed & 1]
+
+    def _take(self, room_number):
+        _, capacity, beds = self._rooms[room_number]
+        # Lowest clear bit of the bitmap
+        bed = (~beds & (beds + 1)).bit_length() - 1
+        if bed >= capacity:
+            return None
+        self._set_beds(room_number, beds | 1 << bed)
+        if not self._persist(room_number, 1):
+            # The row disagrees with the index, e.g. another process filled the room; resync it
+            logger.warning("Room %s rejected a bed allocation; marking it full.", room_number)
+            self._set_beds(room_number, (1 << capacity) - 1)
+            return None
+        return bed
+
+    def _persist(self, room_number, delta):
+        sql = """
+                UPDATE rooms SET occupied_beds = occupied_beds + ?, is_occupied = (occupied_beds + ? >= capacity)
+                WHERE room_number = ? AND occupied_beds + ? BETWEEN 0 AND capacity
+            """
+        try:
+            with self._db_controller.connect() as cursor:
+                cursor.execute(sql, (delta, delta, room_number, delta))
+                return cursor.rowcount == 1
+        except Exception as e:
+            logger.error("Error updating bed occupancy of room %s: %s", room_number, e)
+            return False
+
+    def _set_beds(self, room_number, beds):
+        room_type, capacity, old_beds = self._rooms[room_number]
+        self._rooms[room_number] = (room_type, capacity, beds)
+        self._free_beds[room_type] += bin(old_beds).count('1') - bin(beds).count('1')
+        full = beds == (1 << capacity) - 1
+        if full and room_number in self._positions:
+            self._pop_free_room(room_number)
+        elif not full and room_number not in self._positions:
+            self._push_free_room(room_type, room_number)
+
+    def _track(self, room_number, room_type, capacity, beds):
+        self._rooms[room_number] = (room_type, capacity, 0)
+        self._free_rooms.setdefault(room_type, [])
+        self._free_beds[room_type] = self._free_beds.get(room_type, 0) + capacity
+        self._push_free_room(room_type, room_number)
+        self._set_beds(room_number, beds)
+
+    def _untrack(self, room_number):
+        room = self._rooms.get(room_number)
+        if room is None:
+            return
+        room_type, capacity, beds = room
+        self._free_beds[room_type] -= capacity - bin(beds).count('1')
+        if room_number in self._positions:
+            self._pop_free_room(room_number)
+        del self._rooms[room_number]
+
+    def _push_free_room(self, room_type, room_number):
+        free_rooms = self._free_rooms[room_type]
+        self._positions[room_number] = len(free_rooms)
+        free_rooms.append(room_number)
+
+    def _pop_free_room(self, room_number):
+        # Swap with the top of the stack so removal is O(1)
+        free_rooms = self._free_rooms[self._rooms[room_number][0]]
+        index = self._positions.pop(room_number)
+        last = free_rooms.pop()
+        if last != room_number:
+            free_rooms[index] = last
+            self._positions[last] = index
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
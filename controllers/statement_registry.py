@@ -0,0 +1,102 @@
+import threading
+from models.inpatient_model import InPatient
+from models.outpatient_model import OutPatient
+
+PATIENT_TABLES = ('inpatients', 'outpatients')
+
+# SQL templates as operation: (tables the operation may run on, SQL with a {table} placeholder).
+# Only whitelisted table names are ever formatted into a statement.
+STATEMENTS = {
+    'admission_status': (PATIENT_TABLES, "SELECT admission_status FROM {table} WHERE id = ?"),
+    'existing_patients': (PATIENT_TABLES, """
+        SELECT full_name, unique_identifier FROM {table}
+        WHERE full_name IN (SELECT value FROM json_each(?)) OR unique_identifier IN (SELECT value FROM json_each(?))
+    """),
+    'rename': (PATIENT_TABLES, "UPDATE {table} SET full_name = ? WHERE id = ?"),
+    'admit': (PATIENT_TABLES, "UPDATE {table} SET admission_status = 'Admitted' WHERE id = ?"),
+    'discharge': (PATIENT_TABLES, """
+        UPDATE {table} SET admission_status = 'Discharged'
+        WHERE id = ? AND admission_status IS NOT 'Discharged'
+    """),
+    'discharge_many': (PATIENT_TABLES, """
+        UPDATE {table} SET admission_status = 'Discharged' WHERE id IN (SELECT value FROM json_each(?))
+    """),
+    'delete': (PATIENT_TABLES, "DELETE FROM {table} WHERE id = ?"),
+    'existing_ids': (PATIENT_TABLES, "SELECT id FROM {table} WHERE id IN (SELECT value FROM json_each(?))"),
+    # Rows that refer to a patient read the ID back from the patient's table, so a cached ID whose
+    # row is gone fails the NOT NULL constraint instead of being stored
+    'add_history': (PATIENT_TABLES, """
+        INSERT INTO medical_history (patient_table, patient_id, entry, date_added)
+        VALUES ('{table}', (SELECT id FROM {table} WHERE id = ?), ?, ?)
+    """),
+    'add_appointment': (PATIENT_TABLES, """
+        INSERT INTO appointments (description, date_time, appointment_type, patient_table, patient_id, doctor_id,
+                                  duration_minutes)
+        VALUES (?, ?, ?, '{table}', (SELECT id FROM {table} WHERE id = ?), (SELECT id FROM doctors WHERE id = ?), ?)
+    """),
+    'add_task': (PATIENT_TABLES, """
+        INSERT INTO tasks (description, patient_table, patient_id, priority, nurse_id)
+        VALUES (?, '{table}', (SELECT id FROM {table} WHERE id = ?), ?, ?)
+    """),
+}
+
+
+def patient_table(patient):
+    """Return the table that stores the patient, 'inpatients' or 'outpatients', or None for other objects."""
+    if isinstance(patient, InPatient):
+        return 'inpatients'
+    if isinstance(patient, OutPatient):
+        return 'outpatients'
+    return None
+
+
+class StatementRegistry:
+    """
+        Builds each SQL statement once per (operation, table) and hands out the same string afterwards.
+
+        Reusing the identical string is what lets the per-connection sqlite3 statement cache find
+        the prepared statement again. Table names are checked against the operation's whitelist
+        before they are formatted into SQL.
+
+        Args:
+            statements (dict, optional): Operation templates in the form of STATEMENTS.
+        """
+
+    def __init__(self, statements=None):
+        self._templates = dict(STATEMENTS if statements is None else statements)
+        self._sql = {}
+        self._uses = {}
+        self._lock = threading.Lock()
+
+    def get(self, operation, table):
+        """
+            Return the SQL of an operation on a table.
+
+            Raises:
+                KeyError: If the operation is unknown.
+                ValueError: If the table is not whitelisted for the operation.
+            """
+        key = (operation, table)
+        sql = self._sql.get(key)
+        if sql is None:
+            tables, template = self._templates[operation]
+            if table not in tables:
+                raise ValueError(f"Table {table!r} is not allowed for operation {operation!r}.")
+            with self._lock:
+                sql = self._sql.setdefault(key, template.format(table=table))
+        with self._lock:
+            self._uses[key] = self._uses.get(key, 0) + 1
+        return sql
+
+    def stats(self):
+        """Return how many statements were built and how often each (operation, table) was requested."""
+        with self._lock:
+            uses = dict(self._uses)
+            built = len(self._sql)
+        requests = sum(uses.values())
+        return {
+            'built': built,
+            'requests': requests,
+            'reused': requests - built,
+            'uses': {f"{operation}:{table}": count for (operation, table), count in sorted(uses.items())},
+        }
@@ -0,0 +1,147 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from log_config import get_logger
+
+logger = get_logger()
+
+_STOP = object()
+
+
+class WriteCoalescer:
+    """
+        Single writer thread that commits queued write statements in group transactions.
+
+        SQLite serializes writers, so many threads each committing their own INSERT spend most of
+        their time waiting for the write lock and paying for a commit each. Here callers only queue
+        a statement and get a future back; one thread collects up to max_batch statements, waiting at
+        most max_delay_ms after the first, and runs them in one IMMEDIATE transaction. With no delay
+        a batch is whatever queued up while the previous one was committing, which groups writes
+        under load without slowing down a lone caller. Every statement gets its own SAVEPOINT, so a
+        failing statement is rolled back and reported to its caller alone while the rest of the
+        batch commits. Futures resolve only after the commit.
+
+        Args:
+            db_controller (DatabaseController): The controller whose pool the writer borrows from.
+            max_batch (int): Most statements committed together.
+            max_delay_ms (float): Longest time a statement waits for others to join its batch.
+        """
+
+    def __init__(self, db_controller, max_batch=100, max_delay_ms=0.0):
+        if not isinstance(max_batch, int) or max_batch < 1:
+            raise ValueError("max_batch must be a positive integer.")
+        self._db_controller = db_controller
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._statements = 0
+        self._failed = 0
+        self._largest_batch = 0
+
+    def submit(self, sql, params=()):
+        """
+            Queue a write statement.
+
+            Returns:
+                concurrent.futures.Future: Resolves to the statement's lastrowid once its batch has
+                committed, or to the sqlite3.Error that made it fail.
+            """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Write coalescer is closed.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write, name='db-writer', daemon=True)
+                self._thread.start()
+            self._queue.put((future, sql, params))
+        return future
+
+    def execute(self, sql, params=(), timeout=None):
+        """Queue a write statement and wait for it to commit. Returns its lastrowid; raises its error."""
+        return self.submit(sql, params).result(timeout)
+
+    def stats(self):
+        """Return the writer counters (batches, statements, failed statements, largest batch, queued)."""
+        with self._lock:
+            return {
+                'batches': self._batches,
+                'statements': self._statements,
+                'failed': self._failed,
+                'largest_batch': self._largest_batch,
+                'queued': self._queue.qsize(),
+            }
+
+    def close(self):
+        """Commit every statement already queued, then stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def _write(self):
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            batch = [job]
+            deadline = time.monotonic() + self.max_delay_ms / 1000
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        # Cancelled futures are dropped before anything runs
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        results = []
+        failed = 0
+        try:
+            with self._db_controller.connect() as cursor:
+                cursor.execute('BEGIN IMMEDIATE;')
+                for future, sql, params in batch:
+                    cursor.execute('SAVEPOINT coalesced_write;')
+                    try:
+                        cursor.execute(sql, params)
+                    except sqlite3.Error as e:
+                        cursor.execute('ROLLBACK TO coalesced_write;')
+                        results.append((future, None, e))
+                        failed += 1
+                    else:
+                        results.append((future, cursor.lastrowid, None))
+                    cursor.execute('RELEASE coalesced_write;')
+        except Exception as e:
+            logger.error("Group commit of %s statements failed: %s", len(batch), e)
+            for future, _, _ in batch:
+                future.set_exception(e)
+            failed = len(batch)
+        else:
+            for future, row_id, error in results:
+                if error is None:
+                    future.set_result(row_id)
+                else:
+                    future.set_exception(error)
+        with self._lock:
+            self._batches += 1
+            self._statements += len(batch)
+            self._failed += failed
+            self._largest_batch = max(self._largest_batch, len(batch))
+        logger.debug("Group commit of %s statements (%s failed).", len(batch), failed)
@@ -1,15 +1,59 @@
 # log_config.py
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
 
+LOGGER_NAME = 'HospitalManagement'
+LOG_FILE = 'hospital_management.log'
+SLOW_QUERY_LOGGER_NAME = LOGGER_NAME + '.slow_queries'
+# File name of the slow-query log, which is written next to the main log file
+SLOW_QUERY_LOG_FILE = 'slow_queries.log'
+
+_setup_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+_log_file = LOG_FILE
+_slow_query_listener = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+        Queue handler that never blocks the calling thread.
+
+        Records are put on a bounded queue without formatting them; the QueueListener thread
+        formats and writes them. When the queue is full the record is dropped and counted.
+        """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread, not here
+        return record
+
+    def enqueue(self, record):
+        # Called with the handler lock held, so the counter needs no extra locking
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-def setup_logging():
-    # Create a custom logger
-    logger = logging.getLogger('HospitalManagement')
-    logger.setLevel(logging.DEBUG)  # Set minimum log level to DEBUG for the logger
 
+def _build_handlers(log_file, rotation, max_bytes, backup_count, when):
     # Create handlers for both console and file
     c_handler = logging.StreamHandler()
-    f_handler = logging.FileHandler('hospital_management.log')
+    if rotation == 'size':
+        f_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+    elif rotation == 'time':
+        f_handler = logging.handlers.TimedRotatingFileHandler(log_file, when=when, backupCount=backup_count)
+    elif rotation is None:
+        f_handler = logging.FileHandler(log_file)
+    else:
+        raise ValueError("Rotation must be None, 'size' or 'time'.")
 
     # Set levels for handlers
     c_handler.setLevel(logging.WARNING)  # Console handler for warnings and above
@@ -21,10 +65,123 @@ def setup_logging():
 
     c_handler.setFormatter(c_format)
     f_handler.setFormatter(f_format)
+    return [c_handler, f_handler]
+
+
+def setup_logging(mode='queue', level=logging.DEBUG, log_file=LOG_FILE, rotation=None,
+                  max_bytes=10 * 1024 * 1024, backup_count=5, when='midnight', queue_size=10000):
+    """
+        Configure the 'HospitalManagement' logger and return it.
+
+        Handlers are registered only by the first call; later calls return the already configured
+        logger, so every module can call this at import time. Call shutdown_logging() first to
+        apply a different configuration.
+
+        Args:
+            mode (str): 'queue' writes on a background QueueListener thread, 'sync' writes on the caller's thread.
+            level (int): Minimum level for the logger.
+            log_file (str): Path of the log file.
+            rotation (str, optional): None for a plain file, 'size' or 'time' for a rotating file.
+            max_bytes (int): File size that triggers rotation when rotation is 'size'.
+            backup_count (int): Number of rotated files to keep.
+            when (str): Rotation interval when rotation is 'time', as accepted by TimedRotatingFileHandler.
+            queue_size (int): Capacity of the log queue in 'queue' mode; records beyond it are dropped.
+
+        Returns:
+            logging.Logger: The configured logger.
+        """
+    global _queue_handler, _listener, _log_file
+
+    # Create a custom logger
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if logger.handlers:
+            return logger
+        if mode not in ('queue', 'sync'):
+            raise ValueError("Logging mode must be 'queue' or 'sync'.")
+
+        logger.setLevel(level)
+        _log_file = log_file
+        handlers = _build_handlers(log_file, rotation, max_bytes, backup_count, when)
+
+        if mode == 'sync':
+            # Add handlers to the logger
+            for handler in handlers:
+                logger.addHandler(handler)
+            return logger
+
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(_queue_handler)
+        return logger
+
+
+def get_logger():
+    """
+        Return the 'HospitalManagement' logger, configuring logging with the defaults if needed.
+
+        Log calls pass %-style arguments instead of f-strings: Logger checks the level before it
+        builds a record, and the message is only formatted when a handler writes it, which in
+        queue mode happens on the listener thread.
+        """
+    return setup_logging()
+
+
+def get_slow_query_logger(log_file=None, queue_size=1000):
+    """
+        Return the logger for the slow-query log, configuring it on first use.
+
+        Slow statements are written to their own file by a separate queue listener and are not
+        propagated to the main log. The file is only created once the first record is written.
+
+        Args:
+            log_file (str, optional): Path of the slow-query log file. Defaults to SLOW_QUERY_LOG_FILE in
+                the directory of the main log file.
+            queue_size (int): Capacity of the log queue; records beyond it are dropped.
+        """
+    global _slow_query_listener
+
+    if log_file is None:
+        log_file = os.path.join(os.path.dirname(os.path.abspath(_log_file)), SLOW_QUERY_LOG_FILE)
+
+    logger = logging.getLogger(SLOW_QUERY_LOGGER_NAME)
+    with _setup_lock:
+        if not logger.handlers:
+            logger.setLevel(logging.WARNING)
+            logger.propagate = False
+            f_handler = logging.FileHandler(log_file, delay=True)
+            f_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+            queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+            _slow_query_listener = logging.handlers.QueueListener(queue_handler.queue, f_handler)
+            _slow_query_listener.start()
+            logger.addHandler(queue_handler)
+        return logger
+
+
+def dropped_log_records():
+    """Return how many records the queue handler dropped because the queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def shutdown_logging():
+    """Flush pending records, stop the listener threads and remove the handlers of both loggers."""
+    global _queue_handler, _listener, _slow_query_listener
 
-    # Add handlers to the logger
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
+    with _setup_lock:
+        for name, listener in ((LOGGER_NAME, _listener), (SLOW_QUERY_LOGGER_NAME, _slow_query_listener)):
+            logger = logging.getLogger(name)
+            handlers = list(logger.handlers)
+            for handler in handlers:
+                logger.removeHandler(handler)
+            if listener is not None:
+                listener.stop()
+                handlers.extend(listener.handlers)
+            for handler in handlers:
+                handler.close()
+        _queue_handler = None
+        _listener = None
+        _slow_query_listener = None
 
-    return logger
 
+atexit.register(shutdown_logging)
@@ -3,7 +3,7 @@ from models.patient_model import Condition
 from models.room_model import Room
 from models.doctor_model import Doctor
 from models.hospital_employee_model import Department
-from log_config import setup_logging
+from log_config import get_logger
 from controllers.database_controller import DatabaseController
 from models.appointment_model import Appointment, AppointmentType
 from datetime import datetime, time
@@ -12,7 +12,7 @@ from models.nurse_model import Nurse
 from models.nurse_shift_model import Shift, ShiftType
 from models.task_model import Task
 
-logger = setup_logging()
+logger = get_logger()
 db_controller = DatabaseController()
 
 
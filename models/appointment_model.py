@@ -13,8 +13,11 @@ class AppointmentType(Enum):
 
 class Appointment:
     _appointment_id_counter = 0
+    DEFAULT_DURATION = datetime.timedelta(minutes=30)
+    __slots__ = ('_appointment_id', '_description', '_patient', '_appointment_type', '_notes', '_doctor',
+                 '_is_completed', '_date_time', '_duration', '__weakref__')
 
-    def __init__(self, description, date_time, appointment_type, patient):
+    def __init__(self, description, date_time, appointment_type, patient, duration=None):
         self._appointment_id = self.generate_appointment_id()
         self._description = description
         if isinstance(patient, Patient):
@@ -25,10 +28,15 @@ class Appointment:
             self._appointment_type = appointment_type
         else:
             raise TypeError("Must be a valid appointment type.")
-        self._notes = []
+        self._notes = None
         self._doctor = None
         self._is_completed = False
         self._date_time = date_time
+        duration = self.DEFAULT_DURATION if duration is None else duration
+        if isinstance(duration, datetime.timedelta) and duration > datetime.timedelta(0):
+            self._duration = duration
+        else:
+            raise ValueError("Duration must be a positive timedelta.")
 
     @classmethod
     def generate_appointment_id(cls):
@@ -52,10 +60,10 @@ class Appointment:
         self._is_completed = True
 
     def add_note(self, note):
-        self._notes.append(note)
+        self.notes.append(note)
 
     def display_notes(self):
-        for note in self._notes:
+        for note in self._notes or ():
             print(note)
 
     def display_type(self):
@@ -76,6 +84,14 @@ class Appointment:
     def date_time(self):
         return self._date_time
 
+    @property
+    def duration(self):
+        return self._duration
+
+    @property
+    def end_time(self):
+        return self._date_time + self._duration
+
     @property
     def patient(self):
         return self._patient
@@ -90,12 +106,18 @@ class Appointment:
 
     @property
     def notes(self):
+        if self._notes is None:
+            self._notes = []
         return self._notes
 
     @property
     def appointment_id(self):
         return self._appointment_id
 
+    @appointment_id.setter
+    def appointment_id(self, new_id):
+        self._appointment_id = new_id
+
     @property
     def is_completed(self):
         return self._is_completed
@@ -1,12 +1,15 @@
 from models.hospital_employee_model import HospitalEmployee
 from models.patient_model import Patient
+from models.schedule_model import Schedule
 
 
 class Doctor(HospitalEmployee):
+    __slots__ = ('_specialization', '_upcoming_appointments')
+
     def __init__(self, full_name, age, gender, work_id, department, specialization):
         super().__init__(full_name, age, gender, work_id, department)
         self._specialization = specialization
-        self._upcoming_appointments = []
+        self._upcoming_appointments = Schedule()
 
     def generate_unique_identifier(self):
         return f'D_{self.work_id}'
@@ -18,20 +21,26 @@ class Doctor(HospitalEmployee):
         print("ID: ", self.generate_unique_identifier())
 
     def perform_duty(self):
-        if self._upcoming_appointments:
-            # Pop the last appointment from the list
-            appointment = self._upcoming_appointments[-1]
-            return appointment
-        else:
-            # If no upcoming appointments, return None
-            return None
+        # Pop the earliest upcoming appointment, or return None if there is none
+        return self._upcoming_appointments.pop_first()
 
     @staticmethod
     def prescribe(patient, entry):
         patient.add_prescription(entry)
 
     def assign_task(self, new_task):
-        self._upcoming_appointments.append(new_task)
+        # Raises ValueError if the appointment overlaps one the doctor already has
+        self._upcoming_appointments.add(new_task.date_time, new_task.end_time, new_task)
+
+    def next_appointment(self, moment):
+        entry = self._upcoming_appointments.next_after(moment)
+        return entry[2] if entry else None
+
+    def has_appointments(self):
+        return len(self._upcoming_appointments) > 0
+
+    def appointments_between(self, start, end):
+        return [appointment for _, _, appointment in self._upcoming_appointments.between(start, end)]
 
     def display_appointments(self):
         print("Upcoming appointments:\n")
@@ -44,4 +53,10 @@ class Doctor(HospitalEmployee):
 
     @property
     def appointments(self):
-        return self._upcoming_appointments
+        """
+            A copy of the upcoming appointments in start order.
+
+            Changing the returned list does not change the doctor's schedule; use assign_task() and
+            perform_duty() for that, and has_appointments() to check whether any are left.
+            """
+        return list(self._upcoming_appointments)
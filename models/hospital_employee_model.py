@@ -9,6 +9,8 @@ class Department(Enum):
 
 
 class HospitalEmployee(Person, ABC):
+    __slots__ = ('_work_id', '_department')
+
     def __init__(self, full_name, age, gender, work_id, department):
         super().__init__(full_name, age, gender)
         if isinstance(work_id, int):
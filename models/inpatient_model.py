@@ -3,6 +3,8 @@ from models.room_model import Room
 
 
 class InPatient(Patient):
+    __slots__ = ('_room',)
+
     def __init__(self, full_name, age, gender, contact_info, personal_number, insurance, condition, room):
         super().__init__(full_name, age, gender, contact_info, personal_number, insurance, condition)
         if isinstance(room, Room):
@@ -26,7 +28,7 @@ class InPatient(Patient):
         self.change_admission_status(AdmissionStatus.DISCHARGED)
 
     def provide_treatment_details(self, entry):
-        self._prescriptions.append(entry)
+        self.add_prescription(entry)
 
     def admit(self):
         self.change_admission_status(AdmissionStatus.ADMITTED)
@@ -1,13 +1,16 @@
 from models.hospital_employee_model import HospitalEmployee
+from models.task_queue_model import TaskQueue
 from datetime import datetime
 
 
 class Nurse(HospitalEmployee):
+    __slots__ = ('_upcoming_shifts', '_completed_shifts', '_assigned_tasks', '_completed_tasks')
+
     def __init__(self, full_name, age, gender, work_id, department):
         super().__init__(full_name, age, gender, work_id, department)
         self._upcoming_shifts = []
         self._completed_shifts = []
-        self._assigned_tasks = []
+        self._assigned_tasks = TaskQueue()
         self._completed_tasks = []
 
     def generate_unique_identifier(self):
@@ -20,14 +23,24 @@ class Nurse(HospitalEmployee):
         print("ID: ", self.generate_unique_identifier())
 
     def perform_duty(self):
-        sorted_tasks = sorted(self._assigned_tasks, key=lambda x: x.priority)
-        highest_priority_task = sorted_tasks[0]
+        if not self._assigned_tasks:
+            return None
+        highest_priority_task = self._assigned_tasks.pop()
         highest_priority_task.mark_completed()
         self._completed_tasks.append(highest_priority_task)
-        self._assigned_tasks.remove(highest_priority_task)
+        return highest_priority_task
 
     def assign_task(self, new_task):
-        self._assigned_tasks.append(new_task)
+        self._assigned_tasks.push(new_task)
+
+    def next_task(self):
+        return self._assigned_tasks.peek()
+
+    def reprioritise_task(self, task, priority):
+        self._assigned_tasks.reprioritise(task, priority)
+
+    def drop_task(self, task):
+        self._assigned_tasks.remove(task)
 
     def display_assigned_tasks(self):
         print("Assigned tasks:\n")
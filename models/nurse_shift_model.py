@@ -9,6 +9,8 @@ class ShiftType(Enum):
 
 
 class Shift:
+    __slots__ = ('_start_date_time', '_end_date_time', '_shift_type')
+
     def __init__(self, start_date_time, end_date_time, shift_type):
 
         self._start_date_time = start_date_time
@@ -3,6 +3,8 @@ from models.patient_model import Patient, Condition, AdmissionStatus
 
 
 class OutPatient(Patient):
+    __slots__ = ()
+
     def __init__(self, full_name, age, gender, contact_info, personal_number, insurance, condition):
         super().__init__(full_name, age, gender, contact_info, personal_number, insurance, condition)
 
@@ -13,7 +15,7 @@ class OutPatient(Patient):
         self.change_admission_status(AdmissionStatus.DISCHARGED)
 
     def provide_treatment_details(self, entry):
-        self._prescriptions.append(entry)
+        self.add_prescription(entry)
 
     def generate_unique_identifier(self):
         initials = ''.join(word[0].upper() for word in self._full_name.split())
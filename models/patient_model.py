@@ -25,6 +25,9 @@ class Condition(Enum):
 
 
 class Patient(Person, ABC):
+    __slots__ = ('_contact_info', '_personal_number', '_insurance', '_condition', '_cards', '_balance',
+                 '_prescriptions', '_medical_history', '_admission_status')
+
     def __init__(self, full_name, age, gender, contact_info, personal_number, insurance, condition):
         super().__init__(full_name, age, gender)
         self._contact_info = contact_info
@@ -34,10 +37,11 @@ class Patient(Person, ABC):
             self._condition = condition
         else:
             raise ValueError("Condition must be an instance of Condition enum. ")
-        self._cards = []
+        # Most patients never get cards, prescriptions or history entries, so the lists are created on first use
+        self._cards = None
         self._balance = 0.0
-        self._prescriptions = []
-        self._medical_history = []
+        self._prescriptions = None
+        self._medical_history = None
         self._admission_status = AdmissionStatus.PENDING
 
     @abstractmethod
@@ -96,9 +100,13 @@ class Patient(Person, ABC):
             return 'Palliative care'
         elif self._condition == Condition.UNKNOWN:
             return 'Unknown'
+        elif self._condition == Condition.REFUSED:
+            return 'Refused'
+        elif self._condition == Condition.TRANSFERRED:
+            return 'Transferred'
 
     def display_prescriptions(self):
-        for prescription in self._prescriptions:
+        for prescription in self._prescriptions or ():
             print(prescription)
 
     def deposit(self, amount):
@@ -111,13 +119,13 @@ class Patient(Person, ABC):
         self._balance = 0
 
     def add_payment_method(self, card_info):
-        self._cards.append(card_info)
+        self.cards.append(card_info)
 
     def add_medical_history(self, entry):
-        self._medical_history.append(entry)
+        self.medical_history.append(entry)
 
     def display_medical_history(self):
-        for entry in self._medical_history:
+        for entry in self._medical_history or ():
             print(entry)
 
     def change_admission_status(self, new_s):
@@ -127,7 +135,7 @@ class Patient(Person, ABC):
             raise ValueError("Admission status must be an instance of AdmissionStatus enum. ")
 
     def add_prescription(self, entry):
-        self._prescriptions.append(entry)
+        self.prescriptions.append(entry)
 
     @property
     def contact_info(self):
@@ -172,6 +180,8 @@ class Patient(Person, ABC):
 
     @property
     def medical_history(self):
+        if self._medical_history is None:
+            self._medical_history = []
         return self._medical_history
 
     @property
@@ -187,10 +197,14 @@ class Patient(Person, ABC):
 
     @property
     def prescriptions(self):
+        if self._prescriptions is None:
+            self._prescriptions = []
         return self._prescriptions
 
     @property
     def cards(self):
+        if self._cards is None:
+            self._cards = []
         return self._cards
 
     @property
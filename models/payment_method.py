@@ -2,6 +2,8 @@ import datetime
 
 
 class Card:
+    __slots__ = ('card_holder', '_card_number', '_expiration_date', '_cvv')
+
     def __init__(self, card_holder, card_number, expiration_date, cvv):
         if self._validate_card_holder(card_holder):
             self.card_holder = card_holder
@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 
 
 class Person(ABC):
+    # Slots instead of a per-instance __dict__; __weakref__ keeps people usable as weak dictionary keys
+    __slots__ = ('_full_name', '_age', '_gender', '__weakref__')
 
     def __init__(self, full_name, age, gender):
         self._full_name = full_name
@@ -1,6 +1,8 @@
 
 
 class Room:
+    __slots__ = ('_room_number', '_room_type', '_daily_rate', '_capacity', '_is_occupied')
+
     class RoomType:
         SINGLE = "Single"
         DOUBLE = "Double"
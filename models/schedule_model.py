@@ -0,0 +1,85 @@
+from bisect import bisect_left, bisect_right
+
+
+class Schedule:
+    """
+        Non-overlapping time intervals kept in sorted arrays.
+
+        Because intervals never overlap, both the start and the end times are sorted, so overlap
+        checks, range queries and next-interval lookups are binary searches. Each interval is
+        identified by its start time and carries an arbitrary item.
+        """
+
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+        self._items = []
+
+    def add(self, start, end, item):
+        """Insert an interval. Raises ValueError if it is empty or overlaps an existing interval."""
+        if not end > start:
+            raise ValueError("Interval must end after it starts.")
+        if self.overlapping(start, end):
+            raise ValueError("Interval overlaps an existing one.")
+        index = bisect_left(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._items.insert(index, item)
+
+    def overlapping(self, start, end):
+        """Return the items of every interval that overlaps [start, end)."""
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end)
+        return self._items[first:last]
+
+    def between(self, start, end):
+        """Return (start, end, item) for every interval that overlaps [start, end), in time order."""
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end)
+        return list(zip(self._starts[first:last], self._ends[first:last], self._items[first:last]))
+
+    def next_after(self, moment):
+        """Return (start, end, item) of the first interval starting at or after moment, or None."""
+        index = bisect_left(self._starts, moment)
+        if index == len(self._starts):
+            return None
+        return self._starts[index], self._ends[index], self._items[index]
+
+    def get(self, start):
+        """Return the item of the interval starting at start, or None."""
+        index = self._index(start)
+        return None if index is None else self._items[index]
+
+    def replace(self, start, item):
+        """Swap the item of the interval starting at start. Raises KeyError if there is none."""
+        index = self._index(start)
+        if index is None:
+            raise KeyError(start)
+        self._items[index] = item
+
+    def remove(self, start):
+        """Remove and return the item of the interval starting at start. Raises KeyError if there is none."""
+        index = self._index(start)
+        if index is None:
+            raise KeyError(start)
+        del self._starts[index]
+        del self._ends[index]
+        return self._items.pop(index)
+
+    def pop_first(self):
+        """Remove and return the item of the earliest interval, or None if the schedule is empty."""
+        if not self._starts:
+            return None
+        return self.remove(self._starts[0])
+
+    def _index(self, start):
+        index = bisect_left(self._starts, start)
+        if index < len(self._starts) and self._starts[index] == start:
+            return index
+        return None
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(list(self._items))
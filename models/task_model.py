@@ -2,6 +2,8 @@ from models.patient_model import Patient
 
 
 class Task:
+    __slots__ = ('_description', '_patient', '_priority', '_is_completed', '_task_id', '__weakref__')
+
     def __init__(self, description, patient, priority):
         self._description = description
         if isinstance(patient, Patient):
@@ -13,6 +15,7 @@ class Task:
         else:
             raise TypeError("Must be an integer.")
         self._is_completed = False
+        self._task_id = None
 
     def mark_completed(self):
         self._is_completed = True
@@ -28,3 +31,22 @@ class Task:
     @property
     def priority(self):
         return self._priority
+
+    @priority.setter
+    def priority(self, new_p):
+        if isinstance(new_p, int):
+            self._priority = new_p
+        else:
+            raise TypeError("Must be an integer.")
+
+    @property
+    def is_completed(self):
+        return self._is_completed
+
+    @property
+    def task_id(self):
+        return self._task_id
+
+    @task_id.setter
+    def task_id(self, new_id):
+        self._task_id = new_id
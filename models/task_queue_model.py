@@ -0,0 +1,79 @@
+import heapq
+import itertools
+
+
+class TaskQueue:
+    """
+        Priority queue of tasks backed by a binary heap.
+
+        A lower priority number is served first and tasks with equal priority are served in the
+        order they were added. Removing or reprioritising a task only marks its heap entry as
+        stale; stale entries are skipped when they reach the top, and the heap is rebuilt once
+        they make up more than half of it.
+        """
+
+    def __init__(self, tasks=()):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._stale = 0
+        for task in tasks:
+            self.push(task)
+
+    def push(self, task, priority=None):
+        """Add a task, using its own priority unless one is given. Re-adding a queued task reprioritises it."""
+        if task in self._entries:
+            self.reprioritise(task, task.priority if priority is None else priority)
+            return
+        entry = [task.priority if priority is None else priority, next(self._counter), task]
+        self._entries[task] = entry
+        heapq.heappush(self._heap, entry)
+
+    def pop(self):
+        """Remove and return the task with the lowest priority number."""
+        while self._heap:
+            _, _, task = heapq.heappop(self._heap)
+            if task is None:
+                self._stale -= 1
+                continue
+            del self._entries[task]
+            return task
+        raise IndexError("pop from an empty task queue")
+
+    def peek(self):
+        """Return the next task without removing it, or None if the queue is empty."""
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+            self._stale -= 1
+        return self._heap[0][2] if self._heap else None
+
+    def remove(self, task):
+        """Remove a queued task. Raises ValueError if the task is not queued."""
+        entry = self._entries.pop(task, None)
+        if entry is None:
+            raise ValueError("Task is not in the queue.")
+        entry[2] = None
+        self._stale += 1
+        self._compact()
+
+    def reprioritise(self, task, priority):
+        """Move a queued task to a new priority; it goes behind tasks already queued at that priority."""
+        self.remove(task)
+        task.priority = priority
+        self.push(task)
+
+    def _compact(self):
+        if self._stale > len(self._entries):
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task):
+        return task in self._entries
+
+    def __iter__(self):
+        # Iterates a sorted snapshot, so the queue may be changed while iterating
+        return iter([entry[2] for entry in sorted(self._entries.values())])
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+import controllers.nurse_controller as nurse_controller
+from controllers.async_controllers import AsyncNurseController, AsyncPatientController
+from controllers.async_database_controller import AsyncDatabaseController, ExecutorClosedError, QueueFullError
+from controllers.database_controller import DatabaseController
+from models.hospital_employee_model import Department
+from models.nurse_model import Nurse
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+from models.task_model import Task
+
+
+class TestAsyncDatabaseController(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseController(os.path.join(self.tmp_dir.name, 'test.db'))
+        self.db.initialize_database()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def make_outpatient(name, age=30):
+        return OutPatient(name, age, 'Female', 'mail@example.com', '01001', 'AETNA', Condition.STABLE)
+
+    def test_concurrent_controller_calls(self):
+        async def scenario():
+            async with AsyncDatabaseController(self.db, workers=4, queue_size=8) as async_db:
+                patients = [self.make_outpatient(f"Patient {number}", number) for number in range(200)]
+                added = await asyncio.gather(*(AsyncPatientController.add_patient(async_db, patient)
+                                               for patient in patients))
+                rows = await async_db.query("SELECT COUNT(*) FROM outpatients")
+                return added, rows, async_db.stats()
+
+        added, rows, stats = asyncio.run(scenario())
+        self.assertTrue(all(added))
+        self.assertEqual(rows, [(200,)])
+        self.assertEqual((stats['submitted'], stats['completed']), (201, 201))
+
+    def test_backpressure_and_cancellation(self):
+        gate = threading.Event()
+
+        async def scenario():
+            async_db = AsyncDatabaseController(self.db, workers=1, queue_size=1, submit_timeout=0.05)
+            running = asyncio.create_task(async_db.run(gate.wait))
+            queued = asyncio.create_task(async_db.run(self.db.query, "SELECT 1"))
+            await asyncio.sleep(0.01)
+            # One job running and one waiting fill every slot
+            with self.assertRaises(QueueFullError):
+                await async_db.run(self.db.query, "SELECT 1")
+
+            queued.cancel()
+            await asyncio.sleep(0.01)
+            gate.set()
+            self.assertTrue(await running)
+            with self.assertRaises(asyncio.CancelledError):
+                await queued
+            await async_db.close(close_database=False)
+            with self.assertRaises(ExecutorClosedError):
+                await async_db.run(self.db.query, "SELECT 1")
+            return async_db.stats()
+
+        stats = asyncio.run(scenario())
+        self.assertEqual((stats['completed'], stats['cancelled'], stats['rejected']), (1, 1, 1))
+
+    def test_nurse_operations_are_serialized_per_nurse(self):
+        module_db = nurse_controller.db_controller
+        nurse_controller.db_controller = self.db
+        patient = self.make_outpatient("Nino Lomidze")
+        nurse = Nurse("Oumaima", 24, "Female", 24595, Department.NURSE)
+
+        async def scenario():
+            async with AsyncDatabaseController(self.db, workers=4) as async_db:
+                await AsyncPatientController.add_patient(async_db, patient)
+                tasks = [Task(f"Task {number}", patient, number) for number in range(50)]
+                await asyncio.gather(*(AsyncNurseController.assign_task(async_db, nurse, task) for task in tasks))
+                performed = await asyncio.gather(*(AsyncNurseController.perform_task(async_db, nurse)
+                                                   for _ in range(50)))
+                return performed, await async_db.read_changes(limit=100)
+
+        try:
+            performed, changes = asyncio.run(scenario())
+        finally:
+            nurse_controller.db_controller = module_db
+        self.assertTrue(all(performed))
+        self.assertEqual(len(nurse.assigned_tasks), 0)
+        self.assertEqual(len(changes), 50)
+        self.assertTrue(all(change['event'] == 'task_completed' for change in changes))
+
+    def test_consumer_follows_the_change_feed(self):
+        patients = [self.make_outpatient(f"Patient {number}", number) for number in range(3)]
+
+        async def scenario():
+            async with AsyncDatabaseController(self.db, workers=2) as async_db:
+                for patient in patients:
+                    await AsyncPatientController.add_patient(async_db, patient)
+                consumer = asyncio.create_task(async_db.wait_for_changes(0, timeout=10.0))
+                await asyncio.sleep(0.05)
+                await AsyncPatientController.admit_patient(async_db, patients[0])
+                first = await consumer
+                for patient in patients[1:]:
+                    await AsyncPatientController.discharge_patient(async_db, patient)
+                rest = await async_db.read_changes(first[-1]['seq'])
+                return first + rest
+
+        changes = asyncio.run(scenario())
+        self.assertEqual([(change['event'], change['data']['full_name']) for change in changes], [
+            ('patient_admitted', 'Patient 0'), ('patient_discharged', 'Patient 1'), ('patient_discharged', 'Patient 2'),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
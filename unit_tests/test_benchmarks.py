@@ -0,0 +1,73 @@
+
+import json
+import os
+import random
+import tempfile
+import unittest
+import controllers.nurse_controller as nurse_controller
+from benchmarks.model_memory import build_census
+from benchmarks.suite import SCENARIOS, compare, run_suite
+from benchmarks.workload import SCALES, generate
+from controllers.database_controller import DatabaseController
+from models.room_model import Room
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.runs = 0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def generated_counts(self, seed):
+        self.runs += 1
+        db = DatabaseController(os.path.join(self.tmp_dir.name, f'run_{self.runs}.db'))
+        try:
+            generate(db, 'tiny', seed)
+            tables = ('rooms', 'doctors', 'nurses', 'appointments', 'tasks', 'shifts', 'medical_history')
+            counts = {table: db.query(f"SELECT COUNT(*) FROM {table}")[0][0] for table in tables}
+            counts['patients'] = db.query("SELECT COUNT(*) FROM patient_directory")[0][0]
+            counts['sample'] = db.query("SELECT date_time, patient_id FROM appointments ORDER BY appointment_id LIMIT 5")
+            return counts
+        finally:
+            db.close()
+
+    def test_generator_is_seeded_and_fills_every_table(self):
+        counts = self.generated_counts(7)
+        self.assertEqual(counts, self.generated_counts(7))
+        expected = SCALES['tiny'].as_dict()
+        for table in ('rooms', 'patients', 'doctors', 'nurses', 'appointments', 'tasks', 'shifts', 'medical_history'):
+            self.assertEqual(counts[table], expected[table], table)
+
+    def test_suite_runs_every_scenario(self):
+        module_db = nurse_controller.db_controller
+        result = run_suite('tiny', seed=1, operations=10)
+        self.assertIs(nurse_controller.db_controller, module_db)
+
+        result = json.loads(json.dumps(result))
+        self.assertEqual(list(result['scenarios']), [name for name, _, _ in SCENARIOS])
+        for name, stats in result['scenarios'].items():
+            self.assertGreater(stats['succeeded'], 0, name)
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertEqual(len(compare(result, result)), len(SCENARIOS))
+
+    def test_census_patients_are_slotted_with_lazy_lists(self):
+        rooms = [Room(1, Room.RoomType.SINGLE, 150.0)]
+        census = build_census(40, random.Random(3), rooms, with_records=0.5)
+        for patient in census:
+            self.assertFalse(hasattr(patient, '__dict__'))
+        with_records = [patient for patient in census if patient._medical_history is not None]
+        self.assertTrue(0 < len(with_records) < len(census))
+        self.assertEqual(with_records[0].prescriptions, ["Paracetamol 500mg"])
+
+        patient = next(patient for patient in census if patient._medical_history is None)
+        patient.display_info()
+        self.assertIsNone(patient._prescriptions)
+        self.assertEqual(patient.cards, [])
+        patient.add_payment_method('card')
+        self.assertEqual(patient.cards, ['card'])
+
+
+if __name__ == '__main__':
+    unittest.main()
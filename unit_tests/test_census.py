@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from controllers.database_controller import DatabaseController
+from controllers.patient_controller import PatientController
+from models.inpatient_model import InPatient
+from models.outpatient_model import OutPatient
+from models.patient_model import AdmissionStatus, Condition
+from models.room_model import Room
+
+
+class TestCensus(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseController(os.path.join(self.tmp_dir.name, 'test.db'))
+        self.db.initialize_database()
+        self.icu = Room(101, Room.RoomType.ICU, 400)
+        self.double = Room(102, Room.RoomType.DOUBLE, 80)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def make_inpatient(name, age, condition, room, insurance='AETNA'):
+        return InPatient(name, age, 'Female', 'mail@example.com', '01001', insurance, condition, room)
+
+    @staticmethod
+    def make_outpatient(name, age, condition, insurance='Cigna'):
+        return OutPatient(name, age, 'Male', 'mail@example.com', '01002', insurance, condition)
+
+    def test_census_follows_the_write_paths(self):
+        census = self.db.census
+        critical = self.make_inpatient("Ana Beridze", 30, Condition.CRITICAL, self.icu)
+        stable = self.make_inpatient("Gio Kapanadze", 41, Condition.STABLE, self.double)
+        outpatient = self.make_outpatient("Nino Lomidze", 25, Condition.RECOVERING)
+        for patient in (critical, stable, outpatient):
+            self.assertTrue(PatientController.add_patient(self.db, patient))
+        self.assertEqual(census.count(), 3)
+        self.assertEqual(census.count(condition='Critical', room_type='ICU'), 1)
+        self.assertEqual(census.counts('room_type'), {'ICU': 1, 'Double': 1, None: 1})
+        self.assertEqual(census.counts('insurance', patient_table='inpatients'), {'AETNA': 2})
+
+        PatientController.admit_patient(self.db, critical)
+        PatientController.admit_patient(self.db, stable)
+        self.assertEqual(census.count(admission_status='Admitted'), 2)
+        stable.condition = Condition.CRITICAL
+        self.assertTrue(PatientController.save_patient(self.db, stable))
+        self.assertEqual(census.count(condition='Critical', admission_status=['Admitted', 'Pending']), 2)
+        self.assertTrue(PatientController.discharge_patient(self.db, critical))
+        self.assertEqual(PatientController.discharge_patients_bulk(self.db, [stable]), ['discharged'])
+        self.assertEqual(census.counts('admission_status'), {'Discharged': 2, 'Pending': 1})
+
+        self.assertTrue(PatientController.remove_patient(self.db, critical))
+        PatientController.add_patients_bulk(self.db, [self.make_outpatient("Luka Tsereteli", 52, Condition.STABLE)])
+        summary = PatientController.census_summary(self.db)
+        self.assertEqual(summary['patient_table'], {'inpatients': 1, 'outpatients': 2})
+        self.assertEqual(summary['condition'], {'Critical': 1, 'Recovering': 1, 'Stable': 1})
+        self.assertEqual(census.verify(), [])
+        self.assertTrue(PatientController.verify_census(self.db))
+
+    def test_verify_reports_writes_made_elsewhere(self):
+        PatientController.add_patient(self.db, self.make_outpatient("Nino Lomidze", 25, Condition.RECOVERING))
+        self.assertEqual(self.db.census.count(condition='Recovering'), 1)
+        with self.db.connect() as cursor:
+            cursor.execute("UPDATE outpatients SET condition = 'Stable'")
+
+        self.assertEqual(sorted(self.db.census.verify()), [
+            (('outpatients', 'Recovering', 'Pending', 'Cigna', None), 1, 0),
+            (('outpatients', 'Stable', 'Pending', 'Cigna', None), 0, 1),
+        ])
+        self.assertFalse(PatientController.verify_census(self.db))
+        self.assertEqual(self.db.census.count(condition='Stable'), 1)
+        self.assertTrue(PatientController.verify_census(self.db))
+        with self.assertRaises(ValueError):
+            self.db.census.count(ward='A')
+
+    def test_failed_admission_leaves_the_census_alone(self):
+        patient = self.make_outpatient("Nino Lomidze", 25, Condition.RECOVERING)
+        self.assertTrue(PatientController.add_patient(self.db, patient))
+        with self.db.connect() as cursor:
+            cursor.execute("CREATE TRIGGER block_admission BEFORE UPDATE OF admission_status ON outpatients "
+                           "BEGIN SELECT RAISE(ABORT, 'admissions are closed'); END")
+        self.assertFalse(PatientController.admit_patient(self.db, patient))
+        self.assertEqual(self.db.census.counts('admission_status'), {'Pending': 1})
+        self.assertEqual(patient.admission_status, AdmissionStatus.PENDING)
+        self.assertEqual(self.db.census.verify(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,459 @@
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from controllers.database_controller import DatabaseController, INDEXES, MIGRATIONS
+from controllers.connection_pool import PoolClosedError
+from controllers.query_stats import normalize_sql
+from controllers.statement_registry import StatementRegistry
+from log_config import get_slow_query_logger, setup_logging, shutdown_logging
+
+
+# Lookups the controllers run on every workflow; none of them may fall back to a full table scan.
+HOT_QUERIES = [
+    ("SELECT id FROM doctors WHERE full_name = ?", ('Doctor',)),
+    ("SELECT id FROM nurses WHERE full_name = ?", ('Nurse',)),
+    ("SELECT work_id FROM nurses WHERE full_name = ?", ('Nurse',)),
+    ("SELECT id FROM doctors WHERE work_id = ?", (1,)),
+    ("SELECT id FROM nurses WHERE work_id = ?", (1,)),
+    ("SELECT id FROM inpatients WHERE full_name = ?", ('Patient',)),
+    ("SELECT id FROM outpatients WHERE full_name = ?", ('Patient',)),
+    ("SELECT id FROM inpatients WHERE room_number = ?", (101,)),
+    ("SELECT appointment_id FROM appointments WHERE doctor_id = ? AND date_time >= ? AND date_time < ?",
+     (1, '2024-01-01 00:00:00', '2024-01-02 00:00:00')),
+    ("SELECT appointment_id FROM appointments WHERE patient_id = ?", (1,)),
+    ("SELECT entry FROM medical_history WHERE patient_id = ? AND patient_table = ? ORDER BY date_added",
+     (1, 'outpatients')),
+    ("SELECT task_id FROM tasks WHERE patient_id = ? AND is_completed = 0 ORDER BY priority", (1,)),
+    ("SELECT room_number FROM rooms WHERE room_number = ?", (101,)),
+    ("SELECT patient_table, id, unique_identifier FROM patient_directory WHERE full_name = ? ORDER BY patient_table",
+     ('Patient',)),
+]
+
+
+class TestDatabaseController(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseController(os.path.join(self.tmp_dir.name, 'test.db'), pool_size=2)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_connections_are_reused(self):
+        self.db.query("SELECT 1")
+        self.db.query("SELECT 1")
+        self.db.query("SELECT 1")
+        stats = self.db.pool_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['open'], 1)
+
+    def test_nested_borrows_are_not_counted_as_hits(self):
+        with self.db.connect():
+            self.db.query("SELECT 1")
+            self.db.query("SELECT 1")
+        stats = self.db.pool_stats()
+        self.assertEqual((stats['misses'], stats['hits'], stats['nested']), (1, 0, 2))
+
+    def test_nested_blocks_share_one_transaction(self):
+        self.db.create_table("CREATE TABLE items (name TEXT)")
+        with self.assertRaises(RuntimeError):
+            with self.db.connect(True) as cursor:
+                cursor.execute("INSERT INTO items VALUES ('a')")
+                self.db.insert_record("INSERT INTO items VALUES (?)", ('b',))
+                raise RuntimeError("abort")
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM items"), [(0,)])
+
+    def test_failed_cursor_setup_releases_the_connection(self):
+        def broken_cursor(connection, wait):
+            raise sqlite3.OperationalError("cursor setup failed")
+
+        self.db._cursor = broken_cursor
+        with self.assertRaises(sqlite3.OperationalError):
+            with self.db.connect():
+                pass
+        del self.db._cursor
+        self.assertEqual(self.db.pool.depth, 0)
+        self.assertEqual(self.db.query("SELECT 1"), [(1,)])
+        self.assertEqual(self.db.pool_stats()['idle'], 1)
+
+    def test_threads_get_their_own_connection(self):
+        seen = []
+        barrier = threading.Barrier(2)
+
+        def worker():
+            with self.db.connect() as cursor:
+                seen.append(cursor.connection)
+                barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsNot(seen[0], seen[1])
+        self.assertEqual(self.db.pool_stats()['idle'], 2)
+
+    def test_unhealthy_connection_is_replaced(self):
+        with self.db.connect() as cursor:
+            connection = cursor.connection
+        connection.close()
+        self.assertEqual(self.db.query("SELECT 1"), [(1,)])
+        self.assertEqual(self.db.pool_stats()['replaced'], 1)
+
+    def test_closed_pool_refuses_connections(self):
+        self.db.query("SELECT 1")
+        self.db.close()
+        self.assertEqual(self.db.pool_stats()['open'], 0)
+        with self.assertRaises(PoolClosedError):
+            with self.db.connect():
+                pass
+
+    def test_initialize_database_applies_migrations_once(self):
+        self.assertTrue(self.db.initialize_database())
+        self.assertEqual(self.db.schema_version(), MIGRATIONS[-1][0])
+        tables = {row[0] for row in self.db.query("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertTrue({'inpatients', 'outpatients', 'rooms', 'doctors', 'tasks'} <= tables)
+
+        before = self.db.pool_stats()
+        self.assertTrue(self.db.initialize_database())
+        after = self.db.pool_stats()
+        self.assertEqual(before['hits'] + before['misses'], after['hits'] + after['misses'])
+
+    def test_failed_migration_keeps_previous_version(self):
+        self.assertTrue(self.db.initialize_database())
+        version = self.db.schema_version()
+        broken = MIGRATIONS + [(version + 1, 'Broken', ("CREATE TABLE extra (id INTEGER)", "NOT SQL"))]
+        self.assertFalse(self.db.migrate(broken))
+        self.assertEqual(self.db.schema_version(), version)
+        self.assertEqual(self.db.query("SELECT name FROM sqlite_master WHERE name = 'extra'"), [])
+
+    def test_medical_history_entries_get_their_patient_table(self):
+        self.assertTrue(self.db.migrate(MIGRATIONS[:9]))
+        with self.db.connect() as cursor:
+            cursor.executemany("INSERT INTO inpatients (id, unique_identifier, full_name) VALUES (?, ?, ?)",
+                               [(1, 'IP_AB_30', 'Ana Beridze'), (3, 'IP_LT_52', 'Luka Tsereteli')])
+            cursor.executemany("INSERT INTO outpatients (id, unique_identifier, full_name) VALUES (?, ?, ?)",
+                               [(1, 'OP_NL_25', 'Nino Lomidze'), (2, 'OP_GK_41', 'Gio Kapanadze')])
+            cursor.executemany("INSERT INTO medical_history (patient_id, entry, date_added) VALUES (?, ?, ?)",
+                               [(patient_id, 'Checkup', '2024-01-01 10:00:00') for patient_id in (1, 2, 3, 4)])
+        self.assertTrue(self.db.migrate())
+        self.assertEqual(self.db.query("SELECT patient_id, patient_table FROM medical_history ORDER BY patient_id"),
+                         [(1, None), (2, 'outpatients'), (3, 'inpatients'), (4, None)])
+
+    def test_declared_indexes_exist(self):
+        self.db.initialize_database()
+        self.assertEqual(self.db.missing_indexes(), [])
+
+    def test_each_index_is_created_by_one_migration(self):
+        statements = [statement for _, _, migration in MIGRATIONS for statement in migration
+                      if isinstance(statement, str)]
+        for name, _, _ in INDEXES:
+            creating = [statement for statement in statements if f"CREATE INDEX IF NOT EXISTS {name} " in statement]
+            self.assertEqual(len(creating), 1, name)
+
+    def test_hot_queries_use_indexes(self):
+        self.db.initialize_database()
+        for sql, params in HOT_QUERIES:
+            with self.subTest(sql=sql):
+                self.assertEqual(self.db.full_table_scans(sql, params), [])
+
+    def test_full_table_scan_is_reported(self):
+        self.db.initialize_database()
+        scans = self.db.full_table_scans("SELECT id FROM doctors WHERE department = ?", ('Doctor',))
+        self.assertEqual(scans, ['SCAN doctors'])
+
+    def test_default_pragma_profile_is_applied(self):
+        settings = self.db.pragma_settings()
+        self.assertEqual(self.db.pragma_profile, 'balanced')
+        self.assertEqual(settings['journal_mode'], 'wal')
+        self.assertEqual(settings['synchronous'], 1)
+        self.assertEqual(settings['busy_timeout'], 5000)
+
+    def test_pragma_profile_applies_to_every_connection(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'bulk.db'), pool_size=2, pragma_profile='bulk_load')
+        synchronous = []
+        barrier = threading.Barrier(2)
+
+        def worker():
+            with db.connect() as cursor:
+                barrier.wait()
+                cursor.execute("PRAGMA synchronous")
+                synchronous.append(cursor.fetchone()[0])
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        db.close()
+        self.assertEqual(synchronous, [0, 0])
+
+    def test_unknown_pragma_profile_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DatabaseController(os.path.join(self.tmp_dir.name, 'other.db'), pragma_profile='fastest')
+
+    def test_iter_query_streams_rows_and_releases_connection(self):
+        self.db.initialize_database()
+        for number in range(25):
+            self.db.insert_record("INSERT INTO shifts (start_date_time, end_date_time, shift_type) VALUES (?, ?, ?)",
+                                  (f'2024-01-{number + 1:02d}', f'2024-01-{number + 1:02d}', 'Day'))
+        rows = self.db.iter_query("SELECT shift_id FROM shifts ORDER BY shift_id", chunk_size=4)
+        self.assertEqual(next(rows), (1,))
+        # The controller stays usable while the generator holds its own connection
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM shifts"), [(25,)])
+        self.assertEqual(self.db.pool_stats()['in_use'], 1)
+        self.assertEqual(len(list(rows)), 24)
+        self.assertEqual(self.db.pool_stats()['in_use'], 0)
+
+        rows = self.db.iter_query("SELECT shift_id FROM shifts")
+        next(rows)
+        rows.close()
+        self.assertEqual(self.db.pool_stats()['in_use'], 0)
+
+        # The connection is taken when the stream is created, before the first row is read
+        rows = self.db.iter_query("SELECT shift_id FROM shifts")
+        self.assertEqual(self.db.pool_stats()['in_use'], 1)
+        rows.close()
+        self.assertEqual(self.db.pool_stats()['in_use'], 0)
+
+    def test_iter_query_decides_its_connection_when_called(self):
+        self.db.initialize_database()
+        self.db.create_table("CREATE TABLE items (name TEXT)")
+        with self.db.connect() as cursor:
+            cursor.execute("INSERT INTO items VALUES ('uncommitted')")
+            inside = self.db.iter_query("SELECT name FROM items")
+        # Created inside the block, so it read the block's uncommitted row
+        self.assertEqual(list(inside), [('uncommitted',)])
+
+        outside = self.db.iter_query("SELECT name FROM items")
+        with self.db.connect() as cursor:
+            cursor.execute("INSERT INTO items VALUES ('later')")
+            # Created outside the block: its own connection, not part of this transaction
+            outside_rows = list(outside)
+        self.assertEqual(outside_rows, [('uncommitted',)])
+        self.assertEqual(self.db.pool_stats()['in_use'], 0)
+
+    def test_iter_query_on_a_single_connection_pool_does_not_block(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'single.db'), pool_size=1, pool_timeout=0.5)
+        db.create_table("CREATE TABLE items (name TEXT)")
+        for name in ('a', 'b', 'c'):
+            db.insert_record("INSERT INTO items VALUES (?)", (name,))
+        rows = db.iter_query("SELECT name FROM items ORDER BY name", chunk_size=1)
+        self.assertEqual(next(rows), ('a',))
+        self.assertEqual(db.query("SELECT COUNT(*) FROM items"), [(3,)])
+        self.assertEqual(list(rows), [('b',), ('c',)])
+        db.close()
+
+    def test_keyset_pages_cover_every_row_once(self):
+        self.db.initialize_database()
+        entries = [(1, f'Entry {number}', f'2024-01-0{number // 3 + 1} 10:00:00') for number in range(10)]
+        entries += [(2, 'Other patient', '2024-01-01 10:00:00')]
+        for entry in entries:
+            self.db.insert_record("INSERT INTO medical_history (patient_id, entry, date_added) VALUES (?, ?, ?)", entry)
+
+        for patient_id, expected in ((1, 10), (None, 11)):
+            seen, after = [], None
+            while True:
+                rows, after = self.db.page_medical_history(after, limit=3, patient_id=patient_id)
+                seen.extend(row[0] for row in rows)
+                if after is None:
+                    break
+            self.assertEqual(len(seen), expected)
+            self.assertEqual(len(set(seen)), expected)
+
+    def test_sql_is_normalized(self):
+        self.assertEqual(normalize_sql("SELECT id FROM rooms\n   WHERE room_number = 101 AND room_type = 'ICU';"),
+                         "SELECT id FROM rooms WHERE room_number = ? AND room_type = ?")
+        self.assertEqual(normalize_sql("SELECT id FROM tasks WHERE task_id IN (?, ?,?)"),
+                         "SELECT id FROM tasks WHERE task_id IN (?, ...)")
+
+    def test_statements_are_timed_with_rows(self):
+        self.db.create_table("CREATE TABLE items (name TEXT)")
+        for name in ('a', 'b', 'c'):
+            self.db.insert_record("INSERT INTO items VALUES (?)", (name,))
+        self.db.update_record("UPDATE items SET name = 'z' WHERE name != 'a'", ())
+        self.db.query("SELECT name FROM items")
+        self.db.query("SELECT name FROM items")
+
+        select = self.db.query_stats.get("SELECT name FROM items")
+        self.assertEqual((select['count'], select['rows']), (2, 6))
+        self.assertEqual(sum(select['histogram'].values()), 2)
+        self.assertEqual(self.db.query_stats.get("UPDATE items SET name = 'x' WHERE name != 'y'")['rows'], 2)
+        top = self.db.top_queries(2, by='count')
+        self.assertEqual(top[0]['sql'], "INSERT INTO items VALUES (?)")
+        self.assertEqual(top[0]['count'], 3)
+        self.assertEqual(len(self.db.top_queries(100)), 4)
+
+    def test_slow_queries_are_logged_separately(self):
+        shutdown_logging()
+        log_file = os.path.join(self.tmp_dir.name, 'slow.log')
+        try:
+            get_slow_query_logger(log_file=log_file)
+            db = DatabaseController(os.path.join(self.tmp_dir.name, 'slow.db'), slow_query_ms=0)
+            db.query("SELECT 'secret name' AS value")
+            db.close()
+            shutdown_logging()
+            with open(log_file) as log:
+                content = log.read()
+            self.assertIn("SELECT ? AS value", content)
+            self.assertNotIn("secret name", content)
+        finally:
+            shutdown_logging()
+            setup_logging()
+
+    def test_instrumentation_can_be_disabled(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'plain.db'), instrument=False)
+        db.query("SELECT 1")
+        self.assertEqual(db.top_queries(), [])
+        db.close()
+
+    def test_coalesced_writes_commit_in_groups(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'writes.db'), coalesce_writes=True,
+                                write_batch_size=50, write_delay_ms=20)
+        db.create_table("CREATE TABLE items (name TEXT NOT NULL UNIQUE)")
+        row_ids = []
+
+        def insert(start):
+            for number in range(start, start + 25):
+                row_ids.append(db.insert_record("INSERT INTO items VALUES (?)", (f"item {number}",)))
+
+        threads = [threading.Thread(target=insert, args=(start,)) for start in range(0, 200, 25)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(row_ids), list(range(1, 201)))
+        self.assertEqual(db.query("SELECT COUNT(*) FROM items"), [(200,)])
+        stats = db.write_coalescer.stats()
+        self.assertEqual(stats['statements'], 200)
+        self.assertLess(stats['batches'], 200)
+        db.close()
+
+    def test_failed_coalesced_write_only_fails_its_caller(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'writes.db'), coalesce_writes=True,
+                                write_delay_ms=50)
+        db.create_table("CREATE TABLE items (name TEXT NOT NULL UNIQUE)")
+        futures = [db.write_coalescer.submit("INSERT INTO items VALUES (?)", (name,)) for name in ('a', 'a', 'b')]
+
+        self.assertEqual(futures[0].result(), 1)
+        with self.assertRaises(sqlite3.IntegrityError):
+            futures[1].result()
+        self.assertEqual(futures[2].result(), 2)
+        self.assertEqual(db.write_coalescer.stats()['batches'], 1)
+        # Inside a transaction the write joins it instead of going to the writer thread
+        with db.connect(start_transaction=True):
+            self.assertIsNone(db.insert_record("INSERT INTO items VALUES (?)", ('a',)))
+            self.assertEqual(db.insert_record("INSERT INTO items VALUES (?)", ('c',)), 3)
+        self.assertEqual(db.write_coalescer.stats()['statements'], 3)
+        db.close()
+
+    def test_statement_registry_builds_each_statement_once(self):
+        registry = StatementRegistry()
+        first = registry.get('discharge', 'inpatients')
+        self.assertIs(registry.get('discharge', 'inpatients'), first)
+        self.assertIn("UPDATE inpatients SET admission_status = 'Discharged'", first)
+        with self.assertRaises(ValueError):
+            registry.get('delete', 'patients; DROP TABLE rooms')
+        with self.assertRaises(KeyError):
+            registry.get('truncate', 'inpatients')
+        stats = registry.stats()
+        self.assertEqual((stats['built'], stats['requests'], stats['reused']), (1, 2, 1))
+        self.assertEqual(stats['uses'], {'discharge:inpatients': 2})
+
+    def test_statement_cache_hits_are_counted(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'cache.db'), pool_size=1, cached_statements=2)
+        with db.connect() as cursor:
+            for sql in ("SELECT 1", "SELECT 1", "SELECT 2", "SELECT 3", "SELECT 1"):
+                cursor.execute(sql)
+        stats = db.statement_cache_stats()['connections']
+        # SELECT 1 is evicted by SELECT 2 and SELECT 3; the PRAGMA setup is not counted
+        self.assertEqual(stats['cached_statements'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 4)
+        db.close()
+
+    def test_health_checks_are_not_counted_as_statements(self):
+        db = DatabaseController(os.path.join(self.tmp_dir.name, 'cache.db'), pool_size=1)
+        for _ in range(3):
+            db.query("SELECT 2")
+        stats = db.statement_cache_stats()['connections']
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        db.close()
+
+    def seed_change_sources(self):
+        self.db.initialize_database()
+        self.db.insert_record("INSERT INTO rooms (room_number, room_type, daily_rate, capacity) VALUES (101, 'ICU', 400, 2)", ())
+        patient_id = self.db.insert_record(
+            "INSERT INTO inpatients (unique_identifier, full_name, condition, admission_status, room_number) "
+            "VALUES (?, ?, ?, ?, ?)", ('IN-1', 'Ana Beridze', 'Critical', 'Pending', 101))
+        appointment_id = self.db.insert_record(
+            "INSERT INTO appointments (description, date_time, appointment_type, patient_id, doctor_id, patient_table) "
+            "VALUES ('Check-up', '2024-01-01 09:00:00', 'Visit', ?, 1, 'inpatients')", (patient_id,))
+        task_id = self.db.insert_record(
+            "INSERT INTO tasks (description, patient_id, priority, patient_table, nurse_id) "
+            "VALUES ('Dressing', ?, 2, 'inpatients', 3)", (patient_id,))
+        return patient_id, appointment_id, task_id
+
+    def test_change_feed_records_admissions_and_completions(self):
+        patient_id, appointment_id, task_id = self.seed_change_sources()
+        self.assertEqual(self.db.read_changes(), [])
+
+        self.db.update_record("UPDATE inpatients SET admission_status = 'Admitted' WHERE id = ?", (patient_id,))
+        # Writes that leave the watched column as it was record nothing
+        self.db.update_record("UPDATE inpatients SET admission_status = 'Admitted', age = 40 WHERE id = ?",
+                              (patient_id,))
+        self.db.update_record("UPDATE appointments SET is_completed = 1 WHERE appointment_id = ?", (appointment_id,))
+        self.db.update_record("UPDATE tasks SET priority = 1 WHERE task_id = ?", (task_id,))
+        self.db.update_record("UPDATE tasks SET is_completed = 1 WHERE task_id = ?", (task_id,))
+        self.db.update_record("UPDATE inpatients SET admission_status = 'Discharged' WHERE id = ?", (patient_id,))
+        self.db.insert_record("INSERT INTO outpatients (unique_identifier, full_name, admission_status) "
+                              "VALUES ('OUT-1', 'Gio Kapanadze', 'Admitted')", ())
+
+        changes = self.db.read_changes()
+        self.assertEqual([(change['event'], change['table'], change['row_id']) for change in changes], [
+            ('patient_admitted', 'inpatients', patient_id),
+            ('appointment_completed', 'appointments', appointment_id),
+            ('task_completed', 'tasks', task_id),
+            ('patient_discharged', 'inpatients', patient_id),
+            ('patient_admitted', 'outpatients', 1),
+        ])
+        self.assertEqual([change['seq'] for change in changes], list(range(1, 6)))
+        self.assertEqual(changes[0]['data'], {'full_name': 'Ana Beridze', 'room_number': 101,
+                                              'admission_status': 'Admitted', 'previous_status': 'Pending'})
+        self.assertEqual(changes[2]['data'], {'patient_id': patient_id, 'patient_table': 'inpatients', 'nurse_id': 3,
+                                              'priority': 1})
+
+        # Consumers page through the feed with the last seq they handled
+        first = self.db.read_changes(0, limit=2)
+        rest = self.db.read_changes(first[-1]['seq'], limit=10)
+        self.assertEqual([change['seq'] for change in first + rest], list(range(1, 6)))
+        self.assertEqual(self.db.read_changes(changes[-1]['seq']), [])
+
+        # Pruned sequence numbers are never handed out again
+        self.assertEqual(self.db.change_feed.prune(5), 4)
+        self.db.update_record("UPDATE outpatients SET admission_status = 'Discharged' WHERE id = 1", ())
+        self.assertEqual([change['seq'] for change in self.db.read_changes()], [5, 6])
+        self.assertEqual(self.db.change_feed.last_seq(), 6)
+
+    def test_wait_for_changes_wakes_on_commit(self):
+        patient_id, _, _ = self.seed_change_sources()
+        self.db.change_feed.poll_interval = 30.0
+        self.assertEqual(self.db.wait_for_changes(0, timeout=0.05), [])
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.db.wait_for_changes(0, timeout=10.0)))
+        waiter.start()
+        self.db.update_record("UPDATE inpatients SET admission_status = 'Admitted' WHERE id = ?", (patient_id,))
+        waiter.join(5.0)
+        # Woken by the commit, not by the 30 second poll interval
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual([change['event'] for change in results[0]], ['patient_admitted'])
+
+
+if __name__ == '__main__':
+    unittest.main()
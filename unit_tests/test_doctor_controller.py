@@ -0,0 +1,143 @@
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, time, timedelta
+from controllers.database_controller import DatabaseController
+from controllers.doctor_availability import BUSY_INTERVALS_SQL
+from controllers.doctor_controller import DoctorController
+from controllers.patient_controller import PatientController
+from models.appointment_model import Appointment, AppointmentType
+from models.doctor_model import Doctor
+from models.hospital_employee_model import Department
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+
+
+class TestDoctorController(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db = DatabaseController(self.db_name)
+        self.patient = OutPatient("Nino Lomidze", 25, 'Female', 'mail@example.com', '01001', 'AETNA', Condition.STABLE)
+        PatientController.add_patient(self.db, self.patient)
+        self.doctor = Doctor("Giorgi Abashidze", 45, 'Male', 1001, Department.DOCTOR, "Cardiology")
+        DoctorController.add_doctor(self.db, self.doctor)
+        self.day = datetime(2024, 5, 6)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def book(self, hour, minute=0, duration=30):
+        appointment = Appointment("Checkup", self.day + timedelta(hours=hour, minutes=minute),
+                                  AppointmentType.CONSULTATION, self.patient, timedelta(minutes=duration))
+        return DoctorController.create_appointment(self.db, self.doctor, appointment), appointment
+
+    def test_overlapping_appointments_are_rejected(self):
+        self.assertTrue(self.book(9)[0])
+        self.assertFalse(self.book(9, 15)[0])
+        self.assertTrue(self.book(9, 30)[0])
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM appointments"), [(2,)])
+
+    def test_doctor_is_attached_and_saved(self):
+        doctor_id = self.db.identity_map.identify(self.doctor)[1]
+        self.assertEqual(DoctorController.find_doctor_id(self.db, self.doctor), doctor_id)
+        self.doctor.age = 46
+        self.assertTrue(DoctorController.save_doctor(self.db, self.doctor))
+        self.assertEqual(self.db.query("SELECT age FROM doctors WHERE id = ?", (doctor_id,)), [(46,)])
+        self.assertEqual(self.db.identity_map.stats()['saved_columns'], 1)
+
+        self.assertTrue(DoctorController.remove_doctor(self.db, self.doctor))
+        self.assertIsNone(self.db.identity_map.get('doctors', doctor_id))
+        self.assertFalse(DoctorController.save_doctor(self.db, self.doctor))
+
+    def test_stale_doctor_id_is_dropped_when_a_write_misses(self):
+        doctor_id = self.db.identity_map.identify(self.doctor)[1]
+        self.db.delete_record("DELETE FROM doctors WHERE id = ?", (doctor_id,))
+        self.assertFalse(self.book(9)[0])
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM appointments"), [(0,)])
+        self.assertIsNone(self.db.identity_map.identify(self.doctor))
+        self.assertIsNone(DoctorController.find_doctor_id(self.db, self.doctor))
+
+    def test_schedule_is_rebuilt_from_table(self):
+        self.book(14)
+        self.book(9, duration=60)
+        self.book(11)
+
+        db = DatabaseController(self.db_name)
+        self.assertTrue(DoctorController.load_schedules(db))
+        morning = DoctorController.appointments_between(db, self.doctor, self.day + timedelta(hours=8),
+                                                        self.day + timedelta(hours=12))
+        self.assertEqual([start.hour for start, _, _ in morning], [9, 11])
+        self.assertEqual(DoctorController.next_appointment(db, self.doctor, self.day + timedelta(hours=12))[0].hour, 14)
+        self.assertEqual(db.doctor_schedules.conflicts(1, self.day + timedelta(hours=9, minutes=45),
+                                                       self.day + timedelta(hours=10)), [2])
+        db.close()
+
+    def test_partial_minutes_are_stored_rounded_up(self):
+        appointment = Appointment("Checkup", self.day + timedelta(hours=9), AppointmentType.CONSULTATION,
+                                  self.patient, timedelta(minutes=90, seconds=30))
+        self.assertTrue(DoctorController.create_appointment(self.db, self.doctor, appointment))
+        self.assertEqual(self.db.query("SELECT duration_minutes FROM appointments"), [(91,)])
+
+        # After a reload the stored slot still blocks the last partial minute
+        db = DatabaseController(self.db_name)
+        self.assertTrue(DoctorController.load_schedules(db))
+        self.assertEqual(db.doctor_schedules.conflicts(1, self.day + timedelta(hours=10, minutes=30),
+                                                       self.day + timedelta(hours=11)), [appointment.appointment_id])
+        db.close()
+
+    def test_perform_duty_completes_earliest_appointment(self):
+        _, later = self.book(15)
+        _, earlier = self.book(8)
+        self.assertTrue(DoctorController.perform_duty(self.db, self.doctor))
+        self.assertTrue(earlier.is_completed)
+        self.assertFalse(later.is_completed)
+        self.assertEqual(self.db.query("SELECT is_completed FROM appointments WHERE appointment_id = ?",
+                                       (earlier.appointment_id,)), [(1,)])
+
+    def test_appointments_returns_a_copy(self):
+        self.assertFalse(self.doctor.has_appointments())
+        _, appointment = self.book(9)
+        self.doctor.appointments.clear()
+        self.assertTrue(self.doctor.has_appointments())
+        self.assertEqual(self.doctor.appointments, [appointment])
+        self.assertTrue(DoctorController.perform_duty(self.db, self.doctor))
+        self.assertFalse(self.doctor.has_appointments())
+        self.assertFalse(DoctorController.perform_duty(self.db, self.doctor))
+
+    def test_free_slots_merge_doctors_of_a_specialization(self):
+        second = Doctor("Tamar Kapanadze", 50, 'Female', 1002, Department.DOCTOR, "Cardiology")
+        DoctorController.add_doctor(self.db, second)
+        DoctorController.add_doctor(self.db, Doctor("Levan Gelashvili", 38, 'Male', 1003, Department.DOCTOR, "Neurology"))
+        self.book(7, 30, duration=45)  # Starts before the window and runs into it
+        self.book(8, 30, duration=90)
+        self.book(10)
+        for hour in (9, 10, 11):
+            appointment = Appointment("Checkup", self.day + timedelta(hours=hour), AppointmentType.CONSULTATION,
+                                      self.patient, timedelta(minutes=60))
+            DoctorController.create_appointment(self.db, second, appointment)
+
+        slots = DoctorController.find_free_slots(self.db, "Cardiology", self.day + timedelta(hours=8),
+                                                 self.day + timedelta(hours=12), limit=4)
+        at = lambda hour, minute=0: self.day + timedelta(hours=hour, minutes=minute)
+        self.assertEqual([(start, doctor_id) for start, _, doctor_id in slots],
+                         [(at(8), 2), (at(8, 30), 2), (at(10, 30), 1), (at(11), 1)])
+
+    def test_free_slots_respect_working_hours(self):
+        self.book(9, duration=480)
+        slots = DoctorController.find_free_slots(self.db, "Cardiology", self.day, self.day + timedelta(days=2),
+                                                 timedelta(minutes=60), limit=2, day_start=time(9), day_end=time(17))
+        self.assertEqual([start for start, _, _ in slots],
+                         [self.day + timedelta(days=1, hours=9), self.day + timedelta(days=1, hours=10)])
+
+    def test_busy_interval_query_uses_indexes(self):
+        self.db.initialize_database()
+        window = ('2024-05-06 00:00:00', '2024-05-13 00:00:00')
+        params = ('Cardiology',) + window + (window[0], 'Cardiology')
+        self.assertEqual(self.db.full_table_scans(BUSY_INTERVALS_SQL, params), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
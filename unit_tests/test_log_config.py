@@ -0,0 +1,80 @@
+
+import logging
+import os
+import queue
+import tempfile
+import unittest
+import log_config
+from log_config import SLOW_QUERY_LOG_FILE, DroppingQueueHandler, get_slow_query_logger, setup_logging, shutdown_logging
+
+
+class TestLogConfig(unittest.TestCase):
+    def setUp(self):
+        shutdown_logging()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp_dir.name, 'test.log')
+
+    def tearDown(self):
+        shutdown_logging()
+        self.tmp_dir.cleanup()
+        setup_logging()
+
+    def test_handlers_are_registered_once(self):
+        logger = setup_logging(log_file=self.log_file)
+        setup_logging(log_file=self.log_file)
+        setup_logging(log_file=self.log_file)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], DroppingQueueHandler)
+
+    def test_queue_mode_writes_on_listener_thread(self):
+        logger = setup_logging(log_file=self.log_file)
+        logger.info("Patient %s admitted.", "Ana Beridze")
+        shutdown_logging()
+        with open(self.log_file) as log:
+            self.assertIn("Patient Ana Beridze admitted.", log.read())
+
+    def test_size_rotation(self):
+        logger = setup_logging(mode='sync', log_file=self.log_file, rotation='size', max_bytes=200, backup_count=2)
+        for number in range(20):
+            logger.info("Rotating record %d", number)
+        shutdown_logging()
+        self.assertTrue(os.path.exists(self.log_file + '.1'))
+
+    def test_full_queue_drops_records(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, "message", None, None)
+        for _ in range(3):
+            handler.handle(record)
+        self.assertEqual(handler.dropped, 2)
+
+    def test_dropped_log_records_without_queue(self):
+        setup_logging(mode='sync', log_file=self.log_file)
+        self.assertEqual(log_config.dropped_log_records(), 0)
+
+    def test_percent_arguments_skip_formatting_for_disabled_levels(self):
+        formatted = []
+
+        class Expensive:
+            def __str__(self):
+                formatted.append(True)
+                return 'expensive'
+
+        logger = setup_logging(log_file=self.log_file, level=logging.INFO)
+        logger.debug("Value: %s", Expensive())
+        self.assertEqual(formatted, [])
+        logger.info("Value: %s", Expensive())
+        shutdown_logging()
+        self.assertTrue(formatted)
+        with open(self.log_file) as log:
+            self.assertIn("Value: expensive", log.read())
+
+    def test_slow_query_log_is_written_next_to_the_main_log(self):
+        setup_logging(log_file=self.log_file)
+        get_slow_query_logger().warning("Slow query (%.1f ms): %s", 250.0, "SELECT 1")
+        shutdown_logging()
+        with open(os.path.join(self.tmp_dir.name, SLOW_QUERY_LOG_FILE)) as log:
+            self.assertIn("SELECT 1", log.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+
+import os
+import tempfile
+import unittest
+import controllers.nurse_controller as nurse_controller
+from controllers.database_controller import DatabaseController
+from controllers.nurse_controller import NurseController
+from controllers.patient_controller import PatientController
+from models.hospital_employee_model import Department
+from models.nurse_model import Nurse
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+from models.task_model import Task
+
+
+class TestNurseController(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.module_db = nurse_controller.db_controller
+        nurse_controller.db_controller = DatabaseController(os.path.join(self.tmp_dir.name, 'test.db'))
+        self.db = nurse_controller.db_controller
+        self.patient = OutPatient("Nino Lomidze", 25, 'Female', 'mail@example.com', '01001', 'AETNA', Condition.STABLE)
+        PatientController.add_patient(self.db, self.patient)
+        self.nurse = Nurse("Oumaima", 24, "Female", 24595, Department.NURSE)
+
+    def tearDown(self):
+        self.db.close()
+        nurse_controller.db_controller = self.module_db
+        self.tmp_dir.cleanup()
+
+    def test_perform_task_completes_highest_priority_task(self):
+        low = Task("Change dressing", self.patient, 5)
+        high = Task("Give medication", self.patient, 1)
+        self.assertTrue(NurseController.assign_task(self.nurse, low))
+        self.assertTrue(NurseController.assign_task(self.nurse, high))
+
+        self.assertTrue(NurseController.perform_task(self.nurse))
+        self.assertTrue(high.is_completed)
+        self.assertEqual(self.db.query("SELECT is_completed FROM tasks WHERE task_id = ?", (high.task_id,)), [(1,)])
+        self.assertIs(self.nurse.next_task(), low)
+
+    def test_reprioritise_and_sync_tasks(self):
+        first = Task("Check vitals", self.patient, 2)
+        second = Task("Collect sample", self.patient, 3)
+        NurseController.assign_task(self.nurse, first)
+        NurseController.assign_task(self.nurse, second)
+
+        self.assertTrue(NurseController.reprioritise_task(self.nurse, second, 0))
+        self.assertIs(self.nurse.next_task(), second)
+        self.assertEqual(self.db.query("SELECT priority FROM tasks WHERE task_id = ?", (second.task_id,)), [(0,)])
+
+        # Completed elsewhere, e.g. by another nurse station
+        self.db.update_record("UPDATE tasks SET is_completed = 1 WHERE task_id = ?", (second.task_id,))
+        self.assertEqual(NurseController.sync_tasks(self.nurse), 1)
+        self.assertIs(self.nurse.next_task(), first)
+        self.assertEqual(len(self.nurse.assigned_tasks), 1)
+
+    def test_failed_writes_leave_the_queue_unchanged(self):
+        first = Task("Check vitals", self.patient, 2)
+        second = Task("Collect sample", self.patient, 3)
+        NurseController.assign_task(self.nurse, first)
+        NurseController.assign_task(self.nurse, second)
+        self.db.delete_record("DELETE FROM tasks WHERE task_id = ?", (first.task_id,))
+
+        self.assertFalse(NurseController.perform_task(self.nurse))
+        self.assertFalse(first.is_completed)
+        self.assertIs(self.nurse.next_task(), first)
+
+        self.db.delete_record("DELETE FROM tasks WHERE task_id = ?", (second.task_id,))
+        self.assertFalse(NurseController.reprioritise_task(self.nurse, second, 0))
+        self.assertIs(self.nurse.next_task(), first)
+        self.assertEqual(len(self.nurse.assigned_tasks), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,383 @@
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from controllers.database_controller import DatabaseController
+from controllers.patient_controller import PatientController
+from models.inpatient_model import InPatient
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+from models.room_model import Room
+
+
+class TestPatientController(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmp_dir.name, 'test.db')
+        self.db = DatabaseController(self.db_name)
+        self.db.initialize_database()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def make_inpatient(name, age, room):
+        return InPatient(name, age, 'Female', 'mail@example.com', '01001', 'AETNA', Condition.STABLE, room)
+
+    @staticmethod
+    def make_outpatient(name, age):
+        return OutPatient(name, age, 'Male', 'mail@example.com', '01002', 'AETNA', Condition.RECOVERING)
+
+    def test_add_patients_bulk(self):
+        room_a = Room(101, Room.RoomType.DOUBLE, 80)
+        room_b = Room(102, Room.RoomType.SINGLE, 50)
+        PatientController.add_patient(self.db, self.make_outpatient("Existing Person", 40))
+        patients = [
+            self.make_inpatient("Ana Beridze", 30, room_a),
+            self.make_inpatient("Gio Kapanadze", 41, room_a),
+            self.make_outpatient("Existing Person", 40),
+            "not a patient",
+            self.make_outpatient("Nino Lomidze", 25),
+            self.make_inpatient("Ana Beridze", 30, room_b),
+            self.make_inpatient("Luka Tsereteli", 52, room_b),
+        ]
+        outcomes = PatientController.add_patients_bulk(self.db, patients, batch_size=2)
+
+        self.assertEqual(outcomes, ['inserted', 'inserted', 'duplicate', 'invalid', 'inserted', 'duplicate', 'inserted'])
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM inpatients"), [(3,)])
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM outpatients"), [(2,)])
+        self.assertEqual(self.db.query("SELECT room_number FROM rooms ORDER BY room_number"), [(101,), (102,)])
+
+    def test_add_patients_bulk_takes_a_bed_per_inpatient(self):
+        single = Room(201, Room.RoomType.SINGLE, 50)
+        discharged = self.make_inpatient("Gio Kapanadze", 41, single)
+        discharged.discharge()
+        patients = [self.make_inpatient("Ana Beridze", 30, single), self.make_inpatient("Luka Tsereteli", 52, single),
+                    discharged, self.make_inpatient("Nino Lomidze", 25, single)]
+        outcomes = PatientController.add_patients_bulk(self.db, patients)
+
+        # A discharged inpatient needs no bed; the others beyond the room's capacity are refused
+        self.assertEqual(outcomes, ['inserted', 'no_bed', 'inserted', 'no_bed'])
+        self.assertEqual(self.db.query("SELECT occupied_beds, is_occupied FROM rooms WHERE room_number = 201"), [(1, 1)])
+        self.assertEqual(PatientController.free_beds(self.db), {'Single': 0})
+        self.assertFalse(PatientController.add_patient(self.db, self.make_inpatient("Eka Gelashvili", 33, single)))
+
+    def test_overbooked_rooms_are_reported_on_load(self):
+        PatientController.add_patient(self.db, self.make_inpatient("Ana Beridze", 30, Room(201, Room.RoomType.SINGLE, 50)))
+        with self.db.connect() as cursor:
+            cursor.execute("INSERT INTO inpatients (unique_identifier, full_name, room_number, admission_status) "
+                           "VALUES ('IN-2', 'Luka Tsereteli', 201, 'Admitted')")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.room_allocator.load()
+
+    def test_add_patients_bulk_rejects_bad_batch_size(self):
+        outcomes = PatientController.add_patients_bulk(self.db, [self.make_outpatient("Nino Lomidze", 25)], 0)
+        self.assertEqual(outcomes, ['invalid'])
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM outpatients"), [(0,)])
+
+    def test_patient_directory_lookup_is_cached(self):
+        patient = self.make_outpatient("Nino Lomidze", 25)
+        PatientController.add_patient(self.db, patient)
+        patient_id = PatientController.find_patient_id_by_name(self.db, "Nino Lomidze")
+        self.assertIsNotNone(patient_id)
+        self.assertEqual(PatientController.find_patient_id_by_name(self.db, "Nino Lomidze"), patient_id)
+        self.assertEqual(self.db.patient_directory.stats()['hits'], 1)
+        self.assertEqual(PatientController.find_patient_record(self.db, patient), ('outpatients', patient_id, 'OP_NL_25'))
+
+    def test_patient_directory_is_invalidated_on_writes(self):
+        patient = self.make_inpatient("Ana Beridze", 30, Room(101, Room.RoomType.SINGLE, 50))
+        self.assertIsNone(PatientController.find_patient_id_by_name(self.db, "Ana Beridze"))
+        PatientController.add_patient(self.db, patient)
+        self.assertIsNotNone(PatientController.find_patient_id_by_name(self.db, "Ana Beridze"))
+
+        self.assertTrue(PatientController.rename_patient(self.db, patient, "Ana Gelashvili"))
+        self.assertIsNone(PatientController.find_patient_id_by_name(self.db, "Ana Beridze"))
+        self.assertIsNotNone(PatientController.find_patient_id_by_name(self.db, "Ana Gelashvili"))
+
+        self.assertTrue(PatientController.remove_patient(self.db, patient))
+        self.assertIsNone(PatientController.find_patient_id_by_name(self.db, "Ana Gelashvili"))
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM inpatients"), [(0,)])
+
+    def test_patient_directory_does_not_cache_misses(self):
+        other = DatabaseController(self.db_name)
+        patient = self.make_outpatient("Nino Kapanadze", 25)
+        self.assertIsNone(PatientController.find_patient_id_by_name(other, "Nino Kapanadze"))
+        self.assertEqual(other.patient_directory.lookup_many(["Nino Kapanadze"]), {"Nino Kapanadze": ()})
+        self.assertTrue(PatientController.add_patient(self.db, patient))
+
+        # The other controller never saw the insert, but its earlier miss was not remembered
+        self.assertIsNotNone(PatientController.find_patient_record(other, patient))
+        self.assertTrue(PatientController.add_medical_history(other, patient, "Checkup"))
+        other.close()
+
+    def test_patient_directory_drops_a_cached_hit_when_a_write_misses(self):
+        other = DatabaseController(self.db_name)
+        self.assertTrue(PatientController.add_patient(self.db, self.make_outpatient("Nino Kapanadze", 25)))
+        patient_id = PatientController.find_patient_id_by_name(other, "Nino Kapanadze")
+        self.assertIsNotNone(patient_id)
+        self.assertTrue(PatientController.remove_patient(self.db, self.make_outpatient("Nino Kapanadze", 25)))
+
+        # The other controller still trusts its cached hit, until a write through it finds no row
+        self.assertEqual(PatientController.find_patient_id_by_name(other, "Nino Kapanadze"), patient_id)
+        self.assertFalse(PatientController.add_medical_history(other, self.make_outpatient("Nino Kapanadze", 25),
+                                                               "Checkup"))
+        self.assertIsNone(PatientController.find_patient_id_by_name(other, "Nino Kapanadze"))
+        other.close()
+
+    def test_stale_records_are_dropped_when_a_write_misses(self):
+        other = DatabaseController(self.db_name)
+        patient = self.make_outpatient("Nino Kapanadze", 25)
+        self.assertTrue(PatientController.add_patient(self.db, patient))
+        old_id = self.db.identity_map.identify(patient)[1]
+
+        # Removed and added again elsewhere, the patient's row now has a new id
+        self.assertTrue(PatientController.add_patient(other, self.make_outpatient("Levan Gelashvili", 50)))
+        self.assertTrue(PatientController.remove_patient(other, self.make_outpatient("Nino Kapanadze", 25)))
+        self.assertTrue(PatientController.add_patient(other, self.make_outpatient("Nino Kapanadze", 25)))
+        new_id = PatientController.find_patient_id_by_name(other, "Nino Kapanadze")
+        self.assertNotEqual(new_id, old_id)
+
+        # Lookups trust the map; the insert through the stale id fails and is retried with the new one
+        self.assertEqual(PatientController.find_patient_id(self.db, patient), old_id)
+        self.assertTrue(PatientController.add_medical_history(self.db, patient, "Checkup"))
+        self.assertEqual(self.db.identity_map.identify(patient), ('outpatients', new_id))
+        self.assertEqual(self.db.query("SELECT patient_id FROM medical_history"), [(new_id,)])
+
+        # Removed for good, the next write fails and the map lets go of the patient
+        self.assertTrue(PatientController.remove_patient(other, self.make_outpatient("Nino Kapanadze", 25)))
+        self.assertFalse(PatientController.admit_patient(self.db, patient))
+        self.assertIsNone(self.db.identity_map.identify(patient))
+        self.assertIsNone(PatientController.find_patient_record(self.db, patient))
+        self.assertFalse(PatientController.add_medical_history(self.db, patient, "Follow-up"))
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM medical_history"), [(1,)])
+        other.close()
+
+    def test_identity_map_save_detaches_a_deleted_row(self):
+        patient = self.make_outpatient("Nino Lomidze", 25)
+        PatientController.add_patient(self.db, patient)
+        patient_id = self.db.identity_map.identify(patient)[1]
+        self.db.delete_record("DELETE FROM outpatients WHERE id = ?", (patient_id,))
+        patient.age = 26
+        with self.assertRaises(KeyError):
+            self.db.identity_map.save(patient)
+        self.assertIsNone(self.db.identity_map.identify(patient))
+
+    def test_bulk_discharge_skips_rows_removed_through_another_controller(self):
+        other = DatabaseController(self.db_name)
+        room = Room(301, Room.RoomType.DOUBLE, 80)
+        PatientController.add_room(self.db, room)
+        patient = self.make_inpatient("Ana Beridze", 30, room)
+        self.assertTrue(PatientController.add_patient(self.db, patient))
+        self.assertTrue(PatientController.remove_patient(other, self.make_inpatient("Ana Beridze", 30, room)))
+        self.assertEqual(PatientController.discharge_patients_bulk(self.db, [patient]), ['not_found'])
+        self.assertIsNone(self.db.identity_map.identify(patient))
+        other.close()
+
+    def test_identity_map_writes_through_changed_columns(self):
+        patient = self.make_outpatient("Nino Lomidze", 25)
+        PatientController.add_patient(self.db, patient)
+        patient_id = self.db.identity_map.identify(patient)[1]
+        self.assertIs(self.db.identity_map.get('outpatients', patient_id), patient)
+        self.assertIs(self.db.identity_map.load('outpatients', patient_id, lambda: self.fail("built twice")), patient)
+
+        # Attached patients are resolved without a directory lookup
+        misses = self.db.patient_directory.stats()['misses']
+        self.assertTrue(PatientController.add_medical_history(self.db, patient, "Blood pressure checked"))
+        self.assertEqual(PatientController.find_patient_record(self.db, patient), ('outpatients', patient_id, 'OP_NL_25'))
+        self.assertEqual(self.db.patient_directory.stats()['misses'], misses)
+
+        patient.age = 26
+        patient.condition = Condition.CRITICAL
+        self.assertEqual(self.db.identity_map.dirty_columns(patient), {'age': 26, 'condition': 'Critical'})
+        self.assertTrue(PatientController.save_patient(self.db, patient))
+        self.assertEqual(self.db.query("SELECT age, condition FROM outpatients WHERE id = ?", (patient_id,)),
+                         [(26, 'Critical')])
+        self.assertEqual(self.db.identity_map.dirty_columns(patient), {})
+        self.assertEqual(self.db.identity_map.stats()['saved_columns'], 2)
+
+        # A copy loaded by name attaches to the same row and saves every column once
+        copy = self.make_outpatient("Nino Lomidze", 26)
+        copy.full_name = "Nino Beridze"
+        self.assertIsNone(PatientController.find_patient_record(self.db, copy))
+        copy.full_name = "Nino Lomidze"
+        self.assertEqual(PatientController.find_patient_id(self.db, copy), patient_id)
+        self.assertIsNone(self.db.identity_map.identify(patient))
+        copy.full_name = "Nino Beridze"
+        self.assertTrue(PatientController.save_patient(self.db, copy))
+        self.assertEqual(self.db.identity_map.stats()['saved_columns'], 9)
+        self.assertEqual(PatientController.find_patient_id_by_name(self.db, "Nino Beridze"), patient_id)
+        self.assertIsNone(PatientController.find_patient_id_by_name(self.db, "Nino Lomidze"))
+
+        self.assertTrue(PatientController.remove_patient(self.db, copy))
+        self.assertIsNone(self.db.identity_map.identify(copy))
+        self.assertFalse(PatientController.save_patient(self.db, copy))
+
+    def test_beds_are_allocated_and_released_by_type(self):
+        for room in (Room(201, Room.RoomType.DOUBLE, 80), Room(202, Room.RoomType.SINGLE, 50),
+                     Room(203, Room.RoomType.ICU, 300)):
+            PatientController.add_room(self.db, room)
+        self.assertEqual(PatientController.free_beds(self.db), {'Double': 2, 'Single': 1, 'ICU': 1})
+
+        self.assertEqual(PatientController.allocate_bed(self.db, 'Double'), (201, 0))
+        self.assertEqual(PatientController.allocate_bed(self.db, 'Double'), (201, 1))
+        self.assertIsNone(PatientController.allocate_bed(self.db, 'Double'))
+        self.assertEqual(self.db.query("SELECT occupied_beds, is_occupied FROM rooms WHERE room_number = 201"), [(2, 1)])
+
+        self.assertTrue(PatientController.release_bed(self.db, 201, 0))
+        self.assertFalse(PatientController.release_bed(self.db, 201, 0))
+        self.assertEqual(PatientController.free_beds(self.db, 'Double'), 1)
+        self.assertEqual(PatientController.allocate_bed(self.db, 'Double'), (201, 0))
+        self.assertEqual(PatientController.free_beds(self.db, 'ICU'), 1)
+
+    def test_bed_occupancy_is_rebuilt_from_inpatients(self):
+        room = Room(301, Room.RoomType.DOUBLE, 80)
+        self.assertTrue(PatientController.add_patient(self.db, self.make_inpatient("Ana Beridze", 30, room)))
+        self.assertTrue(PatientController.add_patient(self.db, self.make_inpatient("Gio Kapanadze", 41, room)))
+        self.assertFalse(PatientController.add_patient(self.db, self.make_inpatient("Luka Tsereteli", 52, room)))
+
+        db = DatabaseController(self.db_name)
+        self.assertEqual(PatientController.free_beds(db, 'Double'), 0)
+        self.assertEqual(db.room_allocator.occupied_beds(301), [0, 1])
+        db.close()
+
+    def test_discharged_inpatient_takes_no_bed(self):
+        room = Room(302, Room.RoomType.SINGLE, 50)
+        discharged = self.make_inpatient("Gio Kapanadze", 41, room)
+        discharged.discharge()
+        self.assertTrue(PatientController.add_patient(self.db, discharged))
+        self.assertEqual(PatientController.free_beds(self.db, 'Single'), 1)
+        self.assertTrue(PatientController.add_patient(self.db, self.make_inpatient("Ana Beridze", 30, room)))
+        self.assertEqual(self.db.room_allocator.occupied_beds(302), [0])
+
+        self.db.room_allocator.load()
+        self.assertEqual(self.db.room_allocator.occupied_beds(302), [0])
+
+    def test_allocated_beds_without_an_inpatient_are_freed_on_load(self):
+        PatientController.add_room(self.db, Room(303, Room.RoomType.ICU, 300))
+        self.assertEqual(PatientController.allocate_bed(self.db, 'ICU'), (303, 0))
+        self.db.room_allocator.load()
+        self.assertEqual(PatientController.free_beds(self.db, 'ICU'), 1)
+
+    def test_discharge_frees_the_bed_once(self):
+        room = Room(401, Room.RoomType.SINGLE, 50)
+        patient = self.make_inpatient("Ana Beridze", 30, room)
+        PatientController.add_patient(self.db, patient)
+        self.assertEqual(PatientController.free_beds(self.db, 'Single'), 0)
+        self.assertTrue(PatientController.discharge_patient(self.db, patient))
+        self.assertTrue(PatientController.discharge_patient(self.db, patient))
+        self.assertEqual(PatientController.free_beds(self.db, 'Single'), 1)
+        self.assertEqual(self.db.query("SELECT occupied_beds FROM rooms WHERE room_number = 401"), [(0,)])
+
+    def test_patient_subclasses_use_their_base_table(self):
+        class IcuPatient(InPatient):
+            pass
+
+        patient = IcuPatient("Ana Beridze", 30, 'Female', 'mail@example.com', '01001', 'AETNA', Condition.STABLE,
+                             Room(601, Room.RoomType.ICU, 400))
+        self.assertTrue(PatientController.add_patient(self.db, patient))
+        self.assertTrue(PatientController.admit_patient(self.db, patient))
+        self.assertEqual(self.db.query("SELECT admission_status FROM inpatients"), [('Admitted',)])
+        self.assertTrue(PatientController.discharge_patient(self.db, patient))
+        self.assertTrue(PatientController.remove_patient(self.db, patient))
+        self.assertEqual(self.db.query("SELECT COUNT(*) FROM inpatients"), [(0,)])
+        self.assertFalse(PatientController.admit_patient(self.db, "not a patient"))
+        self.assertEqual(self.db.statements.stats()['uses']['discharge:inpatients'], 2)
+
+    def test_discharge_patients_bulk(self):
+        double = Room(501, Room.RoomType.DOUBLE, 80)
+        single = Room(502, Room.RoomType.SINGLE, 50)
+        patients = [
+            self.make_inpatient("Ana Beridze", 30, double),
+            self.make_inpatient("Gio Kapanadze", 41, double),
+            self.make_inpatient("Luka Tsereteli", 52, single),
+            self.make_outpatient("Nino Lomidze", 25),
+        ]
+        for patient in patients:
+            PatientController.add_patient(self.db, patient)
+        self.assertEqual(PatientController.free_beds(self.db), {'Double': 0, 'Single': 0})
+
+        # A single pooled connection, so every statement of the discharge goes through the trace callback
+        db = DatabaseController(self.db_name, pool_size=1)
+        db.room_allocator.load()
+        statements = []
+        connection = db.pool.acquire()
+        connection.set_trace_callback(statements.append)
+        db.pool.release(connection)
+        outcomes = PatientController.discharge_patients_bulk(
+            db, patients[:2] + patients[3:] + [self.make_outpatient("Unknown Person", 60), "not a patient"])
+        free_beds = PatientController.free_beds(db)
+        db.close()
+
+        self.assertEqual(outcomes, ['discharged', 'discharged', 'discharged', 'not_found', 'invalid'])
+        # One directory lookup, four updates in one transaction and one room refresh; 'SELECT 1' is the pool health check
+        # The change feed triggers are traced again under the text of the UPDATE that fired them
+        statements = [sql for index, sql in enumerate(statements) if index == 0 or statements[index - 1] != sql]
+        queries = [sql for sql in statements if sql.lstrip().startswith(('SELECT', 'UPDATE')) and sql != 'SELECT 1']
+        self.assertEqual(len(queries), 6)
+        self.assertEqual(self.db.query("SELECT full_name FROM inpatients WHERE admission_status = 'Discharged'"),
+                         [("Ana Beridze",), ("Gio Kapanadze",)])
+        self.assertEqual(self.db.query("SELECT admission_status FROM outpatients"), [('Discharged',)])
+        self.assertEqual(free_beds, {'Double': 2, 'Single': 0})
+        self.assertEqual(self.db.query("SELECT occupied_beds, is_occupied FROM rooms WHERE room_number = 501"), [(0, 0)])
+
+    def test_get_medical_history(self):
+        patient = self.make_outpatient("Nino Lomidze", 25)
+        PatientController.add_patient(self.db, patient)
+        for entry in ("Checkup", "Blood test", "X-ray"):
+            self.assertTrue(PatientController.add_medical_history(self.db, patient, entry))
+        history = PatientController.get_medical_history(self.db, patient)
+        self.assertEqual([entry for entry, _ in history], ["Checkup", "Blood test", "X-ray"])
+        self.assertEqual([entry for entry, _ in PatientController.get_medical_history(self.db, patient, limit=2)],
+                         ["Blood test", "X-ray"])
+        self.assertIsNone(PatientController.get_medical_history(self.db, self.make_outpatient("Unknown", 30)))
+
+    def test_medical_history_is_kept_apart_for_overlapping_ids(self):
+        room = Room(401, Room.RoomType.DOUBLE, 80)
+        PatientController.add_room(self.db, room)
+        inpatient = self.make_inpatient("Ana Beridze", 30, room)
+        outpatient = self.make_outpatient("Nino Lomidze", 25)
+        self.assertTrue(PatientController.add_patient(self.db, inpatient))
+        self.assertTrue(PatientController.add_patient(self.db, outpatient))
+        self.assertEqual(PatientController.find_patient_id(self.db, inpatient),
+                         PatientController.find_patient_id(self.db, outpatient))
+
+        self.assertTrue(PatientController.add_medical_history(self.db, inpatient, "Penicillin allergy"))
+        self.assertEqual([entry for entry, _ in PatientController.get_medical_history(self.db, inpatient)],
+                         ["Penicillin allergy"])
+        self.assertEqual(PatientController.get_medical_history(self.db, outpatient), [])
+        self.assertEqual(PatientController.get_medical_history(self.db, outpatient, limit=5), [])
+
+    def test_search_medical_history(self):
+        history = [
+            ('inpatients', 1, "Allergic reaction to penicillin", "2024-01-05 10:00:00"),
+            ('outpatients', 2, "Prescribed amoxicillin; no penicillin allergy known", "2024-03-01 09:30:00"),
+            ('outpatients', 2, "Chest X-ray, no findings", "2024-03-02 11:00:00"),
+            ('outpatients', 3, "Penicillin-based antibiotics given", "2024-06-10 08:00:00"),
+        ]
+        self.db.run_transaction([("INSERT INTO medical_history (patient_table, patient_id, entry, date_added) "
+                                  "VALUES (?, ?, ?, ?)", row) for row in history])
+
+        results = PatientController.search_medical_history(self.db, "penicillin allergies")
+        self.assertEqual([row[1:3] for row in results], [('outpatients', 2)])
+        self.assertIn("[penicillin]", results[0][4])
+        self.assertEqual(len(PatientController.search_medical_history(self.db, "penicillin")), 3)
+        dated = PatientController.search_medical_history(self.db, "penicillin", since=datetime(2024, 2, 1),
+                                                         until=datetime(2024, 6, 1))
+        self.assertEqual([row[2] for row in dated], [2])
+        recent = PatientController.search_medical_history(self.db, "penicillin", limit=2, order='recent')
+        self.assertEqual([row[2] for row in recent], [3, 2])
+        self.assertEqual(len(PatientController.search_medical_history(self.db, "x-ray: (findings")), 1)
+        self.assertEqual(len(PatientController.search_medical_history(self.db, "penicillin NOT allerg*", raw=True)), 1)
+
+        # The triggers keep the index in step with updates and deletes
+        self.db.update_record("UPDATE medical_history SET entry = 'Chest X-ray clear' WHERE entry LIKE 'Allergic%'", ())
+        self.db.delete_record("DELETE FROM medical_history WHERE patient_id = 3", ())
+        self.assertEqual([row[2] for row in PatientController.search_medical_history(self.db, "penicillin")], [2])
+        self.assertEqual(len(PatientController.search_medical_history(self.db, "chest")), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from benchmarks.workload import generate
+from controllers.database_controller import DatabaseController
+from controllers.repositories import PatientRepository, warm_start
+from models.inpatient_model import InPatient
+
+
+class TestRepositories(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmp_dir.name, 'test.db')
+        seed_db = DatabaseController(self.db_name)
+        self.workload = generate(seed_db, 'tiny', 5)
+        seed_db.close()
+        # A fresh controller, as after a restart: nothing is in its identity map
+        self.db = DatabaseController(self.db_name)
+        self.db.initialize_database()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def statements_run(self):
+        return sum(statement['count'] for statement in self.db.top_queries(1000, by='count'))
+
+    def test_warm_start_rebuilds_the_model_graph(self):
+        before = self.statements_run()
+        loaded = warm_start(self.db)
+        # BEGIN, then rooms, inpatients, outpatients, doctors, appointments, nurses and tasks
+        self.assertEqual(self.statements_run() - before, 8)
+
+        self.assertEqual(len(loaded['patients']), len(self.workload.patients))
+        expected = {patient.full_name: patient for patient in self.workload.patients}
+        for patient in loaded['patients']:
+            original = expected[patient.full_name]
+            self.assertEqual((type(patient), patient.age, patient.condition, patient.admission_status),
+                             (type(original), original.age, original.condition, original.admission_status))
+            if isinstance(patient, InPatient):
+                self.assertIs(patient.room, loaded['rooms'][original.room.room_number])
+
+        open_appointments = self.db.query("SELECT COUNT(*) FROM appointments WHERE is_completed = 0")[0][0]
+        self.assertEqual(sum(len(doctor.appointments) for doctor in loaded['doctors']), open_appointments)
+        open_tasks = self.db.query("SELECT COUNT(*) FROM tasks WHERE is_completed = 0")[0][0]
+        self.assertEqual(sum(len(nurse.assigned_tasks) for nurse in loaded['nurses']), open_tasks)
+
+        # Appointments and tasks point at the loaded patient objects themselves
+        patients = {id(patient) for patient in loaded['patients']}
+        for doctor in loaded['doctors']:
+            self.assertTrue(all(id(appointment.patient) in patients for appointment in doctor.appointments))
+        for nurse in loaded['nurses']:
+            self.assertTrue(all(id(task.patient) in patients for task in nurse.assigned_tasks))
+
+        # Loading again returns the same objects without queueing anything twice
+        again = warm_start(self.db)
+        self.assertEqual([id(doctor) for doctor in again['doctors']], [id(doctor) for doctor in loaded['doctors']])
+        self.assertEqual(sum(len(doctor.appointments) for doctor in again['doctors']), open_appointments)
+        self.assertEqual(sum(len(nurse.assigned_tasks) for nurse in again['nurses']), open_tasks)
+
+    def test_rows_without_patient_table_resolve_inpatients_first(self):
+        repository = PatientRepository(self.db)
+        both = repository.load_many([(None, 1), ('outpatients', 1), ('inpatients', 10 ** 6)])
+        self.assertEqual(set(both), {(None, 1), ('outpatients', 1)})
+        self.assertIsInstance(both[(None, 1)], InPatient)
+        self.assertIs(both[(None, 1)], self.db.identity_map.get('inpatients', 1))
+        self.assertIsNot(both[(None, 1)], both[('outpatients', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
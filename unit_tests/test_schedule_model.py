@@ -0,0 +1,39 @@
+
+import unittest
+from datetime import datetime, timedelta
+from models.schedule_model import Schedule
+
+
+class TestScheduleModel(unittest.TestCase):
+    def setUp(self):
+        self.day = datetime(2024, 5, 6)
+        self.schedule = Schedule()
+        for hour, item in ((9, 'a'), (11, 'b'), (14, 'c')):
+            start = self.day + timedelta(hours=hour)
+            self.schedule.add(start, start + timedelta(minutes=30), item)
+
+    def test_overlapping_intervals_are_rejected(self):
+        start = self.day + timedelta(hours=11, minutes=15)
+        with self.assertRaises(ValueError):
+            self.schedule.add(start, start + timedelta(minutes=30), 'd')
+        # Touching intervals do not overlap
+        start = self.day + timedelta(hours=9, minutes=30)
+        self.schedule.add(start, start + timedelta(minutes=30), 'e')
+        self.assertEqual(list(self.schedule), ['a', 'e', 'b', 'c'])
+
+    def test_range_and_next_lookups(self):
+        morning = self.schedule.between(self.day + timedelta(hours=8), self.day + timedelta(hours=12))
+        self.assertEqual([item for _, _, item in morning], ['a', 'b'])
+        self.assertEqual(self.schedule.next_after(self.day + timedelta(hours=10))[2], 'b')
+        self.assertIsNone(self.schedule.next_after(self.day + timedelta(hours=15)))
+
+    def test_remove_and_pop_first(self):
+        self.assertEqual(self.schedule.remove(self.day + timedelta(hours=11)), 'b')
+        self.assertEqual(self.schedule.pop_first(), 'a')
+        self.assertEqual(len(self.schedule), 1)
+        with self.assertRaises(KeyError):
+            self.schedule.remove(self.day)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+
+import unittest
+from models.task_queue_model import TaskQueue
+from models.task_model import Task
+from models.outpatient_model import OutPatient
+from models.patient_model import Condition
+
+
+class TestTaskQueueModel(unittest.TestCase):
+    def setUp(self):
+        patient = OutPatient("Nino Lomidze", 25, 'Female', 'mail@example.com', '01001', 'AETNA', Condition.STABLE)
+        self.tasks = [Task(f"Task {number}", patient, priority) for number, priority in enumerate([3, 1, 2, 1, 3])]
+        self.queue = TaskQueue(self.tasks)
+
+    def test_pop_order_is_stable_for_equal_priorities(self):
+        order = [self.queue.pop().description for _ in range(len(self.tasks))]
+        self.assertEqual(order, ["Task 1", "Task 3", "Task 2", "Task 0", "Task 4"])
+        with self.assertRaises(IndexError):
+            self.queue.pop()
+
+    def test_peek_does_not_remove(self):
+        self.assertIs(self.queue.peek(), self.tasks[1])
+        self.assertEqual(len(self.queue), 5)
+
+    def test_reprioritise_and_remove(self):
+        self.queue.reprioritise(self.tasks[4], 0)
+        self.queue.remove(self.tasks[1])
+        self.assertEqual(self.tasks[4].priority, 0)
+        self.assertNotIn(self.tasks[1], self.queue)
+        self.assertEqual([task.description for task in self.queue], ["Task 4", "Task 3", "Task 2", "Task 0"])
+        self.assertIs(self.queue.pop(), self.tasks[4])
+        with self.assertRaises(ValueError):
+            self.queue.remove(self.tasks[1])
+
+
+if __name__ == '__main__':
+    unittest.main()